@@ -0,0 +1,91 @@
+"""
+Latency of admitted requests and throughput of a PyFast app pushed past its
+capacity, without admission control, with a fixed concurrency limit and with
+an adaptive (`AIMDLimit`) one.
+
+The handler's latency grows with the number of requests in flight (``--cost``
+ms each), as a CPU- or backend-bound service's does. ``--clients`` closed-loop
+clients hit it in-process through ``httpx.ASGITransport``; a shed client backs
+off 10 ms before retrying.
+
+    python benchmarks/bench_admission.py --clients 60 --duration 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from haraka.PyFast.core.admission import AdmissionController, AdmissionMiddleware, AIMDLimit
+
+
+def build_app(cost: float, controller: Optional[AdmissionController]) -> FastAPI:
+    app = FastAPI()
+    in_flight = [0]
+
+    @app.get("/")
+    async def root():
+        in_flight[0] += 1
+        try:
+            await asyncio.sleep(cost * in_flight[0])
+        finally:
+            in_flight[0] -= 1
+        return {"ok": True}
+
+    if controller is not None:
+        app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app
+
+
+async def hammer(app: FastAPI, clients: int, duration: float):
+    latencies: List[float] = []
+    shed = 0
+
+    async def client(c: httpx.AsyncClient) -> None:
+        nonlocal shed
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            started = time.perf_counter()
+            resp = await c.get("/")
+            if resp.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                shed += 1
+                await asyncio.sleep(0.01)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        await asyncio.gather(*(client(c) for _ in range(clients)))
+    latencies.sort()
+    return latencies, shed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--cost", type=float, default=5.0, help="ms of latency per request in flight")
+    parser.add_argument("--limit", type=int, default=8, help="fixed concurrency limit")
+    parser.add_argument("--target", type=float, default=50.0, help="AIMD target latency (ms)")
+    args = parser.parse_args()
+    cost = args.cost / 1000
+
+    setups = {
+        "none": None,
+        f"fixed({args.limit})": AdmissionController(max_concurrency=args.limit),
+        "aimd": AdmissionController(adaptive=AIMDLimit(initial=16, target_latency=args.target / 1000)),
+    }
+    print(f"{args.clients} clients for {args.duration}s, {args.cost} ms per request in flight\n")
+    print(f"{'admission':<12}{'ok/s':>8}{'p50':>10}{'p99':>10}{'shed':>8}{'limit':>8}")
+    for label, controller in setups.items():
+        lat, shed = asyncio.run(hammer(build_app(cost, controller), args.clients, args.duration))
+        limit = controller.stats()["limit"] if controller is not None else "-"
+        print(f"{label:<12}{len(lat) / args.duration:8.0f}{lat[len(lat) // 2] * 1000:8.1f}ms"
+              f"{lat[int(len(lat) * 0.99)] * 1000:8.1f}ms{shed:8d}{limit:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+`ResourcePurger.classify_paths` on a large synthetic project tree.
+
+Builds a tree of ``--entries`` files and directories on disk (in a temp dir),
+then times the walk + classification for the current implementation and for
+the previous one (Path-based ancestors, list lookups for protected dirs,
+``is_dir()`` per entry, ``spec.match_file`` per path), checking that both
+return the same classification.
+
+    python benchmarks/bench_classify_paths.py --entries 100000 --variant PyFast
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from pathspec import PathSpec
+
+from haraka.post_gen.config import compile_manifest
+from haraka.post_gen.service.fileOps.files import FileOps
+from haraka.post_gen.service.fileOps.purge import ResourcePurger
+from haraka.utils import Logger
+
+# Mix of kept and purged top-level areas for the PyFast manifest.
+TOPS = ["src/app/core", "src/app/services", "src/app/api/v1/routers", "src/other", "tests/unit",
+        "chart/templates", "infra", "runConfigurations/FastAPI", "junk", "docs"]
+
+
+def build_tree(root: Path, entries: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    dirs: List[str] = []
+    created = 0
+    for top in TOPS:
+        (root / top).mkdir(parents=True, exist_ok=True)
+        dirs.append(top)
+        created += top.count("/") + 1
+    while created < entries:
+        parent = rng.choice(dirs)
+        if rng.random() < 0.12 and parent.count("/") < 12:
+            child = f"{parent}/d{created}"
+            (root / child).mkdir()
+            dirs.append(child)
+        else:
+            (root / f"{parent}/f{created}.py").touch()
+        created += 1
+    for name in ("Dockerfile", "README.md", "Makefile", "stray.txt"):
+        (root / name).touch()
+
+
+# ------------- previous implementation (for comparison) ------------------ #
+def legacy_walk(root: Path) -> List[Path]:
+    paths: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        base = Path(dirpath)
+        paths.extend(base / name for name in dirnames)
+        paths.extend(base / name for name in filenames)
+    return paths
+
+
+def legacy_classify(paths: List[Path], root: Path, spec: PathSpec, protected: List[str]) \
+        -> Tuple[List[str], List[str], List[str], List[str]]:
+    matched, non_matched_files, non_matched_dirs, directories_skipped = [], [], [], []
+    matched_set = set()
+    for path in paths:
+        rel = path.relative_to(root).as_posix()
+        if spec.match_file(rel):
+            matched.append(rel)
+            matched_set.add(rel)
+            parent = Path(rel)
+            while parent != Path("."):
+                parent = parent.parent
+                matched_set.add(parent.as_posix())
+    for path in paths:
+        rel = path.relative_to(root).as_posix()
+        if rel in matched_set:
+            continue
+        if path.is_dir():
+            if rel in protected:
+                directories_skipped.append(rel)
+            else:
+                non_matched_dirs.append(rel)
+        else:
+            non_matched_files.append(rel)
+    return sorted(set(matched)), non_matched_dirs, non_matched_files, directories_skipped
+
+
+def best_of(rounds: int, fn):
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--variant", default="PyFast")
+    parser.add_argument("--services", default="kafka", help="comma-separated enabled services")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    manifest = compile_manifest(args.variant, [s for s in args.services.split(",") if s])
+    purger = ResourcePurger(FileOps(Logger("bench")), Logger("bench"))
+    purger._protected_dirs = frozenset(manifest.protected)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.entries)
+
+        old_paths = legacy_walk(root)
+        new_paths = purger._walk_tree(root)
+        print(f"{len(new_paths)} entries, variant {args.variant}, {len(manifest.keep_patterns)} keep pattern(s)\n")
+
+        t_old_walk, _ = best_of(args.rounds, lambda: legacy_walk(root))
+        t_new_walk, _ = best_of(args.rounds, lambda: purger._walk_tree(root))
+        t_old, old = best_of(args.rounds, lambda: legacy_classify(
+            old_paths, root, manifest.spec, list(manifest.protected)))
+        t_new, new = best_of(args.rounds, lambda: purger.classify_paths(new_paths, root, manifest.spec))
+        t_new_p, new_p = best_of(args.rounds, lambda: purger.classify_paths(old_paths, root, manifest.spec))
+
+        same = old == new == new_p
+        print(f"{'step':<34}{'before':>10}{'after':>10}{'speed-up':>10}")
+        for label, before, after in (
+            ("walk", t_old_walk, t_new_walk),
+            ("classify_paths (walked strings)", t_old, t_new),
+            ("classify_paths (Path objects)", t_old, t_new_p),
+        ):
+            print(f"{label:<34}{before * 1000:8.1f}ms{after * 1000:8.1f}ms{before / after:9.1f}x")
+        print(f"\nidentical classification: {same}  "
+              f"(kept {len(new[0])}, delete dirs {len(new[1])}, delete files {len(new[2])}, "
+              f"protected {len(new[3])})")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
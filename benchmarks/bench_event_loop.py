@@ -0,0 +1,130 @@
+"""
+Request throughput of a trivial PyFast app under each event-loop configuration.
+
+Every configuration runs the server in its own process (uvicorn on a bound
+socket, Orchestrator driven by ``haraka.PyFast.loop.run``) and is hammered by
+keep-alive HTTP/1.1 clients from this process for a fixed duration.
+
+    python benchmarks/bench_event_loop.py --duration 5 --connections 32
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import socket
+import time
+import types
+
+from haraka.PyFast import loop as pyfast_loop
+from haraka.PyFast.loop import LoopOptions
+
+CONFIGS = {
+    "asyncio": LoopOptions(use_uvloop=False),
+    "asyncio+executor(32)": LoopOptions(use_uvloop=False, executor_workers=32),
+    "asyncio+slow-callback": LoopOptions(use_uvloop=False, slow_callback_duration=0.1),
+    "uvloop": LoopOptions(use_uvloop=True),
+    "uvloop+executor(32)": LoopOptions(use_uvloop=True, executor_workers=32),
+}
+PATHS = ["/", "/executor"]
+
+
+# ------------- server side ---------------------------------------------- #
+def _build_app():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"ok": True}
+
+    @app.get("/executor")
+    async def executor():
+        loop = asyncio.get_running_loop()
+        return {"ok": await loop.run_in_executor(None, sum, range(100))}
+
+    return app
+
+
+def _serve(sock: socket.socket, options: LoopOptions, ready) -> None:
+    from haraka.PyFast.Runtime import Orchestrator
+    from haraka.PyFast.workers import serve_uvicorn
+
+    async def main() -> None:
+        runtime = Orchestrator("bench", loop_options=options)
+        app = _build_app()
+        await runtime.start(types.SimpleNamespace(port=sock.getsockname()[1]), app)
+        ready.set()
+        try:
+            await serve_uvicorn(app, sock, asyncio.Event())
+        finally:
+            await runtime.destroy()
+
+    pyfast_loop.run(main(), options)
+
+
+# ------------- client side ---------------------------------------------- #
+async def _client(port: int, path: str, deadline: float) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode()
+    done = 0
+    try:
+        while time.perf_counter() < deadline:
+            writer.write(request)
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            done += 1
+    finally:
+        writer.close()
+    return done
+
+
+async def _drive(port: int, path: str, duration: float, connections: int) -> float:
+    start = time.perf_counter()
+    deadline = start + duration
+    counts = await asyncio.gather(*(_client(port, path, deadline) for _ in range(connections)))
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def bench(name: str, options: LoopOptions, duration: float, connections: int) -> dict[str, float]:
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(2048)
+    ctx = mp.get_context("fork")
+    ready = ctx.Event()
+    proc = ctx.Process(target=_serve, args=(sock, options, ready), daemon=True)
+    proc.start()
+    try:
+        if not ready.wait(30):
+            raise RuntimeError(f"{name}: server did not start")
+        port = sock.getsockname()[1]
+        return {path: asyncio.run(_drive(port, path, duration, connections)) for path in PATHS}
+    finally:
+        proc.terminate()
+        proc.join()
+        sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per configuration and path")
+    parser.add_argument("--connections", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'configuration':<24}" + "".join(f"{p + ' req/s':>18}" for p in PATHS))
+    for name, options in CONFIGS.items():
+        if options.use_uvloop and not pyfast_loop.uvloop_available():
+            print(f"{name:<24}  (uvloop not installed – skipped)")
+            continue
+        result = bench(name, options, args.duration, args.connections)
+        print(f"{name:<24}" + "".join(f"{result[p]:>18,.0f}" for p in PATHS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Peak RSS of a purge's walk → classify → deletion plan → tree render on a
+large synthetic tree, with the `PathTable` pipeline and with the previous
+string-based one (interned relative-path list + directory set, four
+classification lists and a kept-ancestor set, tree rendered from the kept
+list). Nothing is deleted.
+
+Each pipeline runs in a fresh child process so ``ru_maxrss`` is its own:
+
+    python benchmarks/bench_path_table.py --entries 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from sys import intern
+from typing import List, Set, Tuple
+
+from haraka.post_gen.config import compile_manifest
+from haraka.post_gen.service.fileOps.files import FileOps
+from haraka.post_gen.service.fileOps.purge import ResourcePurger, _fast_matcher
+from haraka.utils import Logger
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_classify_paths import build_tree  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+# ------------- previous implementation (for comparison) ------------------ #
+def legacy_walk(root: Path) -> Tuple[List[str], Set[str]]:
+    paths: List[str] = []
+    dirs: Set[str] = set()
+    cut = len(str(root)) + 1
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_base = dirpath[cut:]
+        prefix = f"{rel_base}/" if rel_base else ""
+        if not rel_base:
+            dirnames[:] = [d for d in dirnames if d != ".git"]
+        for name in dirnames:
+            rel = intern(prefix + name)
+            paths.append(rel)
+            dirs.add(rel)
+        paths.extend(intern(prefix + name) for name in filenames)
+    return paths, dirs
+
+
+def legacy_pipeline(root: Path, spec, protected) -> int:
+    paths, dirs = legacy_walk(root)
+    match = _fast_matcher(spec)
+    matched, skipped, del_dirs, del_files = [], [], [], []
+    matched_set: Set[str] = set()
+    for rel in paths:
+        if match(rel):
+            matched.append(rel)
+            matched_set.add(rel)
+            cut = rel.rfind("/")
+            while cut > 0 and rel[:cut] not in matched_set:
+                matched_set.add(rel[:cut])
+                cut = rel.rfind("/", 0, cut)
+    for rel in paths:
+        if rel in matched_set:
+            continue
+        if rel in dirs:
+            (skipped if rel in protected else del_dirs).append(rel)
+        else:
+            del_files.append(rel)
+    matched = sorted(set(matched))
+    with open(os.devnull, "w") as null:
+        FileOps(Logger("bench")).print_tree(
+            root, paths=matched + skipped, dirs=[p for p in matched if p in dirs] + skipped,
+            max_entries=50, stream=null,
+        )
+    return len(paths)
+
+
+def table_pipeline(root: Path, spec, protected) -> int:
+    purger = ResourcePurger(FileOps(Logger("bench")), Logger("bench"))
+    purger._protected_dirs = frozenset(protected)
+    table = purger._walk_tree(root)
+    flags = purger._classify(table, spec)
+    purger._deletion_plan(table, flags)
+    with open(os.devnull, "w") as null:
+        FileOps(Logger("bench")).print_tree(
+            root, table=table, shown=purger._tree_mask(table, flags), max_entries=50, stream=null,
+        )
+    return len(table)
+
+
+def child(mode: str, root: Path, variant: str, services: List[str]) -> None:
+    manifest = compile_manifest(variant, services)
+    base = peak_rss_mb()
+    started = time.perf_counter()
+    run = table_pipeline if mode == "table" else legacy_pipeline
+    entries = run(root, manifest.spec, manifest.protected)
+    print(f"{mode} {entries} {base:.1f} {peak_rss_mb():.1f} {time.perf_counter() - started:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--variant", default="PyFast")
+    parser.add_argument("--services", default="kafka", help="comma-separated enabled services")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    services = [s for s in args.services.split(",") if s]
+
+    if args.child:
+        child(args.child[0], Path(args.child[1]), args.variant, services)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"building {args.entries} entries…", flush=True)
+        build_tree(root, args.entries)
+        results = {}
+        for mode in ("strings", "table"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--variant", args.variant, "--services", args.services,
+                 "--child", mode, str(root)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            results[mode] = (int(out[1]), float(out[2]), float(out[3]), float(out[4]))
+
+    entries = results["table"][0]
+    print(f"\n{entries} entries, variant {args.variant}\n")
+    print(f"{'pipeline':<10}{'peak RSS':>12}{'above start':>14}{'time':>9}")
+    for mode, (_, base, peak, secs) in results.items():
+        print(f"{mode:<10}{peak:10.1f}MB{peak - base:12.1f}MB{secs:8.2f}s")
+    before, after = (results[m][2] - results[m][1] for m in ("strings", "table"))
+    print(f"\nworking set {before / after:.1f}x smaller ({(before - after) * 1024 * 1024 / entries:.0f} bytes/entry saved)")
+
+
+if __name__ == "__main__":
+    main()
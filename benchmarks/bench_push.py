@@ -0,0 +1,114 @@
+"""
+Wall time of pushing many freshly committed projects to local bare-repo
+remotes (`BareRepoTarget`) sequentially and with `ParallelPusher`, plus a
+run where every project's first attempt fails transiently and is retried.
+Everything happens in a temporary directory; no network is used –
+``--latency`` adds a per-push delay standing in for the round-trips of a
+real remote (local pushes alone are CPU-bound and gain little on one core).
+
+    python benchmarks/bench_push.py --projects 32 --workers 8 --latency 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Set
+
+from haraka.post_gen.service.command import CommandError, CommandRunner
+from haraka.post_gen.service.gitOps.push import BareRepoTarget, ParallelPusher, PushJob, PushReport, PushTarget
+from haraka.utils import Logger
+
+
+class SlowTarget(PushTarget):
+    """Adds *latency* seconds to every push, like a remote across a network."""
+
+    def __init__(self, inner: PushTarget, latency: float) -> None:
+        self.inner = inner
+        self.latency = latency
+        self.name = inner.name
+
+    def push(self, job: PushJob, runner: CommandRunner) -> str:
+        time.sleep(self.latency)
+        return self.inner.push(job, runner)
+
+
+class FlakyTarget(PushTarget):
+    """Fails each project's first push like a dropped connection would."""
+
+    name = "bare (flaky)"
+
+    def __init__(self, inner: PushTarget) -> None:
+        self.inner = inner
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def push(self, job: PushJob, runner: CommandRunner) -> str:
+        with self._lock:
+            first = job.slug not in self._seen
+            self._seen.add(job.slug)
+        if first:
+            raise CommandError(["git", "push"], 128, "", "fatal: the remote end hung up unexpectedly")
+        return self.inner.push(job, runner)
+
+
+def make_projects(root: Path, count: int, files: int) -> List[PushJob]:
+    env = {"GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+           "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com"}
+    jobs = []
+    for n in range(count):
+        proj = root / f"svc-{n:03d}"
+        (proj / "src").mkdir(parents=True)
+        for f in range(files):
+            (proj / "src" / f"mod_{f}.py").write_text(f"VALUE = {n * files + f}\n" * 20)
+        subprocess.run(["git", "init", "-q", "-b", "main"], cwd=proj, check=True)
+        subprocess.run(["git", "add", "."], cwd=proj, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", "init"], cwd=proj, check=True,
+                       env={**env, "PATH": os.environ["PATH"]})
+        jobs.append(PushJob(proj, proj.name, "bench"))
+    return jobs
+
+
+def run(target: PushTarget, jobs, workers: int) -> PushReport:
+    logger = Logger("bench")
+    pusher = ParallelPusher(target, CommandRunner(logger, exit_on_error=False), logger,
+                            max_workers=workers, retries=3, backoff=0.05, max_backoff=0.2)
+    report = pusher.push_all(jobs)
+    assert report.ok, report.render()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--projects", type=int, default=32)
+    parser.add_argument("--files", type=int, default=50, help="files committed per project")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated network seconds per push")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"creating {args.projects} projects…", flush=True)
+        jobs = make_projects(root / "projects", args.projects, args.files)
+        remote = lambda name: SlowTarget(BareRepoTarget(root / name), args.latency)  # noqa: E731
+        rows = [
+            ("sequential", run(remote("seq"), jobs, 1)),
+            (f"{args.workers} workers", run(remote("par"), jobs, args.workers)),
+            (f"{args.workers} workers, flaky", run(FlakyTarget(remote("flaky")), jobs, args.workers)),
+        ]
+
+    print(f"\n{args.projects} projects × {args.files} files → local bare repositories "
+          f"(+{args.latency:.2f}s latency)\n")
+    print(f"{'run':<22}{'wall':>9}{'median':>9}{'retries':>9}")
+    for label, report in rows:
+        times = sorted(r.seconds for r in report.results)
+        print(f"{label:<22}{report.seconds:8.2f}s{times[len(times) // 2]:8.2f}s{report.retries:9d}")
+    print(f"\nspeed-up with {args.workers} workers: {rows[0][1].seconds / rows[1][1].seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
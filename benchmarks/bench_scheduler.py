@@ -0,0 +1,99 @@
+"""
+Many periodic jobs as hand-written ``while True: await asyncio.sleep()``
+startup tasks versus one `Scheduler` timer wheel: CPU time spent by the
+loop, total drift of the last run against its ideal schedule, and how many
+jobs ran within the same ``--burst`` window (thundering herd).
+
+Each job does nothing but record when it ran, so everything measured is
+scheduling overhead. Jobs ``--slow`` out of every 10 take 5 ms, which is
+what makes sleep loops drift.
+
+    python benchmarks/bench_scheduler.py --jobs 2000 --every 0.5 --duration 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Callable, List
+
+from haraka.PyFast.core.scheduler import Scheduler
+
+
+def make_jobs(count: int, slow: int, record: List[List[float]]) -> List[Callable]:
+    jobs = []
+    for n in range(count):
+        runs: List[float] = []
+        record.append(runs)
+
+        async def job(runs=runs, slow=(n % 10) < slow) -> None:
+            runs.append(asyncio.get_running_loop().time())
+            if slow:
+                await asyncio.sleep(0.005)
+
+        job.__name__ = f"job{n}"
+        jobs.append(job)
+    return jobs
+
+
+async def sleep_loops(jobs, every: float, duration: float) -> None:
+    async def loop(fn):
+        while True:
+            await asyncio.sleep(every)
+            await fn()
+
+    tasks = [asyncio.create_task(loop(fn)) for fn in jobs]
+    await asyncio.sleep(duration)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def wheel(jobs, every: float, duration: float, jitter: float) -> None:
+    scheduler = Scheduler(tick=0.01, slots=512)
+    for fn in jobs:
+        scheduler.add(fn, every=every, jitter=jitter)
+    scheduler.start()
+    await asyncio.sleep(duration)
+    await scheduler.stop()
+
+
+def measure(label: str, runner, args) -> None:
+    record: List[List[float]] = []
+    jobs = make_jobs(args.jobs, args.slow, record)
+
+    async def main():
+        start = asyncio.get_running_loop().time()
+        cpu = time.process_time()
+        await runner(jobs)
+        return start, time.process_time() - cpu
+
+    start, cpu = asyncio.run(main())
+    drift = [runs[-1] - (start + len(runs) * args.every) for runs in record if runs]
+    buckets = Counter(int((t - start) / args.burst) for runs in record for t in runs)
+    print(f"{label:<22}{cpu:8.2f}s{sum(len(r) for r in record):>9}"
+          f"{sum(drift) / len(drift) * 1000:11.1f}ms{max(buckets.values()):>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--every", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--slow", type=int, default=2, help="jobs out of 10 that take 5 ms")
+    parser.add_argument("--jitter", type=float, default=0.25, help="keep below --every")
+    parser.add_argument("--burst", type=float, default=0.01, help="window for the herd count (s)")
+    args = parser.parse_args()
+
+    expected = args.jobs * int(args.duration / args.every + 1e-9)
+    print(f"{args.jobs} jobs every {args.every}s for {args.duration}s ({expected} runs on schedule)\n")
+    print(f"{'runner':<22}{'CPU':>9}{'runs':>9}{'mean drift':>13}{'max burst':>11}")
+    run_for = args.duration + args.jitter + 0.05    # let the last scheduled (jittered) run start
+    measure("sleep loops", lambda jobs: sleep_loops(jobs, args.every, run_for), args)
+    measure("timer wheel", lambda jobs: wheel(jobs, args.every, run_for, 0.0), args)
+    measure("timer wheel +jitter", lambda jobs: wheel(jobs, args.every, run_for, args.jitter), args)
+
+
+if __name__ == "__main__":
+    main()
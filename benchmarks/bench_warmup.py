@@ -0,0 +1,77 @@
+"""
+Latency of the first real requests after `Orchestrator.start`, without and
+with a warmup phase: p50 / p99 / max of the first ``--first`` requests and
+how long start took.
+
+The app's handler pays ``--cold`` ms once per distinct query (a cold cache
+or lazily built client), the way handlers behave right after a deploy.
+Warmup sends the ``--hot`` most common queries through the app in process
+before readiness.
+
+    python benchmarks/bench_warmup.py --first 100 --cold 50 --hot 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from haraka.PyFast.Runtime import Orchestrator
+
+
+class _Settings:
+    port = 8000
+
+
+def make_app(cold: float) -> FastAPI:
+    app = FastAPI()
+    seen = set()
+
+    @app.get("/search")
+    async def search(q: str):
+        if q not in seen:
+            await asyncio.sleep(cold)
+            seen.add(q)
+        return {"q": q}
+
+    return app
+
+
+async def run(args, warm: bool) -> tuple:
+    app = make_app(args.cold / 1000)
+    runtime = Orchestrator(track_first_requests=args.first)
+    if warm:
+        for n in range(args.hot):
+            runtime.register_warmup_request(f"/search?q=q{n}")
+    started = time.perf_counter()
+    await runtime.start(_Settings, app)
+    await runtime.wait_for_all_ready(5)
+    start_s = time.perf_counter() - started
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n in range(args.first):
+            await client.get("/search", params={"q": f"q{n % args.hot}"})
+    stats = runtime.warmup_stats
+    await runtime.destroy()
+    return start_s, stats.percentile(0.5), stats.percentile(0.99), max(stats.first_latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--first", type=int, default=100, help="requests tracked after start")
+    parser.add_argument("--cold", type=float, default=50.0, help="first-call cost per query (ms)")
+    parser.add_argument("--hot", type=int, default=8, help="distinct queries")
+    args = parser.parse_args()
+
+    print(f"{'':<12}{'start':>10}{'p50':>10}{'p99':>10}{'max':>10}")
+    for label, warm in (("cold start", False), ("warmup", True)):
+        start_s, p50, p99, worst = asyncio.run(run(args, warm))
+        print(f"{label:<12}{start_s * 1000:8.1f}ms{p50 * 1000:8.2f}ms{p99 * 1000:8.2f}ms{worst * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 import asyncio
 import socket
+import time
 from enum import Enum, auto
-from typing import Awaitable, Callable
+from typing import Awaitable, Callable, Optional
 
 from fastapi import FastAPI
 
 from haraka.PyFast.core.interfaces import Service
+from haraka.PyFast.core.scheduler import Job, Scheduler
+from haraka.PyFast.core.warmup import FirstRequestsMiddleware, WarmupRequest, WarmupStats, run_warmup
+from haraka.PyFast.loop import LoopOptions, detach_slow_callback_logging, tune_loop
 from haraka.utils import Logger
 
 class LifecycleState(Enum):
@@ -22,26 +26,81 @@ class Orchestrator:
     - Startup/shutdown lifecycle tasks
     - Declarative service readiness tracking
     - Structured logging and Swagger UI auto-announcement
-    - Plug-and-play service registration via `.use(service)`
+    - Plug-and-play service registration via `.use(service)`, eager or lazy
+      (started on first `get_service` / `depends` access)
+    - Event-loop tuning (executor size, slow-callback logging) via `loop_options`
+    - Interval / cron jobs on one timer wheel via `register_periodic_task`
+    - A warmup phase (callables, synthetic in-process requests) that readiness
+      waits for, and (opt-in) latency of the first `track_first_requests`
+      real requests
     """
-    def __init__(self, variant: str = "PyFast"):
+    def __init__(self, variant: str = "PyFast", loop_options: Optional[LoopOptions] = None,
+                 max_concurrent_jobs: Optional[int] = None, track_first_requests: int = 0):
         self.variant = variant
         self.logger = Logger(self.variant).start_logger()
         self.state = LifecycleState.UNINITIALIZED
+        self.loop_options = loop_options
+        self.scheduler = Scheduler(self.logger, max_concurrent=max_concurrent_jobs)
 
         self.startup_tasks: list[Callable[[], Awaitable]] = []
         self.shutdown_tasks: list[Callable[[], Awaitable]] = []
         self._running_tasks: list[asyncio.Task] = []
+        self._tasks_launched = False                       # startup tasks now start on registration
 
         self._services: list[Service] = []
         self._service_events: dict[str, asyncio.Event] = {}
+        self._lazy: dict[str, Optional[float]] = {}        # lazy service -> warmup delay
+        self._started: list[Service] = []                  # in start order
+        self._starting: dict[str, asyncio.Task] = {}       # single-flight lazy starts
+        self._stopping = False                             # destroy() began: no new starts
+
+        self._warmups: list[tuple[str, Callable[[], Awaitable]]] = []
+        self._warmup_requests: list[WarmupRequest] = []
+        self._warm = asyncio.Event()
+        self.warmup_stats = WarmupStats(track_first=track_first_requests)
 
     def register_startup_task(self, coro_fn: Callable[[], Awaitable]):
         self.startup_tasks.append(coro_fn)
+        if self._tasks_launched:        # registered by a lazily started service (possibly during warmup)
+            self._running_tasks.append(asyncio.create_task(self._wrap_task(coro_fn)))
 
     def register_shutdown_task(self, coro_fn: Callable[[], Awaitable]):
         self.shutdown_tasks.append(coro_fn)
 
+    def register_periodic_task(
+        self,
+        coro_fn: Callable[[], Awaitable],
+        *,
+        every: Optional[float] = None,
+        cron: Optional[str] = None,
+        name: Optional[str] = None,
+        jitter: float = 0.0,
+        overlap: bool = False,
+        coalesce: bool = True,
+        first: Optional[float] = None,
+    ) -> Job:
+        """Run *coro_fn* ``every`` seconds or on a ``cron`` schedule once started (see `Scheduler.add`)."""
+        return self.scheduler.add(coro_fn, every=every, cron=cron, name=name, jitter=jitter,
+                                  overlap=overlap, coalesce=coalesce, first=first)
+
+    def register_warmup(self, coro_fn: Callable[[], Awaitable], name: Optional[str] = None):
+        """Run *coro_fn* during the warmup phase, before the runtime reports ready."""
+        self._warmups.append((name or getattr(coro_fn, "__name__", "warmup"), coro_fn))
+
+    def register_warmup_request(self, path: str, method: str = "GET", *, json=None, body: bytes = b"",
+                                headers: Optional[dict[str, str]] = None, repeat: int = 1):
+        """Send ``method path`` (``repeat`` times) through the app in process during warmup."""
+        self._warmup_requests.append(
+            WarmupRequest.build(path, method, json_body=json, body=body, headers=headers, repeat=repeat)
+        )
+
+    @property
+    def ready(self) -> bool:
+        """Warmup is done and every eager service has been marked ready."""
+        return self._warm.is_set() and all(
+            evt.is_set() for name, evt in self._service_events.items() if name not in self._lazy
+        )
+
     def register_service(self, name: str):
         if name not in self._service_events:
             self._service_events[name] = asyncio.Event()
@@ -60,38 +119,106 @@ class Orchestrator:
             self.logger.warn(f"⚠️ Tried to mark unknown service '{name}' as ready")
 
     async def wait_for_all_ready(self, timeout: float = 30.0):
+        """
+        Wait for every eager service and the warmup phase; lazy services are
+        ready on demand and not waited for.
+        """
+        eager = {name: evt for name, evt in self._service_events.items() if name not in self._lazy}
         try:
             await asyncio.wait_for(
-                asyncio.gather(*(evt.wait() for evt in self._service_events.values())),
+                asyncio.gather(self._warm.wait(), *(evt.wait() for evt in eager.values())),
                 timeout=timeout
             )
             self.logger.info("✅ All declared services are up and running!")
         except asyncio.TimeoutError:
-            unready = [name for name, evt in self._service_events.items() if not evt.is_set()]
+            unready = [name for name, evt in eager.items() if not evt.is_set()]
+            if not self._warm.is_set():
+                unready.append("<warmup>")
             self.logger.error("❌ Timed out waiting for services", extra={"unready_services": unready})
             raise
 
-    def use(self, service: Service):
+    def readiness(self) -> dict[str, str]:
+        """Per service: ``ready``, ``starting``, ``lazy`` (not started yet) or ``pending``."""
+        state = {}
+        for name, evt in self._service_events.items():
+            if evt.is_set():
+                state[name] = "ready"
+            elif name in self._starting:
+                state[name] = "starting"
+            elif name in self._lazy:
+                state[name] = "lazy"
+            else:
+                state[name] = "pending"
+        return state
+
+    def use(self, service: Service, *, lazy: Optional[bool] = None, warmup: Optional[float] = None):
+        """
+        Register *service*. Eager services start in `start()`. Lazy ones
+        (``lazy=True`` or ``service.lazy``) start on first `get_service`;
+        with *warmup*, also in the background that many seconds after start.
+        """
         service.runtime = self
         self._services.append(service)
         self.register_service(service.name)
+        if lazy is None:
+            lazy = getattr(service, "lazy", False)
+        if lazy:
+            self._lazy[service.name] = warmup
+
+    async def get_service(self, name: str) -> Service:
+        """
+        The started service *name*, starting a lazy one first. Concurrent
+        first accesses share one startup; a failed startup is retried by the
+        next access.
+        """
+        svc = self._service(name)
+        if svc in self._started:
+            return svc
+        if self._stopping:
+            raise RuntimeError(f"Service '{name}' requested after shutdown")
+        task = self._starting.get(name)
+        if task is None:
+            task = asyncio.create_task(self._start_service(svc))
+            self._starting[name] = task
+            task.add_done_callback(lambda _t: self._starting.pop(name, None))
+        # Shielded: one caller giving up (timeout, disconnect) does not abort the start for the others.
+        await asyncio.shield(task)
+        return svc
+
+    def depends(self, name: str) -> Callable[[], Awaitable[Service]]:
+        """FastAPI dependency: ``svc = Depends(runtime.depends("search"))``."""
+        async def dependency() -> Service:
+            return await self.get_service(name)
+        return dependency
 
     async def start(self, settings, app: FastAPI):
         if self.state != LifecycleState.UNINITIALIZED:
             self.logger.warn(f"🟡 Already started or shut down: {self.state.name}")
             return
 
+        if self.loop_options is not None:
+            tune_loop(asyncio.get_running_loop(), self.loop_options, self.logger)
+        self._install_first_requests_middleware(app)
+
         for svc in self._services:
+            if svc.name in self._lazy:
+                self.logger.debug(f"💤 Service '{svc.name}' starts on first use")
+                continue
             try:
-                await svc.startup()
-            except Exception as e:
-                self.logger.error(f"❌ Failed to start {svc.name}", extra={"error": str(e)})
+                await self._start_service(svc)
+            except Exception:
                 if not getattr(svc, "fail_silently", lambda: False)():
                     raise
 
+        self._tasks_launched = True
         for task_fn in self.startup_tasks:
             task = asyncio.create_task(self._wrap_task(task_fn))
             self._running_tasks.append(task)
+        for name, delay in self._lazy.items():
+            if delay is not None:
+                self._running_tasks.append(asyncio.create_task(self._wrap_task(self._warmup(name, delay))))
+        self.scheduler.start()
+        await self._run_warmup(app)
 
         self._print_docs_url(settings, app)
         self.state = LifecycleState.STARTED
@@ -101,17 +228,24 @@ class Orchestrator:
             self.logger.warn("🟡 Already destroyed")
             return
 
+        if self._stopping:
+            self.logger.warn("🟡 Already shutting down")
+            return
+        self._stopping = True
         self.logger.info("🛑 Application is shutting down!")
 
-        for task in self._running_tasks:
+        await self.scheduler.stop()
+        pending = [*self._running_tasks, *self._starting.values()]
+        for task in pending:
             task.cancel()
-        await asyncio.gather(*self._running_tasks, return_exceptions=True)
+        await asyncio.gather(*pending, return_exceptions=True)
 
-        for svc in reversed(self._services):
+        for svc in reversed(self._started):
             try:
                 await svc.shutdown()
             except Exception as e:
                 self.logger.error(f"❌ Shutdown failed for {svc.name}", extra={"error": str(e)})
+        self._started.clear()
 
         for task_fn in self.shutdown_tasks:
             try:
@@ -121,8 +255,71 @@ class Orchestrator:
                 self.logger.error("❌ Shutdown task failed:")
                 traceback.print_exc()
 
+        if self.loop_options is not None:
+            detach_slow_callback_logging(self.logger)
+
         self.state = LifecycleState.DESTROYED
 
+    def _service(self, name: str) -> Service:
+        for svc in self._services:
+            if svc.name == name:
+                return svc
+        raise KeyError(f"Unknown service '{name}'")
+
+    async def _start_service(self, svc: Service) -> None:
+        lazy = svc.name in self._lazy
+        started = time.perf_counter()
+        try:
+            await svc.startup()
+        except asyncio.CancelledError:
+            # Cancelled mid-startup (destroy): release whatever it already acquired.
+            try:
+                await svc.shutdown()
+            except Exception as e:
+                self.logger.error(f"❌ Shutdown failed for {svc.name}", extra={"error": str(e)})
+            raise
+        except Exception as e:
+            self.logger.error(f"❌ Failed to start {svc.name}", extra={"error": str(e)})
+            raise
+        self._started.append(svc)
+        if lazy:
+            self.logger.info(f"⚡ Lazy service '{svc.name}' started in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    async def _run_warmup(self, app: FastAPI):
+        steps = list(self._warmups)
+        for svc in self._started:
+            hook = getattr(svc, "warmup", None)
+            if callable(hook):
+                steps.append((svc.name, hook))
+        if steps or self._warmup_requests:
+            await run_warmup(app, steps, self._warmup_requests, self.warmup_stats, self.logger)
+            stats = self.warmup_stats
+            self.logger.info(
+                f"🔥 Warmup done in {stats.seconds * 1000:.1f} ms "
+                f"({len(steps)} step(s), {stats.requests} request(s), {stats.failed} failed)"
+            )
+        self._warm.set()
+
+    def _install_first_requests_middleware(self, app: FastAPI):
+        if self.warmup_stats.track_first <= 0 or app is None:
+            return
+        if any(m.cls is FirstRequestsMiddleware for m in getattr(app, "user_middleware", ())):
+            return
+        try:
+            app.add_middleware(FirstRequestsMiddleware, runtime=self)
+        except RuntimeError:     # the app already built its middleware stack (lifespan-driven start)
+            self.logger.warn(
+                "⚠️ App already started: first-request latency is not tracked; "
+                "add FirstRequestsMiddleware before the app starts"
+            )
+
+    def _warmup(self, name: str, delay: float) -> Callable[[], Awaitable]:
+        async def warmup() -> None:
+            await asyncio.sleep(delay)
+            await self.get_service(name)
+        warmup.__name__ = f"warmup:{name}"
+        return warmup
+
     async def _wrap_task(self, coro_fn: Callable[[], Awaitable]):
         try:
             await coro_fn()
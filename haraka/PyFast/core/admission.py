@@ -0,0 +1,378 @@
+"""
+Admission control and load shedding for PyFast services.
+
+Under overload, work that cannot be served in time should be refused at the
+door rather than queued in the event loop until every request is slow.
+`AdmissionController` decides per request, before the route runs:
+
+* **concurrency** – a global in-flight limit, fixed or adaptive (`AIMDLimit`:
+  grows while latency stays under target, backs off multiplicatively when it
+  does not), plus optional per-route limits;
+* **rate** – token buckets, global and per route;
+* **shedding** – refused requests get an immediate ``503`` with
+  ``Retry-After`` and never reach the app.
+
+Routes are matched by the longest configured path prefix. Health and docs
+paths, and the orchestrator's synthetic warmup requests, are exempt so probes
+and warmup keep working under load.
+
+Example
+-------
+>>> admission = AdmissionController(
+...     adaptive=AIMDLimit(initial=64, target_latency=0.2),
+...     rate=500, burst=1000,
+...     routes={"/search": RouteLimits(max_concurrency=16, rate=50)},
+... )
+>>> app.add_middleware(AdmissionMiddleware, controller=admission)
+>>> runtime.use(admission)
+>>> admission.stats()["shed"]
+"""
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Optional, Tuple
+
+from haraka.PyFast.core.interfaces import Service
+from haraka.PyFast.core.warmup import WARMUP_SCOPE_KEY
+from haraka.utils import Logger
+
+
+# ------------- limits ------------------------------------------------- #
+class TokenBucket:
+    """``rate`` tokens per second, at most ``burst`` saved up."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._stamp = clock()
+
+    def take(self) -> float:
+        """Take one token: 0.0 on success, else seconds until one is available."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def refund(self) -> None:
+        """Give back a token taken for a request that was shed after all."""
+        self._tokens = min(self.burst, self._tokens + 1.0)
+
+
+class ConcurrencyLimit:
+    """At most ``limit`` requests in flight."""
+
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        self.limit: float = limit
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+
+    def cancel(self) -> None:
+        """Undo `try_acquire` for a request that never ran (no latency sample)."""
+        self.in_flight -= 1
+
+
+class AIMDLimit(ConcurrencyLimit):
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Each request finishing within ``target_latency`` while the limit is in
+    real use adds ``increase / limit`` (about ``+increase`` per limit's worth
+    of requests); a slower one multiplies the limit by ``backoff``, at most
+    once per ``target_latency`` so one slow burst is not punished per request.
+    """
+
+    def __init__(self, initial: int = 32, *, min_limit: int = 1, max_limit: int = 1024,
+                 target_latency: float = 0.1, increase: float = 1.0, backoff: float = 0.9,
+                 clock=time.monotonic) -> None:
+        super().__init__(initial)
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.increase = increase
+        self.backoff = backoff
+        self._clock = clock
+        self._last_backoff = -math.inf
+
+    def release(self, latency: float) -> None:
+        in_flight = self.in_flight
+        super().release(latency)
+        if latency > self.target_latency:
+            now = self._clock()
+            if now - self._last_backoff >= self.target_latency:
+                self._last_backoff = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif in_flight * 2 >= self.limit:           # idle services do not grow their limit
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+
+@dataclass(frozen=True)
+class RouteLimits:
+    """Limits of one path prefix; ``None`` leaves that dimension to the global limits."""
+    max_concurrency: Optional[int] = None
+    rate: Optional[float] = None
+    burst: Optional[float] = None
+
+
+# ------------- stats -------------------------------------------------- #
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    shed_concurrency: int = 0
+    shed_rate: int = 0
+    shed_closed: int = 0        # refused while shutting down
+    in_flight: int = 0
+    max_in_flight: int = 0
+    limit: float = 0.0          # current global concurrency limit (0: none)
+
+    @property
+    def shed(self) -> int:
+        return self.shed_concurrency + self.shed_rate + self.shed_closed
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "shed": self.shed}
+
+
+@dataclass
+class _Route:
+    prefix: str
+    concurrency: Optional[ConcurrencyLimit]
+    bucket: Optional[TokenBucket]
+    stats: AdmissionStats = field(default_factory=AdmissionStats)
+
+
+@dataclass(frozen=True)
+class Rejection:
+    reason: str                 # "concurrency" | "rate" | "closed"
+    retry_after: float
+    route: Optional[str] = None
+
+
+def _under(path: str, prefix: str) -> bool:
+    """*path* is *prefix* or lies below it (``/api`` covers ``/api/x``, not ``/apix``)."""
+    return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+
+# ------------- controller --------------------------------------------- #
+class AdmissionController(Service):
+    """
+    Orchestrator-managed admission decisions; `AdmissionMiddleware` applies them.
+
+    Parameters
+    ----------
+    max_concurrency
+        Fixed global in-flight limit.
+    adaptive
+        Adaptive global limit instead (e.g. `AIMDLimit`).
+    rate, burst
+        Global token bucket (requests per second).
+    routes
+        Per path-prefix `RouteLimits`.
+    retry_after
+        ``Retry-After`` seconds for concurrency rejections (rate rejections
+        use the bucket's refill time).
+    exempt
+        Paths never limited (health checks, docs), with everything below them:
+        ``/health`` covers ``/health/db`` but not ``/healthz``. Route
+        prefixes match the same way.
+    """
+
+    name: str = "admission"
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: Optional[int] = None,
+        adaptive: Optional[ConcurrencyLimit] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        routes: Optional[Dict[str, RouteLimits]] = None,
+        retry_after: float = 1.0,
+        exempt: Tuple[str, ...] = ("/health", "/ready", "/live", "/docs", "/redoc", "/openapi.json"),
+        name: Optional[str] = None,
+    ) -> None:
+        if max_concurrency is not None and adaptive is not None:
+            raise ValueError("pass max_concurrency or adaptive, not both")
+        if name is not None:
+            self.name = name
+        self.retry_after = retry_after
+        self.exempt = tuple(exempt)
+        self.runtime = None
+        self._limit: Optional[ConcurrencyLimit] = adaptive or (
+            ConcurrencyLimit(max_concurrency) if max_concurrency is not None else None
+        )
+        self._bucket = TokenBucket(rate, burst) if rate is not None else None
+        self._routes = sorted(
+            (
+                _Route(
+                    prefix,
+                    ConcurrencyLimit(lim.max_concurrency) if lim.max_concurrency is not None else None,
+                    TokenBucket(lim.rate, lim.burst) if lim.rate is not None else None,
+                )
+                for prefix, lim in (routes or {}).items()
+            ),
+            key=lambda r: len(r.prefix),
+            reverse=True,
+        )
+        self._route_of: Dict[str, Optional[_Route]] = {}     # path -> route, memoised
+        self._stats = AdmissionStats()
+        self._closed = False
+        self._log: Logger = Logger(self.name)
+
+    # ------------- Service lifecycle ---------------------------------- #
+    async def startup(self):
+        self._closed = False
+        if self.runtime is not None:
+            self._log = self.runtime.logger
+            self.runtime.mark_ready(self.name)
+
+    async def shutdown(self):
+        """Shed everything from now on; requests in flight finish."""
+        self._closed = True
+        self._log.debug(f"Admission '{self.name}' closed: {self.stats()}")
+
+    # ------------- decisions ------------------------------------------ #
+    def admit(self, path: str):
+        """
+        `Rejection`, ``None`` for exempt paths, or a ticket to hand back to
+        `release` when the request is done.
+        """
+        if any(_under(path, p) for p in self.exempt):
+            return None
+        route = self._route_for(path)
+        stats = self._stats
+        if self._closed:
+            return self._shed(Rejection("closed", self.retry_after), route)
+
+        # Concurrency first, tokens last: a shed request must not spend tokens.
+        route_limit = route.concurrency if route is not None else None
+        if route_limit is not None and not route_limit.try_acquire():
+            return self._shed(Rejection("concurrency", self.retry_after, route.prefix), route)
+        if self._limit is not None and not self._limit.try_acquire():
+            if route_limit is not None:
+                route_limit.cancel()
+            return self._shed(Rejection("concurrency", self.retry_after), route)
+
+        taken = []
+        for bucket in (route.bucket if route else None, self._bucket):
+            if bucket is None:
+                continue
+            wait = bucket.take()
+            if wait:
+                for spent in taken:
+                    spent.refund()
+                if route_limit is not None:
+                    route_limit.cancel()
+                if self._limit is not None:
+                    self._limit.cancel()
+                return self._shed(Rejection("rate", wait, route and route.prefix), route)
+            taken.append(bucket)
+
+        for s in (stats, route.stats if route else None):
+            if s is not None:
+                s.admitted += 1
+                s.in_flight += 1
+                s.max_in_flight = max(s.max_in_flight, s.in_flight)
+        return _Ticket(route)
+
+    def release(self, ticket: "_Ticket", latency: float) -> None:
+        route = ticket.route
+        if self._limit is not None:
+            self._limit.release(latency)
+        self._stats.in_flight -= 1
+        if route is not None:
+            if route.concurrency is not None:
+                route.concurrency.release(latency)
+            route.stats.in_flight -= 1
+
+    def stats(self) -> dict:
+        out = self._stats.as_dict()
+        out["limit"] = round(self._limit.limit, 2) if self._limit is not None else 0.0
+        out["routes"] = {
+            r.prefix: {**r.stats.as_dict(), "limit": r.concurrency.limit if r.concurrency else 0.0}
+            for r in self._routes
+        }
+        return out
+
+    def _route_for(self, path: str) -> Optional[_Route]:
+        try:
+            return self._route_of[path]
+        except KeyError:
+            pass
+        route = next((r for r in self._routes if _under(path, r.prefix)), None)
+        if len(self._route_of) < 4096:           # bounded: paths may carry ids
+            self._route_of[path] = route
+        return route
+
+    def _shed(self, rejection: Rejection, route: Optional[_Route]) -> Rejection:
+        field_name = f"shed_{rejection.reason}"
+        for s in (self._stats, route.stats if route else None):
+            if s is not None:
+                setattr(s, field_name, getattr(s, field_name) + 1)
+        return rejection
+
+
+class _Ticket:
+    __slots__ = ("route",)
+
+    def __init__(self, route: Optional[_Route]) -> None:
+        self.route = route
+
+
+# ------------- ASGI middleware ---------------------------------------- #
+class AdmissionMiddleware:
+    """Pure ASGI middleware: ``app.add_middleware(AdmissionMiddleware, controller=…)``."""
+
+    def __init__(self, app, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        ticket = self.controller.admit(scope["path"])
+        if ticket is None:
+            await self.app(scope, receive, send)
+            return
+        if isinstance(ticket, Rejection):
+            await _reject(send, ticket)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(ticket, time.perf_counter() - started)
+
+
+async def _reject(send, rejection: Rejection) -> None:
+    body = json.dumps({"detail": "Service overloaded, retry later", "reason": rejection.reason}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(rejection.retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
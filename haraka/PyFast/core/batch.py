@@ -0,0 +1,279 @@
+"""
+Micro-batching for handlers that call a backend once per request.
+
+`BatchExecutor` collects individual ``await executor.submit(item)`` calls
+into one ``batch_fn(items)`` call, dispatched when ``max_batch_size`` items
+are queued or ``max_wait`` seconds passed since the first one, and fans the
+results back out to the callers in order.
+
+Example
+-------
+>>> async def fetch_users(ids: list[int]) -> list[User]:
+...     return await users_api.get_many(ids)
+>>> users = BatchExecutor(fetch_users, "users", max_batch_size=100, max_wait=0.002)
+>>> runtime.use(users)
+>>> user = await users.submit(42)
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from haraka.PyFast.core.interfaces import Service
+from haraka.utils import Logger
+
+K = TypeVar("K")
+R = TypeVar("R")
+
+
+class BatchClosedError(RuntimeError):
+    """Raised when submitting to an executor that is not running."""
+
+
+@dataclass
+class BatchStats:
+    submitted: int = 0
+    dispatched: int = 0        # items handed to batch_fn
+    batches: int = 0
+    full_batches: int = 0      # flushed because max_batch_size was reached
+    timed_batches: int = 0     # flushed because max_wait elapsed
+    failed_batches: int = 0
+    cancelled: int = 0         # callers that gave up before dispatch
+    rejected: int = 0          # submit_nowait() on a full queue
+    max_batch: int = 0
+    queued: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.dispatched / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "mean_batch": self.mean_batch}
+
+
+class BatchExecutor(Service, Generic[K, R]):
+    """
+    Orchestrator-managed micro-batcher.
+
+    Parameters
+    ----------
+    batch_fn
+        Coroutine taking a list of items and returning one result per item,
+        in the same order.
+    max_batch_size
+        Flush as soon as this many items are waiting.
+    max_wait
+        Seconds the first item of a batch may wait for company.
+    max_queue
+        Bound of the submit queue; ``submit`` waits (backpressure) and
+        ``submit_nowait`` raises ``asyncio.QueueFull`` once it is reached.
+    max_concurrent_batches
+        Batches that may be in flight at the same time.
+    """
+
+    name: str = "batch"
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Awaitable[Sequence[R]]],
+        name: Optional[str] = None,
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_queue: int = 1024,
+        max_concurrent_batches: int = 1,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if name is not None:
+            self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.runtime = None
+
+        self._queue: Optional[asyncio.Queue[Tuple[K, asyncio.Future]]] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: set[asyncio.Task] = set()
+        # Batch being assembled by the flush loop; survives its cancellation.
+        self._collecting: List[Tuple[K, asyncio.Future]] = []
+        self._own_task: Optional[asyncio.Task] = None
+        self._running = False
+        self._closed = False       # shutdown finished: late putters fail what they find queued
+        self._stats = BatchStats()
+        self._log: Logger = Logger(self.name)
+
+    # ------------- Service lifecycle ---------------------------------- #
+    async def startup(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._running = True
+        self._closed = False
+        if self.runtime is not None:
+            self._log = self.runtime.logger
+            self.runtime.register_startup_task(self._flush_loop)
+            self.runtime.mark_ready(self.name)
+        else:
+            self._own_task = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self):
+        """
+        Stop accepting work, dispatch everything still queued, wait for it.
+        Callers whose ``submit`` was still waiting on a full queue get
+        `BatchClosedError`.
+        """
+        self._running = False
+        if self._own_task is not None:
+            self._own_task.cancel()
+            await asyncio.gather(self._own_task, return_exceptions=True)
+        if self._collecting:
+            batch, self._collecting = self._collecting, []
+            await self._slots.acquire()
+            self._spawn(batch)
+        while self._queue is not None and not self._queue.empty():
+            batch = self._take_ready(self.max_batch_size)
+            if batch:
+                await self._slots.acquire()
+                self._spawn(batch)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._closed = True
+        self._fail_queued()
+        self._log.debug(f"Batch executor '{self.name}' flushed: {self.stats.as_dict()}")
+
+    # ------------- public API ----------------------------------------- #
+    @property
+    def stats(self) -> BatchStats:
+        self._stats.queued = self._queue.qsize() if self._queue is not None else 0
+        return self._stats
+
+    async def submit(self, item: K) -> R:
+        """Queue *item* (waiting while the queue is full) and await its result."""
+        fut = self._new_future()
+        await self._queue.put((item, fut))
+        if not self._running:
+            # Shut down while we waited for room: the drain may already be past us.
+            if not fut.done():
+                fut.set_exception(self._closed_error())
+            if self._closed:
+                self._fail_queued()        # nobody drains any more; wake the next putter
+            return await fut
+        self._stats.submitted += 1
+        return await fut
+
+    async def submit_nowait(self, item: K) -> R:
+        """Like `submit` but raise ``asyncio.QueueFull`` instead of waiting."""
+        fut = self._new_future()
+        try:
+            self._queue.put_nowait((item, fut))
+        except asyncio.QueueFull:
+            self._stats.rejected += 1
+            raise
+        self._stats.submitted += 1
+        return await fut
+
+    # ------------- internals ------------------------------------------ #
+    def _new_future(self) -> asyncio.Future:
+        if not self._running or self._queue is None:
+            raise self._closed_error()
+        return asyncio.get_running_loop().create_future()
+
+    def _closed_error(self) -> BatchClosedError:
+        return BatchClosedError(f"Batch executor '{self.name}' is not running")
+
+    def _fail_queued(self) -> None:
+        """Fail every future still queued with `BatchClosedError`."""
+        for _, fut in self._take_ready(self._queue.qsize()):
+            if not fut.done():
+                fut.set_exception(self._closed_error())
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = self._collecting = [first]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                batch.extend(self._take_ready(self.max_batch_size - len(batch)))
+                if len(batch) >= self.max_batch_size:
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await self._get_into(batch, remaining):
+                    break
+
+            if len(batch) >= self.max_batch_size:
+                self._stats.full_batches += 1
+            else:
+                self._stats.timed_batches += 1
+            await self._slots.acquire()
+            self._collecting = []
+            self._spawn(batch)
+
+    async def _get_into(self, batch: list, timeout: float) -> bool:
+        """Wait up to *timeout* for one more item; never loses it on cancellation."""
+        # asyncio.wait_for may swallow our own cancellation when the get()
+        # completes at the same moment, so drive the getter by hand.
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if getter.done() and not getter.cancelled():
+                batch.append(getter.result())
+            else:
+                getter.cancel()
+        return getter.done() and not getter.cancelled()
+
+    def _take_ready(self, limit: int) -> List[Tuple[K, asyncio.Future]]:
+        taken = []
+        while len(taken) < limit:
+            try:
+                taken.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return taken
+
+    def _spawn(self, batch: List[Tuple[K, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[K, asyncio.Future]]) -> None:
+        try:
+            live = [(item, fut) for item, fut in batch if not fut.done()]
+            self._stats.cancelled += len(batch) - len(live)
+            if not live:
+                return
+
+            self._stats.batches += 1
+            self._stats.dispatched += len(live)
+            self._stats.max_batch = max(self._stats.max_batch, len(live))
+            try:
+                results = await self.batch_fn([item for item, _ in live])
+                if len(results) != len(live):
+                    raise ValueError(
+                        f"batch_fn returned {len(results)} result(s) for {len(live)} item(s)"
+                    )
+            except Exception as e:
+                self._stats.failed_batches += 1
+                self._log.debug(f"Batch executor '{self.name}': batch of {len(live)} failed: {e}")
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+            except BaseException as e:     # cancelled (or interrupted): never strand the callers
+                for _, fut in live:
+                    if not fut.done():
+                        if isinstance(e, asyncio.CancelledError):
+                            fut.cancel()
+                        else:
+                            fut.set_exception(e)
+                raise
+
+            for (_, fut), result in zip(live, results):
+                if not fut.done():
+                    fut.set_result(result)
+        finally:
+            self._slots.release()
@@ -0,0 +1,521 @@
+"""
+In-process response cache for idempotent PyFast endpoints.
+
+`CacheService` plugs into the Orchestrator via ``runtime.use(cache)`` and
+offers:
+
+* ``@cache.cached(ttl=…)`` for FastAPI routes – cached 200 bodies are
+  replayed with an ``ETag``; a matching ``If-None-Match`` gets a bare 304.
+* TTL expiry plus LRU or LFU eviction under a byte budget.
+* Single-flight coalescing: concurrent misses for one key run the handler once.
+* Hit / miss / eviction counters via ``cache.stats``.
+* Optional prewarm of ``prewarm_keys`` through ``loader`` during startup.
+
+Responses that set a cookie are never cached, nor shared with coalesced
+callers; headers and status set on an injected ``Response`` parameter are
+kept with the entry.
+
+Example
+-------
+>>> cache = CacheService(max_bytes=64 << 20, policy="lfu")
+>>> runtime.use(cache)
+>>> @app.get("/items/{item_id}")
+... @cache.cached(ttl=30)
+... async def get_item(item_id: int): ...
+
+Cached replies are served as raw bytes, so FastAPI's ``response_model``
+filtering only runs on the miss that fills the entry.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from haraka.PyFast.core.interfaces import Service
+from haraka.utils import Logger
+
+KeyFn = Callable[[Request], str]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0      # 304s answered from an ETag
+    coalesced: int = 0         # misses that piggy-backed on an in-flight load
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_ratio": self.hit_ratio}
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+    headers: list = field(default_factory=list)    # (name, value) pairs; names may repeat
+    etag: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.etag:
+            self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+    @property
+    def private(self) -> bool:
+        """Carries ``Set-Cookie``: meant for one client only."""
+        return any(k.lower() == "set-cookie" for k, _ in self.headers)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+    freq: int = 1
+
+
+# ------------- eviction policies -------------------------------------- #
+class _LRUStore:
+    def __init__(self) -> None:
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: _Entry) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+
+    def pop(self, key: str) -> Optional[_Entry]:
+        return self._data.pop(key, None)
+
+    def victim(self) -> str:
+        return next(iter(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class _LFUStore:
+    """O(1) LFU: frequency buckets, LRU order inside each bucket."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, _Entry] = {}
+        self._buckets: "defaultdict[int, OrderedDict[str, None]]" = defaultdict(OrderedDict)
+        self._min_freq = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._bump(key, entry)
+        return entry
+
+    def put(self, key: str, entry: _Entry) -> None:
+        old = self._data.get(key)
+        if old is not None:
+            entry.freq = old.freq
+            self._data[key] = entry
+            self._bump(key, entry)
+            return
+        entry.freq = 1
+        self._data[key] = entry
+        self._buckets[1][key] = None
+        self._min_freq = 1
+
+    def pop(self, key: str) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            bucket = self._buckets[entry.freq]
+            bucket.pop(key, None)
+            if not bucket:
+                del self._buckets[entry.freq]
+        return entry
+
+    def victim(self) -> str:
+        if self._min_freq not in self._buckets:
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+    def _bump(self, key: str, entry: _Entry) -> None:
+        bucket = self._buckets[entry.freq]
+        bucket.pop(key, None)
+        if not bucket:
+            del self._buckets[entry.freq]
+            if self._min_freq == entry.freq:
+                self._min_freq = entry.freq + 1
+        entry.freq += 1
+        self._buckets[entry.freq][key] = None
+
+
+_POLICIES = {"lru": _LRUStore, "lfu": _LFUStore}
+
+
+class CacheService(Service):
+    """
+    Size-bounded TTL cache with single-flight loads and an ASGI route decorator.
+
+    Parameters
+    ----------
+    max_bytes
+        Upper bound for the summed size of all cached values.
+    default_ttl
+        Seconds an entry lives when ``ttl`` is not given per call.
+    policy
+        ``"lru"`` or ``"lfu"`` eviction once ``max_bytes`` is exceeded.
+    prewarm_keys, loader
+        When both are given, ``loader(key)`` fills every key during startup,
+        before the service is marked ready. Results are stored rendered, as
+        `cached` stores a route's return value, so prewarm keys are route
+        keys (``"GET:/items/1?"`` with the default key function).
+    """
+
+    name: str = "cache"
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        *,
+        max_bytes: int = 32 * 1024 * 1024,
+        default_ttl: float = 60.0,
+        policy: str = "lru",
+        prewarm_keys: Iterable[str] = (),
+        loader: Optional[Callable[[str], Awaitable[Any]]] = None,
+        prewarm_concurrency: int = 8,
+    ) -> None:
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown cache policy '{policy}' (expected one of {sorted(_POLICIES)})")
+        if name is not None:
+            self.name = name
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.policy = policy
+        self.prewarm_keys = list(prewarm_keys)
+        self.loader = loader
+        self.prewarm_concurrency = max(1, prewarm_concurrency)
+        self.runtime = None
+
+        self._store = _POLICIES[policy]()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._stats = CacheStats()
+        self._log: Logger = Logger(self.name)
+
+    # ------------- Service lifecycle ---------------------------------- #
+    async def startup(self):
+        if self.runtime is not None:
+            self._log = self.runtime.logger
+        if self.prewarm_keys and self.loader is not None:
+            started = time.perf_counter()
+            sem = asyncio.Semaphore(self.prewarm_concurrency)
+
+            async def _one(key: str) -> None:
+                async with sem:
+                    await self._get_or_load(key, lambda: self._render(self.loader(key)), None, _cacheable)
+
+            await asyncio.gather(*(_one(k) for k in self.prewarm_keys))
+            self._log.info(
+                f"🔥 Cache '{self.name}' prewarmed {len(self.prewarm_keys)} key(s) "
+                f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+        if self.runtime is not None:
+            self.runtime.mark_ready(self.name)
+
+    async def shutdown(self):
+        for fut in self._inflight.values():
+            fut.cancel()
+        self._inflight.clear()
+        self.clear()
+
+    # ------------- key/value API -------------------------------------- #
+    @property
+    def stats(self) -> CacheStats:
+        self._stats.entries = len(self._store)
+        return self._stats
+
+    def get(self, key: str) -> Any:
+        """Return the live value for *key* or ``None`` (counts a hit / miss)."""
+        entry = self._lookup(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> bool:
+        """Store *value*; returns ``False`` when it alone exceeds ``max_bytes``."""
+        size = _sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            self._log.debug(f"Cache '{self.name}': {key} ({size} B) exceeds max_bytes; not cached")
+            return False
+        self.invalidate(key)
+        ttl = self.default_ttl if ttl is None else ttl
+        self._store.put(key, _Entry(value, size, time.monotonic() + ttl))
+        self._stats.bytes += size
+        while self._stats.bytes > self.max_bytes:
+            self._evict(self._store.victim())
+            self._stats.evictions += 1
+        return True
+
+    def invalidate(self, key: str) -> None:
+        entry = self._store.pop(key)
+        if entry is not None:
+            self._stats.bytes -= entry.size
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._stats.bytes = 0
+
+    async def get_or_load(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        *,
+        cache_if: Callable[[Any], bool] = lambda _: True,
+    ) -> Any:
+        """Return the cached value or run *load* once for all concurrent callers."""
+        value, _ = await self._get_or_load(key, load, ttl, cache_if)
+        return value
+
+    # ------------- FastAPI decorator ---------------------------------- #
+    def cached(self, ttl: Optional[float] = None, key: Optional[KeyFn] = None):
+        """
+        Cache a GET route's 200 responses for *ttl* seconds.
+
+        The route gains an ``ETag`` header and answers ``If-None-Match`` with
+        304; *key* maps the request to a cache key (method, path and sorted
+        query string by default). Responses carrying ``Set-Cookie`` are
+        served but never cached.
+        """
+        key_fn = key or _default_key
+
+        def decorator(handler: Callable[..., Any]):
+            try:
+                # Resolve string annotations so FastAPI sees real types on the wrapper.
+                sig = inspect.signature(handler, eval_str=True)
+            except (TypeError, NameError):
+                sig = inspect.signature(handler)
+            request_param = next(
+                (p.name for p in sig.parameters.values() if p.annotation in (Request, "Request")),
+                None,
+            )
+            # FastAPI's sub-response: where the handler and its dependencies set headers and status.
+            response_param = next(
+                (p.name for p in sig.parameters.values() if _is_response_annotation(p.annotation)),
+                None,
+            )
+            injected = []
+            params = list(sig.parameters.values())
+            for name, annotation, found in (("_cache_request", Request, request_param),
+                                            ("_cache_response", Response, response_param)):
+                if found is None:
+                    injected.append(name)
+                    params.append(inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation))
+            request_param = request_param or "_cache_request"
+            response_param = response_param or "_cache_response"
+            sig = sig.replace(parameters=params)
+
+            async def _call(kwargs: dict) -> Any:
+                if inspect.iscoroutinefunction(handler):
+                    return await handler(**kwargs)
+                return await run_in_threadpool(handler, **kwargs)
+
+            @functools.wraps(handler)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs[request_param]
+                response: Response = kwargs[response_param]
+                for name in injected:
+                    kwargs.pop(name)
+                cache_key = key_fn(request)
+                status_code = getattr(request.scope.get("route"), "status_code", None) or 200
+                loaded = False
+
+                async def load() -> CachedResponse:
+                    nonlocal loaded
+                    loaded = True
+                    return await self._render(_call(kwargs), response, status_code)
+
+                cached, hit = await self._get_or_load(cache_key, load, ttl, _cacheable)
+                if cached.private and not loaded:
+                    # Coalesced onto another client's load: never hand out its cookies.
+                    cached = await self._render(_call(kwargs), response, status_code)
+                return self._replay(cached, request, hit=hit)
+
+            wrapper.__signature__ = sig
+            return wrapper
+
+        return decorator
+
+    # ------------- internals ------------------------------------------ #
+    async def _get_or_load(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+        cache_if: Callable[[Any], bool],
+    ) -> tuple[Any, bool]:
+        while True:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._stats.hits += 1
+                return entry.value, True
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self._stats.coalesced += 1
+            try:
+                return await asyncio.shield(pending), False
+            except asyncio.CancelledError:
+                if not pending.cancelled() or _cancelling():
+                    raise           # our own cancellation
+                # The leader was cancelled (its client went away): load again or re-join.
+
+        self._stats.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved; coalesced waiters re-raise it themselves
+            raise
+        else:
+            if cache_if(value):
+                self.set(key, value, ttl)
+            fut.set_result(value)
+            return value, False
+        finally:
+            self._inflight.pop(key, None)
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._evict(key)
+            self._stats.expirations += 1
+            return None
+        return entry
+
+    def _evict(self, key: str) -> None:
+        entry = self._store.pop(key)
+        if entry is not None:
+            self._stats.bytes -= entry.size
+
+    @staticmethod
+    async def _render(result: Awaitable[Any], response: Optional[Response] = None,
+                      status_code: int = 200) -> CachedResponse:
+        """
+        Render a handler's return value; headers and status set on the
+        injected sub-*response* are merged in the way FastAPI would.
+        """
+        value = await result
+        if isinstance(value, Response):
+            # Its own Content-Type header is kept verbatim, so no media_type on replay.
+            rendered = CachedResponse(bytes(value.body), value.status_code, None, _plain_headers(value))
+        else:
+            body = json.dumps(
+                jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+            ).encode("utf-8")
+            if response is not None and response.status_code:
+                status_code = response.status_code
+            rendered = CachedResponse(body, status_code, "application/json")
+        if response is not None and response is not value:
+            rendered.headers.extend(_plain_headers(response, skip=("content-type",)))
+        return rendered
+
+    def _replay(self, cached: CachedResponse, request: Request, *, hit: bool) -> Response:
+        marker = "HIT" if hit else "MISS"
+        if cached.status_code == 200 and _etag_matches(request.headers.get("if-none-match"), cached.etag):
+            self._stats.not_modified += 1
+            return Response(status_code=304, headers={"ETag": cached.etag, "X-Cache": marker})
+        reply = Response(cached.body, cached.status_code, media_type=cached.media_type)
+        for k, v in cached.headers:
+            reply.headers.append(k, v)
+        reply.headers["ETag"] = cached.etag
+        reply.headers["X-Cache"] = marker
+        return reply
+
+
+def _cancelling() -> bool:
+    """The current task has a cancellation pending (always False before Python 3.11)."""
+    task = asyncio.current_task()
+    return bool(task is not None and getattr(task, "cancelling", lambda: 0)())
+
+
+def _cacheable(cached: CachedResponse) -> bool:
+    return cached.status_code == 200 and not cached.private
+
+
+def _is_response_annotation(annotation: Any) -> bool:
+    return annotation == "Response" or (inspect.isclass(annotation) and issubclass(annotation, Response))
+
+
+def _plain_headers(response: Response, skip: Tuple[str, ...] = ()) -> list:
+    """*response*'s headers minus those the replay computes itself (and *skip*)."""
+    return [
+        (k, v) for k, v in response.headers.items()
+        if k not in ("content-length", "etag") and k not in skip
+    ]
+
+
+def _default_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.method}:{request.url.path}?{query}"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (t.strip().removeprefix("W/") for t in header.split(","))
+    return etag in candidates
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, CachedResponse):
+        return len(value.body) + sum(len(k) + len(v) for k, v in value.headers) + 64
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
@@ -3,6 +3,7 @@ import abc
 
 class Service(abc.ABC):
     name: str
+    lazy: bool = False      # start on first `Orchestrator.get_service` instead of in `start()`
 
     @abc.abstractmethod
     async def startup(self): ...
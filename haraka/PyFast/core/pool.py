@@ -0,0 +1,387 @@
+"""
+Generic async resource pool and the `PooledService` base built on it.
+
+Subclass `PooledService`, implement ``create_resource`` (and optionally
+``close_resource`` / ``check_resource``) and register it with
+``Orchestrator.use``. The pool is warmed to ``min_size`` during startup, the
+service is marked ready, idle resources above ``min_size`` are evicted by a
+periodic job on the orchestrator's scheduler, and everything is drained at
+``destroy()``.
+
+Example
+-------
+>>> class Db(PooledService):
+...     name = "postgres"
+...     async def create_resource(self):
+...         return await asyncpg.connect(DSN)
+...     async def close_resource(self, conn):
+...         await conn.close()
+>>> db = Db(min_size=2, max_size=20)
+>>> runtime.use(db)
+>>> async with db.connection() as conn: ...
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import contextlib
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Awaitable, Callable, Deque, Generic, Optional, Tuple, TypeVar
+
+from haraka.PyFast.core.interfaces import Service
+from haraka.utils import Logger
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when acquiring from a pool that is draining or closed."""
+
+
+class PoolTimeoutError(asyncio.TimeoutError):
+    """Raised when no resource could be checked out within the timeout."""
+
+
+@dataclass
+class PoolStats:
+    size: int = 0               # live resources (idle + in use + being created)
+    idle: int = 0
+    in_use: int = 0
+    waiting: int = 0            # callers currently queued for a resource
+    created: int = 0
+    closed: int = 0
+    evicted: int = 0
+    failed_checks: int = 0
+    acquired: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0     # seconds spent in acquire(), summed
+    max_wait: float = 0.0
+    max_waiting: int = 0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "mean_wait": self.mean_wait}
+
+
+class ResourcePool(Generic[T]):
+    """
+    Bounded async pool with lazy growth, idle eviction and health-checked checkout.
+
+    Parameters
+    ----------
+    create
+        Coroutine function building one resource.
+    close
+        Coroutine function disposing of one resource (optional).
+    health_check
+        Coroutine returning ``False`` for a resource that must not be handed
+        out; it is closed and another one is tried (optional).
+    min_size, max_size
+        Resources kept warm / hard upper bound.
+    max_idle
+        Seconds an idle resource above ``min_size`` may live before eviction.
+    acquire_timeout
+        Default seconds ``acquire()`` waits before raising `PoolTimeoutError`.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[], Awaitable[T]],
+        *,
+        close: Optional[Callable[[T], Awaitable[None]]] = None,
+        health_check: Optional[Callable[[T], Awaitable[bool]]] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        acquire_timeout: float = 10.0,
+        name: str = "pool",
+        logger: Optional[Logger] = None,
+    ) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"Invalid pool bounds: min_size={min_size}, max_size={max_size}")
+        self._create_fn = create
+        self._close_fn = close
+        self._check_fn = health_check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+        self._log = logger or Logger(name)
+
+        self._idle: Deque[Tuple[T, float]] = deque()   # (resource, released_at); right end is hottest
+        self._cond = asyncio.Condition()
+        self._stats = PoolStats()
+        self._closing = False
+
+    # ------------- public API ----------------------------------------- #
+    @property
+    def stats(self) -> PoolStats:
+        self._stats.idle = len(self._idle)
+        return self._stats
+
+    @property
+    def closed(self) -> bool:
+        return self._closing
+
+    async def warm(self) -> None:
+        """Create resources until ``min_size`` are live."""
+        async with self._cond:
+            missing = max(0, self.min_size - self._stats.size)
+            self._stats.size += missing
+        if not missing:
+            return
+        results = await asyncio.gather(*(self._create() for _ in range(missing)), return_exceptions=True)
+        now = asyncio.get_running_loop().time()
+        async with self._cond:
+            for res in results:
+                if isinstance(res, BaseException):
+                    self._stats.size -= 1
+                else:
+                    self._idle.append((res, now))
+            self._cond.notify_all()
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        self._log.debug(f"Pool '{self.name}' warmed with {missing} resource(s)")
+
+    async def acquire(self, timeout: Optional[float] = None) -> T:
+        """Check out a healthy resource, growing the pool lazily up to ``max_size``."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + (self.acquire_timeout if timeout is None else timeout)
+
+        while True:
+            resource = _MISSING
+            async with self._cond:
+                while not self._idle and self._stats.size >= self.max_size:
+                    self._ensure_open()
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self._stats.timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Pool '{self.name}' exhausted: no resource within "
+                            f"{loop.time() - started:.3f}s (max_size={self.max_size})"
+                        )
+                    self._stats.waiting += 1
+                    self._stats.max_waiting = max(self._stats.max_waiting, self._stats.waiting)
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    finally:
+                        self._stats.waiting -= 1
+                self._ensure_open()
+                if self._idle:
+                    resource, _ = self._idle.pop()
+                else:
+                    self._stats.size += 1  # reserve the slot before awaiting create()
+
+            if resource is _MISSING:
+                try:
+                    resource = await self._create()
+                except BaseException:
+                    await self._release_slot()
+                    raise
+            else:
+                try:
+                    healthy = await self._healthy(resource)
+                except BaseException:   # cancelled mid-check: the resource is ours to close
+                    await self._discard(resource)
+                    raise
+                if not healthy:
+                    await self._discard(resource)
+                    continue
+
+            waited = loop.time() - started
+            self._stats.in_use += 1
+            self._stats.acquired += 1
+            self._stats.total_wait += waited
+            self._stats.max_wait = max(self._stats.max_wait, waited)
+            return resource
+
+    async def release(self, resource: T, *, discard: bool = False) -> None:
+        """Return *resource* to the pool (or close it when *discard* / closing)."""
+        self._stats.in_use -= 1
+        if discard or self._closing:
+            await self._discard(resource)
+            return
+        async with self._cond:
+            self._idle.append((resource, asyncio.get_running_loop().time()))
+            self._cond.notify()
+
+    @contextlib.asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None) -> AsyncIterator[T]:
+        """``async with pool.connection() as res:`` – acquire and always release."""
+        resource = await self.acquire(timeout)
+        try:
+            yield resource
+        finally:
+            await self.release(resource)
+
+    async def evict_idle(self) -> int:
+        """Close idle resources older than ``max_idle`` while above ``min_size``."""
+        cutoff = asyncio.get_running_loop().time() - self.max_idle
+        doomed = []
+        async with self._cond:
+            # Oldest releases sit at the left end.
+            while (
+                self._idle
+                and self._idle[0][1] < cutoff
+                and self._stats.size - len(doomed) > self.min_size
+            ):
+                doomed.append(self._idle.popleft()[0])
+        for resource in doomed:
+            await self._discard(resource)
+        self._stats.evicted += len(doomed)
+        if doomed:
+            self._log.debug(f"Pool '{self.name}' evicted {len(doomed)} idle resource(s)")
+        return len(doomed)
+
+    async def close(self, drain_timeout: float = 10.0) -> None:
+        """Stop handing out resources, wait for in-use ones, then close everything."""
+        self._closing = True
+        async with self._cond:
+            self._cond.notify_all()  # fail queued acquirers fast
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._stats.in_use <= 0), drain_timeout)
+            except asyncio.TimeoutError:
+                self._log.warn(
+                    f"⚠️ Pool '{self.name}' drain timed out with {self._stats.in_use} resource(s) in use"
+                )
+            idle = [r for r, _ in self._idle]
+            self._idle.clear()
+        for resource in idle:
+            await self._discard(resource)
+
+    # ------------- internals ------------------------------------------ #
+    def _ensure_open(self) -> None:
+        if self._closing:
+            raise PoolClosedError(f"Pool '{self.name}' is closed")
+
+    async def _create(self) -> T:
+        resource = await self._create_fn()
+        self._stats.created += 1
+        return resource
+
+    async def _healthy(self, resource: T) -> bool:
+        if self._check_fn is None:
+            return True
+        try:
+            ok = await self._check_fn(resource)
+        except Exception as e:
+            self._log.debug(f"Pool '{self.name}' health check raised: {e}")
+            ok = False
+        if not ok:
+            self._stats.failed_checks += 1
+        return ok
+
+    async def _discard(self, resource: T) -> None:
+        try:
+            if self._close_fn is not None:
+                await self._close_fn(resource)
+        except Exception as e:
+            self._log.warn(f"⚠️ Pool '{self.name}' failed to close a resource: {e}")
+        finally:
+            self._stats.closed += 1
+            await self._release_slot()
+
+    async def _release_slot(self) -> None:
+        async with self._cond:
+            self._stats.size -= 1
+            self._cond.notify_all()
+
+
+class PooledService(Service, Generic[T]):
+    """
+    `Service` owning a `ResourcePool`, wired into the Orchestrator lifecycle.
+
+    * ``startup``  – warms the pool to ``min_size``, schedules idle eviction as
+      a periodic job and calls ``runtime.mark_ready(name)``.
+    * ``shutdown`` – drains in-use resources and closes the pool.
+    """
+
+    name: str = "pool"
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        *,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        acquire_timeout: float = 10.0,
+        evict_interval: float = 30.0,
+        drain_timeout: float = 10.0,
+    ) -> None:
+        if name is not None:
+            self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self.evict_interval = evict_interval
+        self.drain_timeout = drain_timeout
+        self.runtime = None
+        self.pool: Optional[ResourcePool[T]] = None
+
+    # ------------- resource hooks ------------------------------------- #
+    @abc.abstractmethod
+    async def create_resource(self) -> T: ...
+
+    async def close_resource(self, resource: T) -> None:
+        return None
+
+    async def check_resource(self, resource: T) -> bool:
+        return True
+
+    # ------------- Service lifecycle ---------------------------------- #
+    async def startup(self):
+        logger = self.runtime.logger if self.runtime is not None else Logger(self.name)
+        self.pool = ResourcePool(
+            self.create_resource,
+            close=self.close_resource,
+            health_check=self.check_resource,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_idle=self.max_idle,
+            acquire_timeout=self.acquire_timeout,
+            name=self.name,
+            logger=logger,
+        )
+        await self.pool.warm()
+        if self.runtime is not None:
+            self.runtime.register_periodic_task(self._evict_idle, every=self.evict_interval,
+                                                name=f"{self.name}-evict-idle")
+            self.runtime.mark_ready(self.name)
+
+    async def shutdown(self):
+        if self.pool is not None:
+            await self.pool.close(self.drain_timeout)
+
+    # ------------- convenience ---------------------------------------- #
+    async def acquire(self, timeout: Optional[float] = None) -> T:
+        return await self._require_pool().acquire(timeout)
+
+    async def release(self, resource: T, *, discard: bool = False) -> None:
+        await self._require_pool().release(resource, discard=discard)
+
+    def connection(self, timeout: Optional[float] = None):
+        return self._require_pool().connection(timeout)
+
+    @property
+    def stats(self) -> PoolStats:
+        return self._require_pool().stats
+
+    def _require_pool(self) -> ResourcePool[T]:
+        if self.pool is None:
+            raise PoolClosedError(f"Service '{self.name}' has not been started")
+        return self.pool
+
+    async def _evict_idle(self) -> None:
+        await self._require_pool().evict_idle()
@@ -0,0 +1,428 @@
+"""
+Periodic jobs for PyFast services, driven by one hashed timer wheel.
+
+Instead of a ``while True: await asyncio.sleep(n)`` startup task per job,
+register the work with the orchestrator and let one wheel task fire it:
+
+>>> runtime.register_periodic_task(refresh_cache, every=30, jitter=3)
+>>> runtime.register_periodic_task(flush_metrics, cron="*/5 * * * *")
+>>> runtime.scheduler.stats()["refresh_cache"]["max_lag"]
+
+* Interval jobs are anchored to their schedule (``due + every``), so slow
+  runs do not make them drift; cron jobs follow the 5-field syntax
+  (minute hour day-of-month month day-of-week, with ``*``, ``a-b``, ``/n``
+  and lists) in local time.
+* ``jitter`` delays each run by a random 0…jitter seconds so replicas started
+  together do not all wake at once.
+* ``overlap=False`` skips a run while the previous one is still going;
+  ``coalesce=True`` collapses runs missed while the loop was busy into one.
+* ``max_concurrent`` bounds job runs across all jobs; a run waiting for a
+  slot shows up as lag.
+
+Timers live in a `TimerWheel`: O(1) insert and cancel, one wake-up per tick
+while anything is pending and none while it is empty.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from haraka.utils import Logger
+
+
+# ------------- timer wheel -------------------------------------------- #
+class Timer:
+    __slots__ = ("deadline", "rounds", "callback", "cancelled")
+
+    def __init__(self, deadline: float, rounds: int, callback: Callable[[], None]) -> None:
+        self.deadline = deadline
+        self.rounds = rounds
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: ``slots`` buckets of ``tick`` seconds each. A timer
+    ``n`` ticks away goes into bucket ``(now + n) % slots`` with ``n // slots``
+    full revolutions to wait; every tick visits one bucket. Callbacks run on
+    the wheel task and should only schedule work, not do it.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 600) -> None:
+        if tick <= 0 or slots < 1:
+            raise ValueError("tick must be > 0 and slots >= 1")
+        self.tick = tick
+        self._buckets: List[List[Timer]] = [[] for _ in range(slots)]
+        self._origin: Optional[float] = None
+        self._ticks = 0            # last processed tick
+        self._pending = 0
+        self._wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def add(self, deadline: float, callback: Callable[[], None]) -> Timer:
+        """Run *callback* at loop time *deadline* (rounded up to the next tick)."""
+        loop = asyncio.get_running_loop()
+        if self._origin is None:
+            self._origin = loop.time()
+        if self._pending == 0:                    # parked: catch the tick counter up
+            self._ticks = max(self._ticks, self._tick_at(loop.time()))
+        target = max(self._ticks + 1, math.ceil((deadline - self._origin) / self.tick))
+        slots = len(self._buckets)
+        timer = Timer(deadline, (target - self._ticks - 1) // slots, callback)
+        self._buckets[target % slots].append(timer)
+        self._pending += 1
+        if self._wake is not None:
+            self._wake.set()
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        if not timer.cancelled:
+            timer.cancelled = True
+            self._pending -= 1
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self._origin is None:
+            self._origin = loop.time()
+        while True:
+            if self._pending == 0:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            delay = self._origin + (self._ticks + 1) * self.tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now_tick = self._tick_at(loop.time())
+            while self._ticks < now_tick and self._pending:
+                self._ticks += 1
+                self._advance(self._ticks % len(self._buckets))
+            self._ticks = max(self._ticks, now_tick)
+
+    def _tick_at(self, now: float) -> int:
+        return int((now - self._origin) // self.tick)
+
+    def _advance(self, slot: int) -> None:
+        bucket = self._buckets[slot]
+        if not bucket:
+            return
+        self._buckets[slot] = waiting = []
+        for timer in bucket:
+            if timer.cancelled:
+                continue
+            if timer.rounds:
+                timer.rounds -= 1
+                waiting.append(timer)
+                continue
+            timer.cancelled = True
+            self._pending -= 1
+            timer.callback()
+
+
+# ------------- triggers ----------------------------------------------- #
+class Interval:
+    """Every *seconds*, anchored to the previous due time."""
+
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("interval must be > 0")
+        self.seconds = seconds
+
+    def next_due(self, after: float) -> float:
+        return after + self.seconds
+
+    def __repr__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+
+class Cron:
+    """Five-field cron expression evaluated in local time."""
+
+    def __init__(self, expr: str) -> None:
+        self.expr = expr
+        fields = _CRON_ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {expr!r}")
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        self.weekdays = frozenset(d % 7 for d in _cron_field(fields[4], 0, 7))   # 0 and 7: Sunday
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after *moment*."""
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron expression {self.expr!r} never matches")
+
+    def next_due(self, after: float) -> float:
+        loop_now, wall_now = asyncio.get_running_loop().time(), time.time()
+        wall = self.next_after(datetime.fromtimestamp(wall_now + after - loop_now)).timestamp()
+        return loop_now + wall - wall_now
+
+    def _day_matches(self, t: datetime) -> bool:
+        dom = t.day in self.days
+        dow = (t.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow              # both restricted: either matches (cron semantics)
+
+    def __repr__(self) -> str:
+        return f"cron {self.expr!r}"
+
+
+def _cron_field(field: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in field.split(","):
+        spec, _, step_s = part.partition("/")
+        step = int(step_s) if step_s else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if step_s else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"invalid cron field {field!r} (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+# ------------- jobs --------------------------------------------------- #
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0           # due while the previous run was still going (overlap=False)
+    coalesced: int = 0         # missed runs folded into one (coalesce=True)
+    running: int = 0
+    last_latency: float = 0.0  # seconds a run took
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+    last_lag: float = 0.0      # seconds between due time (incl. jitter) and start
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.runs if self.runs else 0.0
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.runs if self.runs else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "mean_latency": self.mean_latency, "mean_lag": self.mean_lag}
+
+
+class Job:
+    """One registered periodic job; see `Scheduler.add`."""
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable], trigger, *,
+                 jitter: float, overlap: bool, coalesce: bool, first: Optional[float]) -> None:
+        self.name = name
+        self.fn = fn
+        self.trigger = trigger
+        self.jitter = jitter
+        self.overlap = overlap
+        self.coalesce = coalesce
+        self.first = first
+        self.stats = JobStats()
+        self.cancelled = False
+        self._timer: Optional[Timer] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def __repr__(self) -> str:
+        return f"<Job {self.name} {self.trigger!r}>"
+
+
+class Scheduler:
+    """
+    Parameters
+    ----------
+    logger
+        Where job failures are reported.
+    max_concurrent
+        Job runs in flight across all jobs (``None``: unbounded).
+    tick, slots
+        Timer-wheel resolution and size; a run fires up to ``tick`` seconds
+        after it is due.
+    """
+
+    def __init__(self, logger: Optional[Logger] = None, *, max_concurrent: Optional[int] = None,
+                 tick: float = 0.1, slots: int = 600) -> None:
+        self._log = logger or Logger("scheduler")
+        self.max_concurrent = max_concurrent
+        self._wheel = TimerWheel(tick, slots)
+        self._jobs: Dict[str, Job] = {}
+        self._wheel_task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    @property
+    def running(self) -> bool:
+        return self._wheel_task is not None
+
+    def add(
+        self,
+        fn: Callable[[], Awaitable],
+        *,
+        every: Optional[float] = None,
+        cron: Optional[str] = None,
+        name: Optional[str] = None,
+        jitter: float = 0.0,
+        overlap: bool = False,
+        coalesce: bool = True,
+        first: Optional[float] = None,
+    ) -> Job:
+        """
+        Run coroutine function *fn* ``every`` seconds or on a ``cron``
+        schedule. *first* delays the first interval run by that many seconds
+        instead of one full interval (``0``: right after start).
+        """
+        if (every is None) == (cron is None):
+            raise ValueError("pass exactly one of every= or cron=")
+        name = name or getattr(fn, "__name__", "job")
+        if name in self._jobs:
+            raise ValueError(f"a job named {name!r} is already scheduled")
+        trigger = Interval(every) if every is not None else Cron(cron)
+        job = Job(name, fn, trigger, jitter=max(0.0, jitter), overlap=overlap, coalesce=coalesce, first=first)
+        self._jobs[name] = job
+        if self.running:
+            self._arm_first(job)
+        return job
+
+    def remove(self, name: str) -> None:
+        """Unschedule a job; a run in progress finishes."""
+        job = self._jobs.pop(name)
+        job.cancelled = True
+        if job._timer is not None:
+            self._wheel.cancel(job._timer)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._slots = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+        self._wheel_task = asyncio.create_task(self._wheel.run(), name="scheduler-wheel")
+        for job in self._jobs.values():
+            self._arm_first(job)
+
+    async def stop(self) -> None:
+        """Cancel the wheel and every run in progress, and wait for them."""
+        if self._wheel_task is None:
+            return
+        tasks = [self._wheel_task]
+        for job in self._jobs.values():
+            if job._timer is not None:
+                self._wheel.cancel(job._timer)
+                job._timer = None
+            tasks.extend(job._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._wheel_task = None
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: job.stats.as_dict() for name, job in self._jobs.items()}
+
+    # ------------- internals ------------------------------------------ #
+    def _arm_first(self, job: Job) -> None:
+        now = asyncio.get_running_loop().time()
+        if isinstance(job.trigger, Interval) and job.first is not None:
+            due = now + job.first
+        else:
+            due = job.trigger.next_due(now)
+        self._arm(job, due)
+
+    def _arm(self, job: Job, due: float) -> None:
+        at = due + (random.uniform(0.0, job.jitter) if job.jitter else 0.0)
+        job._timer = self._wheel.add(at, lambda: self._fire(job, due, at))
+
+    def _fire(self, job: Job, due: float, at: float) -> None:
+        job._timer = None
+        if job.cancelled:
+            return
+        behind = due + asyncio.get_running_loop().time() - at    # jitter is not lateness
+        runs = 1
+        next_due = job.trigger.next_due(due)
+        while next_due <= behind:                # fell behind: the loop was blocked
+            if job.coalesce:
+                job.stats.coalesced += 1
+            else:
+                runs += 1
+            next_due = job.trigger.next_due(next_due)
+        self._arm(job, next_due)                 # anchored to the schedule, not to this run
+
+        if job._tasks and not job.overlap:
+            job.stats.skipped += runs
+            self._log.debug(f"⏭️ Job '{job.name}' still running; skipped {runs} run(s)")
+            return
+        task = asyncio.create_task(self._run(job, at, runs), name=f"job-{job.name}")
+        job._tasks.add(task)
+        task.add_done_callback(job._tasks.discard)
+
+    async def _run(self, job: Job, due: float, runs: int) -> None:
+        loop = asyncio.get_running_loop()
+        for _ in range(runs):
+            if self._slots is not None:
+                await self._slots.acquire()
+            stats = job.stats
+            started = loop.time()
+            lag = max(0.0, started - due)
+            stats.running += 1
+            try:
+                await job.fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.failures += 1
+                self._log.error(f"❌ Job '{job.name}' failed", extra={"error": repr(e)})
+            finally:
+                elapsed = loop.time() - started
+                stats.running -= 1
+                stats.runs += 1
+                stats.last_latency = elapsed
+                stats.max_latency = max(stats.max_latency, elapsed)
+                stats.total_latency += elapsed
+                stats.last_lag = lag
+                stats.max_lag = max(stats.max_lag, lag)
+                stats.total_lag += lag
+                if self._slots is not None:
+                    self._slots.release()
+            due = loop.time()                    # catch-up runs follow back to back
@@ -0,0 +1,192 @@
+"""
+Warmup phase between ``Orchestrator.start`` and readiness.
+
+Right after start, route handlers, pydantic validators, connection pools and
+caches are cold, so the first real requests pay for everything. The
+orchestrator therefore ends ``start()`` with a warmup phase:
+
+* warmup callables – ``runtime.register_warmup(fn)`` and every started
+  service's optional ``warmup()`` coroutine;
+* synthetic requests – ``runtime.register_warmup_request("/search?q=a")``
+  sends real requests through the whole ASGI app, in process, before any
+  client can connect.
+
+Readiness (``wait_for_all_ready``, ``Orchestrator.ready``) waits for it.
+With ``Orchestrator(track_first_requests=N)``, `FirstRequestsMiddleware`
+then records the latency of the first N real requests, so
+``runtime.warmup_stats.as_dict()`` shows whether the startup tail is gone
+(``first_p99`` against the steady state). The middleware has to be added
+before the app serves; under a lifespan-driven start add it yourself when
+building the app.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Scope key of synthetic warmup requests; other middleware may let them through.
+WARMUP_SCOPE_KEY = "haraka.warmup"
+
+
+@dataclass(frozen=True)
+class WarmupRequest:
+    path: str
+    method: str = "GET"
+    body: bytes = b""
+    headers: Tuple[Tuple[bytes, bytes], ...] = ()
+    repeat: int = 1
+
+    @classmethod
+    def build(cls, path: str, method: str = "GET", *, json_body: Any = None, body: bytes = b"",
+              headers: Optional[Dict[str, str]] = None, repeat: int = 1) -> "WarmupRequest":
+        raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            raw.append((b"content-type", b"application/json"))
+        return cls(path, method.upper(), body, tuple(raw), max(1, repeat))
+
+
+@dataclass
+class WarmupStats:
+    seconds: float = 0.0                  # whole warmup phase
+    steps: Dict[str, float] = field(default_factory=dict)     # warmup callable -> seconds
+    requests: int = 0                     # synthetic requests sent
+    failed: int = 0                       # callables that raised + requests answered >= 500
+    track_first: int = 100
+    first_latencies: List[float] = field(default_factory=list)
+
+    def record(self, latency: float) -> bool:
+        """Add one real request's latency; True when it completes the first-N window."""
+        if len(self.first_latencies) >= self.track_first:
+            return False
+        self.first_latencies.append(latency)
+        return len(self.first_latencies) == self.track_first
+
+    def percentile(self, q: float) -> float:
+        data = sorted(self.first_latencies)
+        if not data:
+            return 0.0
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "steps": dict(self.steps),
+            "requests": self.requests,
+            "failed": self.failed,
+            "first_requests": len(self.first_latencies),
+            "first_p50": self.percentile(0.50),
+            "first_p99": self.percentile(0.99),
+            "first_max": max(self.first_latencies, default=0.0),
+        }
+
+
+async def asgi_request(app, request: WarmupRequest) -> int:
+    """Send *request* through the ASGI *app* in process and return the status code."""
+    path, _, query = request.path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": request.method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup"), (b"content-length", str(len(request.body)).encode()),
+                    *request.headers],
+        "client": ("127.0.0.1", 0),
+        "server": ("warmup", 80),
+        WARMUP_SCOPE_KEY: True,
+    }
+    done = asyncio.Event()
+    delivered = False
+    status = 0
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": request.body, "more_body": False}
+        await done.wait()                      # report the disconnect only once the response is out
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            done.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        done.set()
+    return status
+
+
+class FirstRequestsMiddleware:
+    """
+    Pure ASGI middleware timing the first ``stats.track_first`` real (not
+    warmup) HTTP requests answered with a 2xx; errors and load-shedding 503s
+    are fast and would hide the cold tail. ``Orchestrator.start`` installs
+    it when the app has not started yet; otherwise add it yourself:
+    ``app.add_middleware(FirstRequestsMiddleware, runtime=runtime)``.
+    """
+
+    def __init__(self, app, runtime) -> None:
+        self.app = app
+        self.runtime = runtime
+
+    async def __call__(self, scope, receive, send):
+        stats: WarmupStats = self.runtime.warmup_stats
+        if (scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY)
+                or len(stats.first_latencies) >= stats.track_first):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 0
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            if 200 <= status < 300 and stats.record(time.perf_counter() - started):
+                self.runtime.logger.info(
+                    f"📈 First {stats.track_first} requests: p50 {stats.percentile(0.5) * 1000:.1f} ms, "
+                    f"p99 {stats.percentile(0.99) * 1000:.1f} ms"
+                )
+
+
+async def run_warmup(app, steps: Sequence[Tuple[str, Any]], requests: Sequence[WarmupRequest],
+                     stats: WarmupStats, logger) -> None:
+    """Run every warmup callable, then every synthetic request, recording into *stats*."""
+    started = time.perf_counter()
+    for name, fn in steps:
+        t0 = time.perf_counter()
+        try:
+            await fn()
+        except Exception as e:
+            stats.failed += 1
+            logger.warn(f"⚠️ Warmup step '{name}' failed: {e!r}")
+        stats.steps[name] = time.perf_counter() - t0
+    for req in requests if app is not None else ():
+        for _ in range(req.repeat):
+            stats.requests += 1
+            try:
+                status = await asgi_request(app, req)
+            except Exception as e:
+                status = 500
+                logger.warn(f"⚠️ Warmup request {req.method} {req.path} raised: {e!r}")
+            if status >= 500 or status == 0:
+                stats.failed += 1
+    stats.seconds = time.perf_counter() - started
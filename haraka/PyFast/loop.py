@@ -0,0 +1,132 @@
+"""
+Event-loop selection and loop-level tuning for PyFast runtimes.
+
+* ``uvloop`` is used when installed (and asked for), otherwise the stock loop.
+* The default executor behind ``loop.run_in_executor(None, …)`` can be sized.
+* Slow-callback detection (``loop.slow_callback_duration``) is reported
+  through the orchestrator's :class:`Logger` so blocking handlers show up.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from haraka.utils import Logger
+
+try:  # optional dependency
+    import uvloop
+except ImportError:  # pragma: no cover - depends on the environment
+    uvloop = None
+
+
+@dataclass(frozen=True)
+class LoopOptions:
+    """
+    Loop settings applied by :func:`run` and ``Orchestrator.start``.
+
+    use_uvloop
+        Prefer uvloop when it is importable; falls back to asyncio silently.
+    executor_workers
+        Size of the default thread pool used by ``run_in_executor``;
+        ``None`` keeps asyncio's default.
+    slow_callback_duration
+        Seconds a single callback may block the loop before it is logged.
+        Enabling it turns on loop debug mode, which has a cost – keep it for
+        staging / diagnosis. ``None`` disables detection.
+    """
+    use_uvloop: bool = True
+    executor_workers: Optional[int] = None
+    slow_callback_duration: Optional[float] = None
+
+
+def uvloop_available() -> bool:
+    return uvloop is not None
+
+
+def loop_factory(options: LoopOptions) -> Callable[[], asyncio.AbstractEventLoop]:
+    """Return the constructor for the loop implementation *options* selects."""
+    if options.use_uvloop and uvloop is not None:
+        return uvloop.new_event_loop
+    return asyncio.new_event_loop
+
+
+def loop_name(loop: asyncio.AbstractEventLoop) -> str:
+    return f"{type(loop).__module__}.{type(loop).__qualname__}"
+
+
+def run(main: Awaitable[Any], options: LoopOptions = LoopOptions()) -> Any:
+    """``asyncio.run`` equivalent that builds the loop from *options*."""
+    loop = loop_factory(options)()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def tune_loop(loop: asyncio.AbstractEventLoop, options: LoopOptions, logger: Logger) -> None:
+    """Apply executor sizing and slow-callback reporting to a running *loop*."""
+    logger.debug(f"Event loop implementation: {loop_name(loop)}")
+    if options.use_uvloop and uvloop is None:
+        logger.debug("uvloop requested but not installed; using the stock asyncio loop")
+
+    if options.executor_workers is not None:
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=options.executor_workers, thread_name_prefix="pyfast-exec")
+        )
+        logger.debug(f"Default executor sized to {options.executor_workers} thread(s)")
+
+    if options.slow_callback_duration is not None:
+        loop.slow_callback_duration = options.slow_callback_duration
+        loop.set_debug(True)
+        _SlowCallbackHandler.attach(logger)
+        logger.debug(f"Slow-callback detection enabled (> {options.slow_callback_duration * 1000:.0f} ms)")
+
+
+def detach_slow_callback_logging(logger: Logger) -> None:
+    _SlowCallbackHandler.detach(logger)
+
+
+# ------------- internals ---------------------------------------------- #
+class _SlowCallbackHandler(logging.Handler):
+    """Forward asyncio's "Executing <Handle …> took N seconds" records to a Logger."""
+
+    _ASYNCIO_LOGGER = logging.getLogger("asyncio")
+
+    def __init__(self, logger: Logger) -> None:
+        super().__init__(level=logging.WARNING)
+        self._log = logger
+
+    @classmethod
+    def attach(cls, logger: Logger) -> None:
+        if not any(isinstance(h, cls) and h._log is logger for h in cls._ASYNCIO_LOGGER.handlers):
+            cls._ASYNCIO_LOGGER.addHandler(cls(logger))
+
+    @classmethod
+    def detach(cls, logger: Logger) -> None:
+        for h in list(cls._ASYNCIO_LOGGER.handlers):
+            if isinstance(h, cls) and h._log is logger:
+                cls._ASYNCIO_LOGGER.removeHandler(h)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        msg = record.getMessage()
+        if msg.startswith("Executing "):
+            self._log.warn(f"🐢 Slow callback blocked the event loop: {msg}")
+
+
+def _cancel_all_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    pending = asyncio.all_tasks(loop)
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
@@ -0,0 +1,312 @@
+"""
+Pre-forking multi-process runner for PyFast services.
+
+The parent process binds the listening socket (or lets every worker bind its
+own with ``SO_REUSEPORT``), forks N workers and supervises them. Each worker
+builds a fresh :class:`Orchestrator`, runs its ``start()`` → serve →
+``destroy()`` lifecycle and exits. SIGTERM / SIGINT on the parent is forwarded
+to every worker, which turns it into a graceful ``destroy()``.
+
+Example
+-------
+>>> def build_app(runtime: Orchestrator) -> FastAPI:
+...     runtime.use(MyKafkaService())
+...     return FastAPI()
+>>> PreforkRunner(build_app, settings, port=8080).run()
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import signal
+import socket
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import FastAPI
+
+from haraka.PyFast import loop as pyfast_loop
+from haraka.PyFast.loop import LoopOptions
+from haraka.PyFast.Runtime import Orchestrator
+from haraka.utils import Logger
+
+AppFactory = Callable[[Orchestrator], FastAPI]
+ServeFn = Callable[[FastAPI, socket.socket, asyncio.Event], Awaitable[None]]
+
+
+def default_worker_count() -> int:
+    """Number of CPUs this process may run on (affinity mask aware)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return max(1, os.cpu_count() or 1)
+
+
+async def serve_uvicorn(app: FastAPI, sock: socket.socket, stop: asyncio.Event) -> None:
+    """Serve *app* on an already-bound socket with uvicorn until *stop* is set."""
+    try:
+        import uvicorn
+    except ImportError as e:  # pragma: no cover - optional dependency
+        raise ImportError("PreforkRunner's default server needs uvicorn: pip install uvicorn") from e
+
+    # The Orchestrator lifecycle is driven by the worker, not by ASGI lifespan.
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning"))
+    # Signals belong to the worker loop; keep uvicorn from installing (and
+    # later re-raising) its own handlers.
+    server.install_signal_handlers = lambda: None
+    server.capture_signals = contextlib.nullcontext
+
+    async def _watch_stop() -> None:
+        await stop.wait()
+        server.should_exit = True
+
+    watcher = asyncio.create_task(_watch_stop())
+    try:
+        await server.serve(sockets=[sock])
+    finally:
+        watcher.cancel()
+
+
+class PreforkRunner:
+    """
+    Fork ``workers`` processes that share one listening socket and supervise them.
+
+    Parameters
+    ----------
+    app_factory
+        Called once **inside each worker** with that worker's fresh
+        :class:`Orchestrator`; registers services/tasks and returns the app.
+    settings
+        Passed through to ``Orchestrator.start`` (needs a ``port`` attribute).
+    host, port
+        Listening address.
+    workers
+        Worker count; defaults to the size of the CPU affinity mask.
+    reuse_port
+        When true each worker binds its own ``SO_REUSEPORT`` socket and the
+        kernel balances connections; otherwise the parent binds once and the
+        workers inherit the descriptor.
+    serve
+        Coroutine serving ``(app, sock, stop_event)``; defaults to uvicorn.
+    graceful_timeout
+        Seconds to wait for workers after SIGTERM before sending SIGKILL.
+    loop_options
+        Event-loop selection/tuning for every worker (uvloop when installed).
+    restart_backoff
+        Minimum delay before re-forking a worker that crashed, doubled for
+        consecutive fast crashes (capped at ``max_restart_backoff``).
+    """
+
+    # A worker dying sooner than this after its fork counts as crash-looping.
+    _CRASH_LOOP_SECONDS = 5.0
+
+    def __init__(
+        self,
+        app_factory: AppFactory,
+        settings: Any,
+        *,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        reuse_port: bool = False,
+        variant: str = "PyFast",
+        serve: ServeFn = serve_uvicorn,
+        loop_options: LoopOptions = LoopOptions(),
+        backlog: int = 2048,
+        graceful_timeout: float = 30.0,
+        restart_backoff: float = 0.5,
+        max_restart_backoff: float = 30.0,
+    ) -> None:
+        self.app_factory = app_factory
+        self.settings = settings
+        self.host = host
+        self.port = port
+        self.workers = workers or default_worker_count()
+        self.reuse_port = reuse_port
+        self.variant = variant
+        self.serve = serve
+        self.loop_options = loop_options
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+
+        self.logger = Logger(self.variant).start_logger()
+        self._sock: Optional[socket.socket] = None
+        self._children: dict[int, int] = {}           # pid -> worker slot
+        self._started_at: dict[int, float] = {}       # slot -> last fork time
+        self._backoff: dict[int, float] = {}          # slot -> current backoff
+        self._respawn_at: dict[int, float] = {}       # slot -> when to re-fork it
+        self._stopping = False
+
+    # ------------- public API ----------------------------------------- #
+    def run(self) -> None:
+        """Bind, fork the workers and supervise them until SIGTERM / SIGINT."""
+        if not self.reuse_port:
+            self._sock = self._bind()
+            # Report the real port when binding to 0.
+            self.port = self._sock.getsockname()[1]
+
+        self.logger.info(f"🚀 Pre-forking {self.workers} worker(s) on {self.host}:{self.port}")
+        previous = {
+            sig: signal.signal(sig, self._handle_stop)
+            for sig in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for slot in range(self.workers):
+                if not self._spawn(slot):
+                    break
+            self._supervise()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            if self._sock is not None:
+                self._sock.close()
+        self.logger.info("🛑 All workers exited.")
+
+    def stop(self) -> None:
+        """Ask every worker to shut down gracefully."""
+        self._stopping = True
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+
+    # ------------- supervision ---------------------------------------- #
+    def _handle_stop(self, signum, _frame) -> None:
+        if not self._stopping:
+            self.logger.info(f"🛑 Received {signal.Signals(signum).name}; stopping workers…")
+        self.stop()
+
+    def _supervise(self) -> None:
+        deadline: Optional[float] = None
+        while self._children or (self._respawn_at and not self._stopping):
+            if self._stopping and deadline is None:
+                deadline = time.monotonic() + self.graceful_timeout
+
+            if deadline is not None and time.monotonic() > deadline:
+                self.logger.warn(f"⚠️ Workers still alive after {self.graceful_timeout}s; killing.")
+                for pid in list(self._children):
+                    self._signal(pid, signal.SIGKILL)
+                deadline = float("inf")
+
+            self._respawn_due()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                if self._stopping or not self._respawn_at:
+                    break
+                pid = 0   # every worker is waiting out its backoff
+            if pid == 0:
+                time.sleep(0.05)
+                continue
+
+            slot = self._children.pop(pid, None)
+            if slot is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                self.logger.debug(f"Worker {slot} (pid {pid}) exited with {code}")
+                continue
+
+            self.logger.error(f"❌ Worker {slot} (pid {pid}) died with exit code {code}; restarting")
+            self._schedule_respawn(slot)
+
+    def _schedule_respawn(self, slot: int) -> None:
+        """Set when *slot* is re-forked; the supervise loop keeps reaping meanwhile."""
+        uptime = time.monotonic() - self._started_at.get(slot, 0.0)
+        backoff = self._backoff.get(slot, self.restart_backoff)
+        delay = 0.0
+        if uptime < self._CRASH_LOOP_SECONDS:
+            # Crash-looping: back off exponentially before the next fork.
+            self._backoff[slot] = min(backoff * 2, self.max_restart_backoff)
+            self.logger.debug(f"Worker {slot} lived {uptime:.2f}s; waiting {backoff:.2f}s before restart")
+            delay = backoff
+        else:
+            self._backoff[slot] = self.restart_backoff
+        self._respawn_at[slot] = time.monotonic() + delay
+
+    def _respawn_due(self) -> None:
+        now = time.monotonic()
+        for slot, at in list(self._respawn_at.items()):
+            if at <= now:
+                del self._respawn_at[slot]
+                if not self._spawn(slot):
+                    return
+
+    def _spawn(self, slot: int) -> bool:
+        """Fork worker *slot*; False (and no fork) once stopping."""
+        # A stop signal between the check, the fork and the registration
+        # would miss the new child: hold it until the child is in _children.
+        stop_signals = {signal.SIGTERM, signal.SIGINT}
+        signal.pthread_sigmask(signal.SIG_BLOCK, stop_signals)
+        try:
+            if self._stopping:
+                return False
+            pid = os.fork()
+            if pid == 0:  # child
+                code = 1
+                try:
+                    for sig in stop_signals:
+                        signal.signal(sig, signal.SIG_DFL)
+                    signal.pthread_sigmask(signal.SIG_UNBLOCK, stop_signals)
+                    code = self._worker_main(slot)
+                except BaseException:
+                    import traceback
+                    traceback.print_exc()
+                finally:
+                    os._exit(code)
+            self._children[pid] = slot
+            self._started_at[slot] = time.monotonic()
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, stop_signals)
+        self.logger.debug(f"Forked worker {slot} as pid {pid}")
+        return True
+
+    @staticmethod
+    def _signal(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    # ------------- worker side ---------------------------------------- #
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def _worker_main(self, slot: int) -> int:
+        sock = self._bind() if self.reuse_port else self._sock
+        try:
+            pyfast_loop.run(self._worker_lifecycle(slot, sock), self.loop_options)
+            return 0
+        finally:
+            if self.reuse_port:
+                sock.close()
+
+    async def _worker_lifecycle(self, slot: int, sock: socket.socket) -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+        runtime = Orchestrator(self.variant, loop_options=self.loop_options)
+        app = self.app_factory(runtime)
+        runtime.logger.debug(f"Worker {slot} (pid {os.getpid()}) starting")
+        stopper = asyncio.create_task(stop.wait())
+        try:
+            # Inside the try: services started before a failing one are still destroyed.
+            await runtime.start(self.settings, app)
+            server = asyncio.create_task(self.serve(app, sock, stop))
+            await asyncio.wait({server, stopper}, return_when=asyncio.FIRST_COMPLETED)
+            stop.set()
+            await server
+        finally:
+            stopper.cancel()
+            await runtime.destroy()
@@ -1,6 +1,27 @@
 """cookiecutter post-generation helper package."""
-from haraka.post_gen.runner import main
-from haraka.post_gen.config import PostGenConfig
-from haraka.PyFast import Runtime
-from haraka.PyFast.core import interfaces
-__all__ = ["main", "PostGenConfig", "interfaces"]
+from importlib import import_module
+
+# Resolved on first access (PEP 562) so a hook that only needs the daemon
+# client does not pay for the pipeline, the ASCII art or FastAPI.
+_EXPORTS = {
+    "main": "haraka.post_gen.runner",
+    "main_many": "haraka.post_gen.runner",
+    "run_via_daemon": "haraka.post_gen.daemon",
+    "PostGenConfig": "haraka.post_gen.config",
+    "Runtime": "haraka.PyFast.Runtime",  # a module
+    "interfaces": "haraka.PyFast.core.interfaces",  # a module
+}
+__all__ = ["main", "main_many", "run_via_daemon", "PostGenConfig", "interfaces"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = import_module(_EXPORTS[name])
+        value = module if module.__name__.endswith(f".{name}") else getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'haraka' has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,5 @@
+import sys
+
+from haraka.cli import main
+
+sys.exit(main())
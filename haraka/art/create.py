@@ -1,17 +1,25 @@
 from haraka.art import TextFramer
 
 class Create:
+    _STYLES = {
+        "emoji": dict(border_char_x="", border_char_y="", padding=0),
+        "ascii": dict(border_char_x="=", border_char_y="||", padding=2),
+        "logo": dict(border_char_x="", border_char_y="", padding=2),
+    }
+
+    @staticmethod
+    def render(style: str, art: list[str], align: str = "left") -> str:
+        """Frame *art* in one of the ``emoji`` / ``ascii`` / ``logo`` styles without printing it."""
+        return TextFramer(**Create._STYLES[style], align=align).frame(art)
+
     @staticmethod
     def emoji(art: list[str], align: str = "left") -> None:
-        frame = TextFramer(border_char_x="", border_char_y="", padding=0, align=align)
-        frame.generate(art)
+        print(Create.render("emoji", art, align))
 
     @staticmethod
     def ascii(art: list[str], align: str = "left") -> None:
-        frame = TextFramer(border_char_x="=", border_char_y="||", padding=2, align=align)
-        frame.generate(art)
+        print(Create.render("ascii", art, align))
 
     @staticmethod
     def logo(art: list[str], align: str = "left") -> None:
-        frame = TextFramer(border_char_x="", border_char_y="", padding=2, align=align)
-        frame.generate(art)
\ No newline at end of file
+        print(Create.render("logo", art, align))
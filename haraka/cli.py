@@ -0,0 +1,219 @@
+"""
+Command-line entry point: ``haraka <command> …`` (also ``python -m haraka``).
+
+Commands
+--------
+lint    Check purge manifests for empty sections, duplicate / shadowed /
+        never-matching patterns and benchmark per-pattern match cost.
+watch   Keep a dry-run purge of a template tree in memory and print the
+        keep/delete diff whenever the tree or the manifests change.
+matrix  Keep/delete outcome of every combination of a manifest's services
+        from one walk of a template tree.
+daemon  Serve post-generation requests from hooks over a Unix socket.
+push    Push many committed projects concurrently (GitHub, a git URL or local
+        bare repositories), retrying transient failures with backoff.
+store   Content-addressed store of kept files: ingest a purged project,
+        materialise a snapshot by reflink / hardlink / copy, prune.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def _cmd_lint(args: argparse.Namespace) -> int:
+    from haraka.post_gen.config.lint import ManifestLinter
+
+    rounds = 0 if args.no_bench else args.rounds
+    if args.tree is not None:
+        if not args.tree.is_dir():
+            print(f"❌ Sample tree not found: {args.tree}", file=sys.stderr)
+            return 2
+        linter = ManifestLinter.from_tree(args.tree, rounds)
+    else:
+        linter = ManifestLinter(bench_rounds=rounds)
+
+    variants = args.variants or linter.variants()
+    failed = False
+    for i, variant in enumerate(variants):
+        report = linter.lint(variant)
+        if i:
+            print()
+        print(report.render(args.top))
+        failed |= bool(report.errors) or (args.strict and bool(report.warnings))
+    return 1 if failed else 0
+
+
+def _cmd_watch(args: argparse.Namespace) -> int:
+    from haraka.post_gen.service.fileOps.watch import TemplateWatcher
+    from haraka.utils import Logger
+
+    if not args.dir.is_dir():
+        print(f"❌ Template directory not found: {args.dir}", file=sys.stderr)
+        return 2
+    services = [s for s in args.services.split(",") if s]
+    logger = Logger("watch").start_logger(args.verbose)
+    TemplateWatcher(args.variant, args.dir, services, poll=args.poll, interval=args.interval,
+                    logger=logger).run()
+    return 0
+
+
+def _cmd_matrix(args: argparse.Namespace) -> int:
+    from haraka.post_gen.config.matrix import ServicesMatrix
+
+    if not args.dir.is_dir():
+        print(f"❌ Template directory not found: {args.dir}", file=sys.stderr)
+        return 2
+    services = [s for s in args.services.split(",") if s] if args.services is not None else None
+    try:
+        matrix = ServicesMatrix(args.variant, services)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    report = matrix.analyze(args.dir)
+    print(report.render(args.max_rows))
+    return 1 if report.errors or (args.strict and report.warnings) else 0
+
+
+def _cmd_daemon(args: argparse.Namespace) -> int:
+    from haraka.post_gen.daemon import PostGenDaemon, default_socket_path, ping
+
+    path = args.socket or default_socket_path()
+    if args.status:
+        status = ping(path)
+        print(f"✅ running (pid {status['pid']}, {status['served']} served)" if status else "❌ not running")
+        return 0 if status else 1
+    PostGenDaemon(path, args.workers).serve_forever()
+    return 0
+
+
+def _cmd_push(args: argparse.Namespace) -> int:
+    from haraka.post_gen.service.command import CommandRunner
+    from haraka.post_gen.service.gitOps.push import ParallelPusher, PushJob, target_from_spec
+    from haraka.utils import Logger
+
+    try:
+        target = target_from_spec(args.target)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    missing = [d for d in args.dirs if not (d / ".git").exists()]
+    if missing:
+        print(f"❌ Not a git repository: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 2
+    logger = Logger("push").start_logger(args.verbose)
+    pusher = ParallelPusher(target, CommandRunner(logger, exit_on_error=False), logger,
+                            max_workers=args.workers, retries=args.retries)
+    report = pusher.push_all(
+        PushJob(d.resolve(), d.resolve().name, args.author, args.description) for d in args.dirs
+    )
+    print(report.render())
+    return 0 if report.ok else 1
+
+
+def _cmd_store(args: argparse.Namespace) -> int:
+    from haraka.post_gen.service.fileOps.store import ContentStore, StoreVerificationError
+    from haraka.utils import Logger
+
+    store = ContentStore(args.root, Logger("store").start_logger(args.verbose),
+                         hardlink=getattr(args, "hardlink", False))
+    if args.action == "ingest":
+        if not args.dir.is_dir():
+            print(f"❌ Project directory not found: {args.dir}", file=sys.stderr)
+            return 2
+        store.ingest(args.dir, args.name or args.dir.resolve().name, dedupe=args.dedupe)
+    elif args.action == "materialise":
+        try:
+            store.materialise(args.name, args.dest, verify=not args.no_verify)
+        except FileNotFoundError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+        except StoreVerificationError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    else:
+        print(f"🧹 Removed {store.prune(args.keep)} object(s)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="haraka", description="Cookiecutter post-generation helper")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    lint = commands.add_parser("lint", help="lint purge manifests and benchmark their patterns")
+    lint.add_argument("variants", nargs="*", metavar="VARIANT",
+                      help="manifests to check (default: every manifest)")
+    lint.add_argument("--tree", type=Path, help="sample project tree for reachability and benchmarks")
+    lint.add_argument("--rounds", type=int, default=3, help="benchmark passes per pattern (default: 3)")
+    lint.add_argument("--no-bench", action="store_true", help="skip the match-cost benchmark")
+    lint.add_argument("--top", type=int, default=10, help="most expensive patterns to show (default: 10)")
+    lint.add_argument("--strict", action="store_true", help="exit non-zero on warnings too")
+    lint.set_defaults(func=_cmd_lint)
+
+    watch = commands.add_parser("watch", help="live keep/delete diff of a template tree")
+    watch.add_argument("variant", metavar="VARIANT")
+    watch.add_argument("dir", type=Path, metavar="DIR", help="rendered template / project tree")
+    watch.add_argument("--services", default="", help="comma-separated enabled services")
+    watch.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    watch.add_argument("--interval", type=float, default=0.5, help="polling period in seconds (default: 0.5)")
+    watch.add_argument("--verbose", action="store_true")
+    watch.set_defaults(func=_cmd_watch)
+
+    matrix = commands.add_parser("matrix", help="keep/delete outcome of every service combination")
+    matrix.add_argument("variant", metavar="VARIANT")
+    matrix.add_argument("dir", type=Path, metavar="DIR", help="rendered template tree")
+    matrix.add_argument("--services", help="comma-separated services to combine (default: all)")
+    matrix.add_argument("--max-rows", type=int, default=64, help="combinations to print (default: 64)")
+    matrix.add_argument("--strict", action="store_true", help="exit non-zero on warnings too")
+    matrix.set_defaults(func=_cmd_matrix)
+
+    daemon = commands.add_parser("daemon", help="serve post-generation requests over a Unix socket")
+    daemon.add_argument("--socket", type=Path, help="socket path (default: $HARAKA_SOCKET or per-user runtime dir)")
+    daemon.add_argument("--workers", type=int, default=4, help="projects processed concurrently (default: 4)")
+    daemon.add_argument("--status", action="store_true", help="report whether a daemon is listening")
+    daemon.set_defaults(func=_cmd_daemon)
+
+    push = commands.add_parser("push", help="push many committed projects concurrently")
+    push.add_argument("dirs", nargs="+", type=Path, metavar="DIR", help="project repositories (slug: directory name)")
+    push.add_argument("--target", default="gh",
+                      help="'gh', 'bare:<dir>' or a git URL template with {author}/{slug} (default: gh)")
+    push.add_argument("--author", default="", help="GitHub user / organisation")
+    push.add_argument("--description", default="", help="repository description (gh only)")
+    push.add_argument("--workers", type=int, default=8, help="concurrent pushes (default: 8)")
+    push.add_argument("--retries", type=int, default=3, help="retries after a transient failure (default: 3)")
+    push.add_argument("--verbose", action="store_true")
+    push.set_defaults(func=_cmd_push)
+
+    store = commands.add_parser("store", help="content-addressed store of kept files")
+    store.add_argument("--root", type=Path, help="store directory (default: $HARAKA_STORE or ~/.cache/haraka/store)")
+    store.add_argument("--verbose", action="store_true")
+    actions = store.add_subparsers(dest="action", metavar="ACTION")
+    actions.required = True
+    ingest = actions.add_parser("ingest", help="store a purged project's files as a snapshot")
+    ingest.add_argument("dir", type=Path, metavar="DIR")
+    ingest.add_argument("--name", help="snapshot name (default: directory name)")
+    ingest.add_argument("--dedupe", action="store_true",
+                        help="share already-stored files' storage with the store (reflink / hardlink)")
+    ingest.add_argument("--hardlink", action="store_true", help="allow hardlinks when reflinks are unsupported")
+    materialise = actions.add_parser(
+        "materialise", help="recreate a snapshot verbatim (only for trees that render identically)")
+    materialise.add_argument("name", metavar="SNAPSHOT")
+    materialise.add_argument("dest", type=Path, metavar="DEST")
+    materialise.add_argument("--hardlink", action="store_true", help="allow hardlinks when reflinks are unsupported")
+    materialise.add_argument("--no-verify", action="store_true", help="skip the byte-for-byte check")
+    prune = actions.add_parser("prune", help="drop other snapshots and unreferenced objects")
+    prune.add_argument("--keep", nargs="*", default=[], metavar="SNAPSHOT")
+    store.set_defaults(func=_cmd_store)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
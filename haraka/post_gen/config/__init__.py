@@ -1,3 +1,3 @@
-from .config import PostGenConfig
+from .config import PostGenConfig, CompiledManifest, compile_manifest
 
-__all__ = ["PostGenConfig"]
\ No newline at end of file
+__all__ = ["PostGenConfig", "CompiledManifest", "compile_manifest"]
\ No newline at end of file
@@ -1,8 +1,10 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Iterable, List, Optional, Tuple
 import yaml
 from pathspec import PathSpec
+from pathspec.patterns import GitWildMatchPattern
 
 _MANIFEST_DIR = Path(__file__).resolve().parent.parent.parent / "utils" / "manifests"
 
@@ -18,20 +20,46 @@ class PostGenConfig:
     verbose: bool = False
     services: List[str] = None
     evm: bool = False # Extreme Verbosity Mode - For in depth debugging dev tool
+    log_detail: Optional[Path] = None  # gzip sidecar with every purged / kept path
+    content_store: bool = False  # share kept files' storage with earlier renders (ContentStore)
 
 
-def load_manifest(variant: str) -> dict:
-    """Return the entire manifest dictionary for the given variant."""
+@dataclass(frozen=True)
+class CompiledManifest:
+    """Keep/protected patterns for one variant + service set, with the compiled spec."""
+    variant: str
+    keep_patterns: Tuple[str, ...]
+    protected: Tuple[str, ...]
+    services: Tuple[str, ...]
+    missing_services: Tuple[str, ...]
+    spec: PathSpec
+
+
+def _manifest_path(variant: str) -> Path:
     manifest_path = _MANIFEST_DIR / f"{variant}.yml"
+    if manifest_path.exists():
+        return manifest_path
+    # Variant keys are matched case-insensitively (purge lower-cases them).
+    for candidate in _MANIFEST_DIR.glob("*.yml"):
+        if candidate.stem.lower() == variant.lower():
+            return candidate
+    return manifest_path
+
+
+def load_manifest(variant: str) -> dict:
+    """
+    Return the entire manifest dictionary for the given variant, with its
+    ``extends:`` / ``include:`` chain resolved into flat ``keep``,
+    ``protected`` and ``services`` sections (parents first).
+    """
+    manifest_path = _manifest_path(variant)
     if not manifest_path.exists():
         raise FileNotFoundError(
             f"No manifest found for variant '{variant}' "
             f"(expected {manifest_path})"
         )
 
-    doc = yaml.safe_load(manifest_path.read_text())
-    if not isinstance(doc, dict):
-        raise ValueError(f"Manifest {manifest_path} must be a dictionary")
+    doc = _flatten_manifest(manifest_path, ())
 
     if "keep" not in doc:
         raise ValueError(f"Manifest {manifest_path} missing a `keep:` section")
@@ -39,16 +67,172 @@ def load_manifest(variant: str) -> dict:
     if "protected" not in doc:
         raise ValueError(f"Manifest {manifest_path} missing a `protected:` section")
 
-    if not isinstance(doc["keep"], Iterable):
-        raise TypeError(f"`keep` section in {manifest_path} must be a list")
+    return doc
 
-    if not isinstance(doc["protected"], Iterable):
-        raise TypeError(f"`protected` section in {manifest_path} must be a list")
 
+@lru_cache(maxsize=None)
+def _read_manifest(path: Path) -> dict:
+    doc = yaml.safe_load(path.read_text())
+    if doc is None:
+        return {}
+    if not isinstance(doc, dict):
+        raise ValueError(f"Manifest {path} must be a dictionary")
     return doc
 
 
+def _resolve_ref(ref: str, including: Path) -> Path:
+    """``include: [_infra]`` → ``<dir of including manifest>/_infra.yml``."""
+    name = ref if ref.endswith((".yml", ".yaml")) else f"{ref}.yml"
+    path = including.parent / name
+    if not path.exists():
+        path = _manifest_path(ref)
+    if not path.exists():
+        raise FileNotFoundError(f"Manifest {including} references unknown manifest '{ref}'")
+    return path
+
+
+def _as_list(value, key: str, path: Path) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str) and key in ("extends", "include"):
+        return [value]
+    if not isinstance(value, (list, tuple)):
+        raise TypeError(f"`{key}` section in {path} must be a list")
+    return list(value)
+
+
+def _flatten_manifest(path: Path, chain: Tuple[Path, ...]) -> dict:
+    if path in chain:
+        cycle = " -> ".join(p.name for p in (*chain, path))
+        raise ValueError(f"Manifest include cycle: {cycle}")
+    doc = _read_manifest(path)
+
+    parents = _as_list(doc.get("extends"), "extends", path) + _as_list(doc.get("include"), "include", path)
+    merged: dict = {}
+    for ref in parents:
+        _merge_manifest(merged, _flatten_manifest(_resolve_ref(ref, path), (*chain, path)), path)
+    _merge_manifest(merged, doc, path)
+    return merged
+
+
+def _merge_manifest(into: dict, doc: dict, path: Path) -> None:
+    for key, value in doc.items():
+        if key in ("extends", "include"):
+            continue
+        if key in ("keep", "protected"):
+            into.setdefault(key, []).extend(_as_list(value, key, path))
+        elif key == "services":
+            if value is not None and not isinstance(value, dict):
+                raise TypeError(f"`services` section in {path} must be a mapping")
+            services = into.setdefault("services", {})
+            for service, patterns in (value or {}).items():
+                services.setdefault(service, []).extend(_as_list(patterns, f"services.{service}", path))
+        else:
+            into[key] = value
+
+
+def normalise_patterns(patterns: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Flatten *patterns* into the smallest equivalent list: whitespace, blanks
+    and comments dropped, trailing ``/`` removed, duplicates removed and
+    patterns already covered by another one (``cmd/**`` next to ``cmd``,
+    ``chart/templates`` next to ``chart/**``) dropped. Order is preserved.
+    """
+    cleaned: List[str] = []
+    for raw in patterns:
+        pattern = str(raw).strip().rstrip("/")
+        if pattern and not pattern.startswith("#"):
+            cleaned.append(pattern)
+    # Negations depend on order and on what came before; leave them alone.
+    if any(p.startswith("!") for p in cleaned):
+        return tuple(cleaned)
+
+    unique = list(dict.fromkeys(cleaned))
+    return tuple(
+        q for q in unique
+        if not any(p is not q and _covers(p, q) for p in unique)
+    )
+
+
+_GLOB_CHARS = frozenset("*?[\\")
+
+
+def _split_pattern(pattern: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Path components of *pattern* and its leading glob-free components."""
+    parts = tuple(pattern.lstrip("/").split("/"))
+    literal = []
+    for part in parts:
+        if _GLOB_CHARS.intersection(part):
+            break
+        literal.append(part)
+    return parts, tuple(literal)
+
+
+def _covers(p: str, q: str) -> bool:
+    """
+    True when every path matched by gitwildmatch pattern *q* is matched by *p*.
+
+    Only the cases that are provably safe are recognised: *p* is a literal
+    path ``a/b`` (which matches itself and everything below it) or ``a/b/**``
+    (everything below), and *q* is anchored strictly beneath that directory.
+    """
+    if "/" not in q:
+        return False            # unanchored: may match at any depth
+    q_parts, q_literal = _split_pattern(q)
+    p_parts, p_literal = _split_pattern(p)
+    if p_parts == p_literal:
+        base = p_parts
+    elif p_parts[:-1] == p_literal and p_parts[-1] == "**":
+        base = p_literal
+    else:
+        return False
+    return q_literal[:len(base)] == base and len(q_parts) > len(base)
+
+
+@lru_cache(maxsize=None)
+def _compiled_pattern(pattern: str) -> GitWildMatchPattern:
+    # Shared across variants: the infra patterns every manifest keeps are
+    # compiled to regexes once per process.
+    return GitWildMatchPattern(pattern)
+
 
 def build_spec(patterns: Iterable[str]) -> PathSpec:
     """Compile patterns using git-style wildmatch syntax."""
-    return PathSpec.from_lines("gitwildmatch", patterns)
\ No newline at end of file
+    return PathSpec([_compiled_pattern(p) for p in patterns])
+
+
+def clear_manifest_cache() -> None:
+    """Forget parsed and compiled manifests so the next lookup re-reads the files."""
+    _read_manifest.cache_clear()
+    _compile_manifest.cache_clear()
+
+
+def compile_manifest(variant: str, services: Iterable[str] = ()) -> CompiledManifest:
+    """
+    Load *variant*'s manifest (resolving ``extends:`` / ``include:``), add the
+    enabled *services* sections and compile the normalised keep patterns once.
+    Results are cached per (variant, services), so many projects generated
+    from one variant share the same compiled spec.
+    """
+    return _compile_manifest(variant.lower(), tuple(dict.fromkeys(services or ())))
+
+
+@lru_cache(maxsize=None)
+def _compile_manifest(variant: str, services: Tuple[str, ...]) -> CompiledManifest:
+    manifest = load_manifest(variant)
+    service_patterns = manifest.get("services", {})
+
+    found = [s for s in services if s in service_patterns]
+    keep_patterns = list(manifest["keep"])
+    for service in found:
+        keep_patterns.extend(service_patterns[service])
+    keep_patterns = normalise_patterns(keep_patterns)
+
+    return CompiledManifest(
+        variant=variant,
+        keep_patterns=keep_patterns,
+        protected=tuple(dict.fromkeys(p.rstrip("/") for p in manifest["protected"])),
+        services=tuple(found),
+        missing_services=tuple(s for s in services if s not in service_patterns),
+        spec=build_spec(keep_patterns),
+    )
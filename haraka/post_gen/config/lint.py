@@ -0,0 +1,289 @@
+"""
+haraka.post_gen.config.lint
+
+Static checks and a match-cost benchmark for purge manifests.
+
+`ManifestLinter.lint(variant)` loads a manifest through `load_manifest` and
+reports:
+
+* empty / unloadable manifests and missing sections;
+* duplicate patterns and patterns shadowed by a broader one;
+* patterns that never match anything in a sample project tree;
+* per-pattern match cost (ns per path) with cheaper equivalent forms.
+
+Run it as ``haraka lint [VARIANT ...] [--tree DIR]``.
+"""
+from __future__ import annotations
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from haraka.post_gen.service.fileOps.pathtable import PathTable
+
+from .config import (
+    _MANIFEST_DIR,
+    _compiled_pattern,
+    _covers,
+    _manifest_path,
+    _read_manifest,
+    _split_pattern,
+    load_manifest,
+)
+
+_LEVEL_ICONS = {"error": "❌", "warning": "⚠️", "info": "💡"}
+
+
+@dataclass
+class LintFinding:
+    level: str                   # error | warning | info
+    message: str
+    pattern: Optional[str] = None
+    section: str = "keep"        # keep | protected | services.<name>
+    suggestion: Optional[str] = None
+
+    def render(self) -> str:
+        where = f"[{self.section}] "
+        if self.pattern is not None:
+            where += f"{self.pattern!r}: "
+        elif self.section == "keep":
+            where = ""
+        hint = f"  → {self.suggestion}" if self.suggestion else ""
+        return f"  {_LEVEL_ICONS[self.level]} {where}{self.message}{hint}"
+
+
+@dataclass
+class PatternCost:
+    pattern: str
+    ns_per_match: float
+    matches: int
+    suggestion: Optional[str] = None
+
+
+@dataclass
+class LintReport:
+    variant: str
+    path: Path
+    findings: List[LintFinding] = field(default_factory=list)
+    costs: List[PatternCost] = field(default_factory=list)
+    sample_size: int = 0
+
+    @property
+    def errors(self) -> List[LintFinding]:
+        return [f for f in self.findings if f.level == "error"]
+
+    @property
+    def warnings(self) -> List[LintFinding]:
+        return [f for f in self.findings if f.level == "warning"]
+
+    def render(self, top: int = 10) -> str:
+        lines = [f"📄 {self.variant} ({self.path.name})"]
+        lines.extend(f.render() for f in self.findings)
+        if not self.findings:
+            lines.append("  ✅ no issues")
+        if self.costs:
+            lines.append(f"  ⏱️  match cost over {self.sample_size} sample path(s), most expensive first:")
+            for cost in sorted(self.costs, key=lambda c: c.ns_per_match, reverse=True)[:top]:
+                hint = f"  → {cost.suggestion}" if cost.suggestion else ""
+                lines.append(
+                    f"     {cost.ns_per_match:8.1f} ns  {cost.matches:6d} hit(s)  {cost.pattern}{hint}"
+                )
+        return "\n".join(lines)
+
+
+class ManifestLinter:
+    """
+    Parameters
+    ----------
+    sample_paths
+        Relative POSIX paths (files and directories) of a representative
+        project tree. Enables the never-matching check and is the benchmark
+        corpus; without it a synthetic corpus is built from the patterns.
+    bench_rounds
+        Passes over the corpus per pattern when benchmarking (0 disables it).
+    """
+
+    def __init__(self, sample_paths: Optional[Sequence[str]] = None, bench_rounds: int = 3) -> None:
+        self.sample_paths = list(sample_paths) if sample_paths is not None else None
+        self.bench_rounds = bench_rounds
+
+    @classmethod
+    def from_tree(cls, root: Path, bench_rounds: int = 3) -> "ManifestLinter":
+        return cls(sample_tree(root), bench_rounds)
+
+    @staticmethod
+    def variants() -> List[str]:
+        """Every manifest in the manifests directory; ``_*.yml`` fragments are skipped."""
+        return sorted(p.stem for p in _MANIFEST_DIR.glob("*.yml") if not p.stem.startswith("_"))
+
+    # ------------- public API ----------------------------------------- #
+    def lint(self, variant: str) -> LintReport:
+        report = LintReport(variant, _manifest_path(variant))
+        if report.path.exists() and not _read_manifest(report.path):
+            report.findings.append(LintFinding("error", "manifest is empty"))
+            return report
+        try:
+            manifest = load_manifest(variant)
+        except (OSError, ValueError, TypeError) as e:
+            report.findings.append(LintFinding("error", str(e)))
+            return report
+
+        keep = self._check_section(report, manifest.get("keep", []), "keep")
+        if not keep:
+            report.findings.append(LintFinding("warning", "`keep:` is empty – every path would be purged"))
+        for service, patterns in manifest.get("services", {}).items():
+            section = f"services.{service}"
+            if not patterns:
+                report.findings.append(LintFinding("warning", "service section is empty", section=section))
+                continue
+            own = self._check_section(report, patterns, section)
+            for p in own:
+                coverer = next((k for k in keep if _covers(k, p) or k == p), None)
+                if coverer is not None:
+                    report.findings.append(LintFinding(
+                        "warning", f"already kept unconditionally by {coverer!r}", p, section,
+                        "drop it from the service section",
+                    ))
+        self._check_protected(report, manifest.get("protected", []))
+
+        all_patterns: Dict[str, str] = dict.fromkeys(keep, "keep")
+        for service, patterns in manifest.get("services", {}).items():
+            for p in _clean(patterns):
+                all_patterns.setdefault(p, f"services.{service}")
+        if self.sample_paths is not None:
+            self._check_reachability(report, all_patterns)
+        if self.bench_rounds > 0 and all_patterns:
+            self._benchmark(report, all_patterns)
+        return report
+
+    # ------------- checks --------------------------------------------- #
+    def _check_section(self, report: LintReport, raw: Iterable[str], section: str) -> List[str]:
+        patterns = _clean(raw)
+        seen: Dict[str, int] = {}
+        for p in patterns:
+            seen[p] = seen.get(p, 0) + 1
+        for p, count in seen.items():
+            if count > 1:
+                report.findings.append(LintFinding("warning", f"listed {count} times", p, section))
+
+        unique = list(seen)
+        # Negations make pattern order significant; shadowing is not decidable locally.
+        if not any(p.startswith("!") for p in unique):
+            for q in unique:
+                coverer = next((p for p in unique if p != q and _covers(p, q)), None)
+                if coverer is not None:
+                    report.findings.append(LintFinding(
+                        "info", f"shadowed by {coverer!r}", q, section, "redundant, can be removed",
+                    ))
+        for p in unique:
+            suggestion = cheaper_form(p)
+            if suggestion is not None:
+                report.findings.append(LintFinding("info", "has a cheaper equivalent form", p, section, suggestion))
+            if p.lstrip("!") in ("**", "**/*", "*"):
+                report.findings.append(LintFinding("warning", "matches every path", p, section))
+        return unique
+
+    def _check_protected(self, report: LintReport, raw: Iterable[str]) -> None:
+        for p in _clean(raw):
+            if _GLOB_RE.search(p):
+                report.findings.append(LintFinding(
+                    "warning", "protected entries are exact directory paths, globs never match",
+                    p, "protected",
+                ))
+            elif self.sample_paths is not None and p not in self.sample_paths:
+                report.findings.append(LintFinding("info", "not present in the sample tree", p, "protected"))
+
+    def _check_reachability(self, report: LintReport, patterns: Dict[str, str]) -> None:
+        for p, section in patterns.items():
+            regex = _compiled_pattern(p).regex
+            if regex is None:
+                continue
+            if not any(regex.match(path) for path in self.sample_paths):
+                report.findings.append(LintFinding("warning", "never matches the sample tree", p, section))
+
+    # ------------- benchmark ------------------------------------------ #
+    def _benchmark(self, report: LintReport, patterns: Iterable[str]) -> None:
+        patterns = list(patterns)
+        corpus = self.sample_paths if self.sample_paths else synthetic_corpus(patterns)
+        report.sample_size = len(corpus)
+        if not corpus:
+            return
+        for p in patterns:
+            regex = _compiled_pattern(p).regex
+            if regex is None:
+                continue
+            cost = self._time(regex.match, corpus)
+            hits = sum(1 for path in corpus if regex.match(path))
+            suggestion = cheaper_form(p)
+            if suggestion is None and "/" not in p and not p.startswith("!"):
+                # Unanchored patterns are tried at every depth; anchoring is
+                # not equivalent, but usually what a root-level entry means.
+                anchored = self._time(_compiled_pattern(f"/{p}").regex.match, corpus)
+                if anchored * 1.5 < cost:
+                    suggestion = f"'/{p}' is {cost / anchored:.1f}x cheaper if only the project root is meant"
+            report.costs.append(PatternCost(p, cost, hits, suggestion))
+
+    def _time(self, match, corpus: List[str]) -> float:
+        """Best-of-N nanoseconds per ``match(path)`` call over *corpus*."""
+        best = float("inf")
+        for _ in range(self.bench_rounds):
+            started = time.perf_counter_ns()
+            for path in corpus:
+                match(path)
+            best = min(best, time.perf_counter_ns() - started)
+        return best / len(corpus)
+
+
+_GLOB_RE = re.compile(r"[*?\[\\]")
+_SINGLE_CLASS_RE = re.compile(r"\[([^\]\\!^-])\]")
+
+
+def _clean(raw: Iterable[str]) -> List[str]:
+    cleaned = []
+    for item in raw or ():
+        pattern = str(item).strip().rstrip("/")
+        if pattern and not pattern.startswith("#"):
+            cleaned.append(pattern)
+    return cleaned
+
+
+def cheaper_form(pattern: str) -> Optional[str]:
+    """
+    Return an equivalent gitwildmatch pattern that compiles to a cheaper
+    regex, or ``None`` when *pattern* is already in its cheapest form.
+
+    * ``**/name``      → ``name``      (a slash-free pattern matches at any depth)
+    * ``dir/**/*``     → ``dir/**``
+    * ``[x]``          → ``x``         (single-character classes)
+    * ``***`` / ``**/**`` runs collapse to ``**``
+    """
+    negate = "!" if pattern.startswith("!") else ""
+    body = pattern[len(negate):]
+    new = _SINGLE_CLASS_RE.sub(lambda m: re.escape(m.group(1)) if m.group(1) in "*?" else m.group(1), body)
+    new = re.sub(r"\*{3,}", "**", new)
+    while "**/**" in new:
+        new = new.replace("**/**", "**")
+    if new.endswith("/**/*"):
+        new = new[:-2]
+    while new.startswith("**/") and "/" not in new[3:] and new[3:] not in ("", "**"):
+        new = new[3:]
+    return negate + new if new != body else None
+
+
+def sample_tree(root: Path, exclude: Tuple[str, ...] = (".git",)) -> List[str]:
+    """Relative POSIX paths of every file and directory under *root*."""
+    return list(PathTable.walk(root, exclude).rels())
+
+
+def synthetic_corpus(patterns: Iterable[str], size: int = 2000, seed: int = 0) -> List[str]:
+    """Deterministic corpus mixing the patterns' literal components with noise."""
+    words = {"src", "lib", "test", "docs", "main.py", "index.ts", "README.md", "x"}
+    for p in patterns:
+        parts, _ = _split_pattern(p.lstrip("!"))
+        words.update(part for part in parts if not _GLOB_RE.search(part))
+    vocab = sorted(words)
+    rng = random.Random(seed)
+    return ["/".join(rng.choice(vocab) for _ in range(rng.randint(1, 6))) for _ in range(size)]
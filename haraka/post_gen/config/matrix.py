@@ -0,0 +1,255 @@
+"""
+haraka.post_gen.config.matrix
+
+Keep/delete outcome of every combination of a manifest's ``services:``
+sections from a single walk of a template tree.
+
+`ServicesMatrix.analyze(root)` walks *root* once and matches every path
+against the base ``keep:`` patterns and each service's patterns, recording
+a per-path bitmask (bit 0 = base, bit *i* = *i*-th service). The bitmasks are
+OR-ed up the tree, so a path survives under service set *S* exactly when
+``subtree_mask & S`` is non-zero – the same rule `ResourcePurger` applies
+by keeping the ancestors of every matched path. Each service then becomes
+one big-int bitset over path indices and a combination's kept set is the
+OR of its services' bitsets: 2^n outcomes at a few machine words per path
+each, instead of 2^n purges.
+
+Run it as ``haraka matrix VARIANT DIR``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from haraka.post_gen.service.fileOps.pathtable import DIR, ROOT, PathTable
+
+from .config import _manifest_path, build_spec, load_manifest, normalise_patterns
+from .lint import LintFinding, _clean
+
+# 2^n rows get unreadable (and slow) quickly; above this, pass services explicitly.
+MAX_SERVICES = 16
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+if hasattr(int, "bit_count"):     # Python 3.10+
+    _popcount = int.bit_count     # noqa: F811
+
+
+@dataclass
+class MatrixRow:
+    services: Tuple[str, ...]
+    kept: int
+    deleted: int
+    protected: int
+    added: int                   # kept paths beyond the base (no services) row
+    same_as: Optional[Tuple[str, ...]] = None   # an earlier row with the identical outcome
+
+
+@dataclass
+class MatrixReport:
+    variant: str
+    path: Path
+    root: Path
+    services: Tuple[str, ...] = ()
+    total: int = 0
+    rows: List[MatrixRow] = field(default_factory=list)
+    findings: List[LintFinding] = field(default_factory=list)
+    exact: bool = True           # False: manifest has negations, rows evaluated one by one
+
+    @property
+    def errors(self) -> List[LintFinding]:
+        return [f for f in self.findings if f.level == "error"]
+
+    @property
+    def warnings(self) -> List[LintFinding]:
+        return [f for f in self.findings if f.level == "warning"]
+
+    def render(self, max_rows: int = 64) -> str:
+        names = ", ".join(self.services) or "none"
+        lines = [
+            f"🧮 {self.variant} ({self.path.name}) over {self.root}: {self.total} path(s), "
+            f"{len(self.rows)} combination(s) of services: {names}"
+        ]
+        if not self.exact:
+            lines.append("  💡 manifest uses `!` negations – combinations evaluated one by one")
+        lines.append(f"  {'kept':>7} {'deleted':>7} {'prot':>5} {'+base':>6}  services")
+        for row in self.rows[:max_rows]:
+            label = "+".join(row.services) or "(base)"
+            same = f"  = {'+'.join(row.same_as) or '(base)'}" if row.same_as is not None else ""
+            lines.append(
+                f"  {row.kept:7d} {row.deleted:7d} {row.protected:5d} {row.added:+6d}  {label}{same}"
+            )
+        if len(self.rows) > max_rows:
+            lines.append(f"  … {len(self.rows) - max_rows} more combination(s)")
+        lines.extend(f.render() for f in self.findings)
+        if not self.findings:
+            lines.append("  ✅ every combination keeps a distinct, non-empty project")
+        return "\n".join(lines)
+
+
+class ServicesMatrix:
+    """
+    Parameters
+    ----------
+    variant
+        Manifest to analyse.
+    services
+        Services to combine (default: every ``services:`` section).
+    exclude
+        Top-level entries not walked, as in `ResourcePurger.walk_exclude`.
+    """
+
+    def __init__(self, variant: str, services: Optional[Sequence[str]] = None,
+                 exclude: Tuple[str, ...] = (".git",)) -> None:
+        self.variant = variant
+        self.manifest = load_manifest(variant)
+        sections: Dict[str, list] = self.manifest.get("services", {})
+        if services is None:
+            services = list(sections)
+        unknown = [s for s in services if s not in sections]
+        if unknown:
+            raise ValueError(f"No manifest section for service(s): {', '.join(unknown)}")
+        if len(services) > MAX_SERVICES:
+            raise ValueError(
+                f"{len(services)} services is {2 ** len(services)} combinations; "
+                f"pass at most {MAX_SERVICES} explicitly"
+            )
+        self.services: Tuple[str, ...] = tuple(dict.fromkeys(services))
+        self.exclude = exclude
+        self._base = list(self.manifest["keep"])
+        self._sections = [list(sections[s] or ()) for s in self.services]
+        self._protected = frozenset(p.rstrip("/") for p in _clean(self.manifest["protected"]))
+
+    # ------------- public API ----------------------------------------- #
+    def analyze(self, root: Path) -> MatrixReport:
+        paths, dirs, parents = _walk(Path(root), self.exclude)
+        report = MatrixReport(self.variant, _manifest_path(self.variant), Path(root),
+                              self.services, len(paths))
+
+        patterns = [p for section in (self._base, *self._sections) for p in _clean(section)]
+        report.exact = not any(p.startswith("!") for p in patterns)
+        if report.exact:
+            kept_by = self._bitsets(paths, parents)
+            outcomes = _combine(kept_by[0], kept_by[1:])
+        else:
+            outcomes = self._evaluate_each(paths, parents)
+
+        prot_bits = _bitset((i for i in dirs if paths[i] in self._protected), len(paths))
+
+        base_count = None
+        seen: Dict[int, Tuple[str, ...]] = {}
+        for combo, kept in outcomes:
+            names = tuple(self.services[i] for i in combo)
+            n_kept = _popcount(kept)
+            if base_count is None:
+                base_count = n_kept
+            n_prot = _popcount(prot_bits & ~kept)
+            report.rows.append(MatrixRow(
+                names, n_kept, len(paths) - n_kept - n_prot, n_prot,
+                n_kept - base_count, seen.get(kept),
+            ))
+            seen.setdefault(kept, names)
+
+        self._check(report)
+        return report
+
+    # ------------- evaluation ----------------------------------------- #
+    def _bitsets(self, paths: List[str], parents: List[int]) -> List[int]:
+        """Kept-path bitset for the base section (index 0) and each service."""
+        specs = [build_spec(normalise_patterns(s)) for s in (self._base, *self._sections)]
+        matchers = [[p.regex.match for p in spec.patterns if p.include] for spec in specs]
+
+        masks = [0] * len(paths)
+        for i, rel in enumerate(paths):
+            mask = 0
+            for bit, regexes in enumerate(matchers):
+                if any(m(rel) for m in regexes):
+                    mask |= 1 << bit
+            masks[i] = mask
+        # Children follow their parent in walk order: one reverse pass ORs
+        # every subtree's bits into its root (kept ancestors).
+        for i in range(len(paths) - 1, -1, -1):
+            if masks[i] and parents[i] >= 0:
+                masks[parents[i]] |= masks[i]
+
+        return [_bitset((i for i, mask in enumerate(masks) if mask >> bit & 1), len(paths))
+                for bit in range(len(matchers))]
+
+    def _evaluate_each(self, paths: List[str], parents: List[int]) -> Iterator[Tuple[Tuple[int, ...], int]]:
+        # Negations are order dependent (last match wins), so masks cannot be
+        # OR-ed; match each combination's own spec over the walked paths.
+        for combo in _subsets(len(self.services)):
+            patterns = list(self._base)
+            for i in combo:
+                patterns.extend(self._sections[i])
+            match = build_spec(normalise_patterns(patterns)).match_file
+            hit = [bool(match(rel)) for rel in paths]
+            for i in range(len(paths) - 1, -1, -1):
+                if hit[i] and parents[i] >= 0:
+                    hit[parents[i]] = True
+            yield combo, _bitset((i for i, h in enumerate(hit) if h), len(paths))
+
+    # ------------- checks --------------------------------------------- #
+    def _check(self, report: MatrixReport) -> None:
+        by_combo = {row.services: row for row in report.rows}
+        for row in report.rows:
+            if row.kept == 0:
+                label = "+".join(row.services) or "(base)"
+                report.findings.append(LintFinding("error", f"{label} keeps nothing – the whole project is purged"))
+        for name in self.services:
+            alone = by_combo[(name,)]
+            section = f"services.{name}"
+            if alone.added == 0:
+                report.findings.append(LintFinding(
+                    "warning", "keeps nothing the base does not already keep", section=section,
+                ))
+                continue
+            for other in self.services:
+                if other == name or by_combo[(other,)].added == 0:
+                    continue
+                pair = tuple(s for s in self.services if s in (name, other))
+                if by_combo[pair].kept == by_combo[(other,)].kept:
+                    report.findings.append(LintFinding(
+                        "info", f"everything it adds is also kept by {other!r}", section=section,
+                    ))
+
+
+def _bitset(indices: Iterable[int], size: int) -> int:
+    """Big-int bitset with bit *i* set for every *i* in *indices*."""
+    buf = bytearray((size + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _subsets(n: int) -> Iterator[Tuple[int, ...]]:
+    """Every subset of ``range(n)``, by size then lexicographically."""
+    from itertools import combinations
+
+    for size in range(n + 1):
+        yield from combinations(range(n), size)
+
+
+def _combine(base: int, kept_by: List[int]) -> Iterator[Tuple[Tuple[int, ...], int]]:
+    """Kept bitset of every service combination: base | OR of its services' bitsets."""
+    for combo in _subsets(len(kept_by)):
+        kept = base
+        for i in combo:
+            kept |= kept_by[i]
+        yield combo, kept
+
+
+def _walk(root: Path, exclude: Tuple[str, ...]) -> Tuple[List[str], set, List[int]]:
+    """
+    Relative POSIX paths under *root* in pre-order, the indices of the
+    directories among them and each path's parent index (-1 at top level).
+    """
+    table = PathTable.walk(root, exclude)
+    kind = table.kind
+    dirs = {i for i in range(len(kind)) if kind[i] & DIR}
+    parents = [-1 if p == ROOT else p for p in table.parent]
+    return list(table.rels()), dirs, parents
@@ -0,0 +1,288 @@
+"""
+haraka.post_gen.daemon
+
+Optional long-lived post-generation server, so Cookiecutter hooks skip the
+interpreter start-up, the ``haraka`` imports and manifest compilation.
+
+Server (``haraka daemon``) – listens on a Unix socket, keeps ``runner`` and
+every compiled manifest warm and runs up to ``workers`` projects at once.
+Each request's stdout / stderr is streamed back to its client as it is
+written.
+
+Client (in the hook)::
+
+    from haraka import PostGenConfig, run_via_daemon
+    run_via_daemon(cfg)        # falls back to runner.main(cfg) without a daemon
+
+Wire format: one JSON object per line. The client sends
+``{"op": "run", "config": {...}}``; the server answers with any number of
+``{"stream": "stdout"|"stderr", "data": "..."}`` frames and a final
+``{"exit": <code>, "error": <message or null>}``.
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from haraka.post_gen.config import PostGenConfig, compile_manifest
+from haraka.post_gen.pipeline import _OutputRouter
+from haraka.utils import Logger
+
+
+class DaemonError(RuntimeError):
+    """The daemon accepted the request but post-generation failed."""
+
+
+def default_socket_path() -> Path:
+    env = os.environ.get("HARAKA_SOCKET")
+    if env:
+        return Path(env)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "haraka.sock"
+    uid = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return Path(tempfile.gettempdir()) / f"haraka-{uid}.sock"
+
+
+def config_to_dict(cfg: PostGenConfig) -> Dict[str, Any]:
+    doc = dataclasses.asdict(cfg)
+    doc["project_dir"] = str(Path(cfg.project_dir).resolve())
+    if cfg.log_detail is not None:
+        doc["log_detail"] = str(Path(cfg.log_detail).resolve())
+    return doc
+
+
+def config_from_dict(doc: Dict[str, Any]) -> PostGenConfig:
+    fields = {f.name for f in dataclasses.fields(PostGenConfig)}
+    unknown = set(doc) - fields
+    if unknown:
+        raise ValueError(f"Unknown PostGenConfig field(s): {', '.join(sorted(unknown))}")
+    if doc.get("log_detail") is not None:
+        doc = {**doc, "log_detail": Path(doc["log_detail"])}
+    return PostGenConfig(**{**doc, "project_dir": Path(doc["project_dir"])})
+
+
+# ------------- server ------------------------------------------------- #
+class _SocketSink:
+    """`_OutputRouter` sink that forwards every write as a frame."""
+
+    def __init__(self, wfile, lock: threading.Lock) -> None:
+        self._wfile = wfile
+        self._lock = lock
+        self.broken = False
+
+    def append(self, item) -> None:
+        router, text = item
+        self.send({"stream": router.name, "data": text})
+
+    def send(self, frame: Dict[str, Any]) -> None:
+        if self.broken:
+            return
+        data = (json.dumps(frame) + "\n").encode()
+        with self._lock:
+            try:
+                self._wfile.write(data)
+                self._wfile.flush()
+            except OSError:
+                self.broken = True   # client went away; finish the run regardless
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        sink = _SocketSink(self.wfile, threading.Lock())
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except ValueError as e:
+            sink.send({"exit": 2, "error": f"bad request: {e}"})
+            return
+
+        op = request.get("op")
+        if op == "ping":
+            sink.send({"exit": 0, "error": None, "pid": os.getpid(), "served": self.server.served})
+            return
+        if op != "run":
+            sink.send({"exit": 2, "error": f"unknown op: {op!r}"})
+            return
+
+        with self.server.slots:
+            self.server.served += 1
+            code, error = self.server.daemon.run_request(request.get("config") or {}, sink)
+        sink.send({"exit": code, "error": error})
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, path: str, daemon: "PostGenDaemon") -> None:
+        self.daemon = daemon
+        self.slots = threading.BoundedSemaphore(daemon.workers)
+        self.served = 0
+        super().__init__(path, _RequestHandler)
+
+
+class PostGenDaemon:
+    """
+    Parameters
+    ----------
+    socket_path
+        Where to listen (see `default_socket_path`).
+    workers
+        Projects processed concurrently; further requests wait their turn.
+    """
+
+    def __init__(self, socket_path: Optional[Path] = None, workers: int = 4,
+                 logger: Optional[Logger] = None) -> None:
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+        self.workers = max(1, workers)
+        self._log = logger or Logger("haraka-daemon")
+        self._server: Optional[_Server] = None
+
+    def warm(self) -> None:
+        """Import the pipeline and compile every variant's manifest up front."""
+        from haraka.post_gen import runner  # noqa: F401  (heavy imports: art, pathspec, yaml)
+        from haraka.post_gen.config.lint import ManifestLinter
+
+        for variant in ManifestLinter.variants():
+            try:
+                compile_manifest(variant)
+            except Exception as e:
+                self._log.debug(f"Manifest '{variant}' not warmed: {e}")
+
+    def run_request(self, doc: Dict[str, Any], sink: _SocketSink) -> "tuple[int, Optional[str]]":
+        from haraka.post_gen import runner
+
+        _OutputRouter.capture(sink)
+        try:
+            runner.main(config_from_dict(doc))
+            return 0, None
+        except SystemExit as e:
+            return (e.code if isinstance(e.code, int) else 1), None
+        except BaseException as e:
+            return 1, f"{type(e).__name__}: {e}"
+        finally:
+            _OutputRouter.capture(None)
+
+    def serve_forever(self) -> None:
+        self._claim_socket()
+        self.warm()
+        self._server = _Server(str(self.socket_path), self)
+        os.chmod(self.socket_path, 0o600)
+        _OutputRouter.install()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: threading.Thread(target=self.shutdown).start())
+        self._log.info(f"🚀 Listening on {self.socket_path} with {self.workers} worker(s)")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            _OutputRouter.uninstall()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+            self._log.info("👋 Daemon stopped")
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _claim_socket(self) -> None:
+        if not self.socket_path.exists():
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            return
+        if ping(self.socket_path) is not None:
+            raise RuntimeError(f"A haraka daemon is already listening on {self.socket_path}")
+        self.socket_path.unlink()  # stale socket from a crashed daemon
+
+
+# ------------- client ------------------------------------------------- #
+def _connect(path: Path, timeout: float, read_timeout: float) -> Optional[socket.socket]:
+    """
+    Connected socket, or ``None`` when nothing usable listens on *path*.
+    A socket owned by another user (e.g. planted at the predictable
+    ``/tmp`` fallback path) is refused.
+    """
+    try:
+        owner = os.stat(path).st_uid
+    except OSError:
+        return None
+    if hasattr(os, "getuid") and owner != os.getuid():
+        Logger("haraka-daemon").warn(f"⚠️ Ignoring {path}: owned by uid {owner}, not by this user")
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(read_timeout)
+    return sock
+
+
+def ping(socket_path: Optional[Path] = None, timeout: float = 0.5) -> Optional[Dict[str, Any]]:
+    """Daemon status, or ``None`` when nothing is listening."""
+    sock = _connect(socket_path or default_socket_path(), timeout, timeout)
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write(b'{"op": "ping"}\n')
+            f.flush()
+            line = f.readline()
+    except socket.timeout:
+        return None
+    return json.loads(line) if line else None
+
+
+def run_via_daemon(cfg: PostGenConfig, socket_path: Optional[Path] = None,
+                   connect_timeout: float = 0.5, read_timeout: float = 300.0) -> None:
+    """
+    Run post-generation for *cfg* on the daemon, streaming its output to this
+    process's stdout / stderr. Without a reachable daemon, runs
+    ``runner.main(cfg)`` in-process instead.
+
+    A failed run raises `DaemonError`, as does a daemon that sends nothing
+    for *read_timeout* seconds; a run that exited with a status (a failing
+    git command, …) raises ``SystemExit`` with it, like ``main``.
+    """
+    sock = _connect(socket_path or default_socket_path(), connect_timeout, read_timeout)
+    if sock is None:
+        from haraka.post_gen.runner import main
+        return main(cfg)
+
+    final: Optional[Dict[str, Any]] = None
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write((json.dumps({"op": "run", "config": config_to_dict(cfg)}) + "\n").encode())
+            f.flush()
+            for line in f:
+                frame = json.loads(line)
+                if "stream" in frame:
+                    out = sys.stderr if frame["stream"] == "stderr" else sys.stdout
+                    out.write(frame["data"])
+                    out.flush()
+                else:
+                    final = frame
+                    break
+    except socket.timeout:
+        raise DaemonError(f"haraka daemon sent nothing for {read_timeout:g}s") from None
+
+    if final is None:
+        raise DaemonError("haraka daemon closed the connection before the run finished")
+    if final.get("error"):
+        raise DaemonError(final["error"])
+    if final.get("exit"):
+        raise SystemExit(final["exit"])
@@ -0,0 +1,192 @@
+"""
+haraka.post_gen.pipeline
+
+A tiny dependency graph for post-generation steps.
+
+Steps whose dependencies are satisfied run concurrently on a thread pool
+(banner framing does not depend on purge or ``git init``), while
+their console output is captured per step and replayed **in registration
+order**, so the log reads exactly as if the steps had run one after another.
+Per-step wall-clock timings are collected for the summary.
+"""
+from __future__ import annotations
+
+import io
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from haraka.utils import Logger
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str = "pending"          # ok | failed | skipped
+    started: float = 0.0
+    seconds: float = 0.0
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class _Step:
+    name: str
+    fn: Callable[[], Any]
+    after: Tuple[str, ...]
+    output: List[Tuple["_OutputRouter", str]] = field(default_factory=list)
+
+
+class _OutputRouter(io.TextIOBase):
+    """
+    Stand-in for ``sys.stdout`` / ``sys.stderr``: writes from threads that have
+    a sink (graph steps, daemon requests) go to it, everything else passes
+    through. A sink is anything with ``append((router, text))``; replaying
+    an entry with ``router.write(text)`` honours the *replaying* thread's sink,
+    so captures nest.
+    """
+
+    _local = threading.local()
+    _lock = threading.Lock()
+    _installed = 0
+    _originals: Tuple[TextIO, TextIO] = (sys.stdout, sys.stderr)
+
+    def __init__(self, target: TextIO, name: str = "stdout") -> None:
+        super().__init__()
+        self._target = target
+        self.name = name
+
+    def write(self, s: str) -> int:
+        sink = getattr(self._local, "sink", None)
+        if sink is None:
+            return self._target.write(s)
+        sink.append((self, s))
+        return len(s)
+
+    def flush(self) -> None:
+        if getattr(self._local, "sink", None) is None:
+            self._target.flush()
+
+    @classmethod
+    def install(cls) -> None:
+        with cls._lock:
+            if cls._installed == 0:
+                cls._originals = (sys.stdout, sys.stderr)
+                sys.stdout = cls(sys.stdout, "stdout")
+                sys.stderr = cls(sys.stderr, "stderr")
+            cls._installed += 1
+
+    @classmethod
+    def uninstall(cls) -> None:
+        with cls._lock:
+            cls._installed -= 1
+            if cls._installed == 0:
+                sys.stdout, sys.stderr = cls._originals
+
+    @classmethod
+    def capture(cls, sink) -> None:
+        cls._local.sink = sink
+
+
+class TaskGraph:
+    """
+    Register steps with ``add(name, fn, after=…)`` then ``run()``.
+
+    A failing step marks every step depending on it as skipped; independent
+    steps still run. ``run`` re-raises the first failure (in registration
+    order) after all output has been replayed.
+    """
+
+    def __init__(self, logger: Logger, max_workers: Optional[int] = None) -> None:
+        self._log = logger
+        self._steps: Dict[str, _Step] = {}
+        self.max_workers = max_workers
+        self.results: Dict[str, StepResult] = {}
+
+    def add(self, name: str, fn: Callable[[], Any], after: Tuple[str, ...] = ()) -> None:
+        missing = [dep for dep in after if dep not in self._steps]
+        if missing:
+            raise ValueError(f"Step '{name}' depends on unknown step(s): {', '.join(missing)}")
+        if name in self._steps:
+            raise ValueError(f"Step '{name}' registered twice")
+        self._steps[name] = _Step(name, fn, tuple(after))
+
+    def run(self) -> Dict[str, StepResult]:
+        self.results = {name: StepResult(name) for name in self._steps}
+        order = list(self._steps)
+        emitted = 0
+        running: Dict[Future, str] = {}
+
+        _OutputRouter.install()
+        try:
+            with ThreadPoolExecutor(self.max_workers or len(order) or 1,
+                                    thread_name_prefix="post-gen-step") as pool:
+                while True:
+                    for name in order:
+                        if self.results[name].status != "pending" or name in running.values():
+                            continue
+                        deps = [self.results[d].status for d in self._steps[name].after]
+                        if any(s in ("failed", "skipped") for s in deps):
+                            self.results[name].status = "skipped"
+                            self._log.debug(f"Step '{name}' skipped: a dependency did not succeed")
+                        elif all(s == "ok" for s in deps):
+                            running[pool.submit(self._execute, self._steps[name])] = name
+
+                    emitted = self._replay(order, emitted)
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        running.pop(fut)
+        finally:
+            _OutputRouter.uninstall()
+        self._replay(order, emitted)
+
+        for name in order:
+            error = self.results[name].error
+            if error is not None:
+                raise error
+        return self.results
+
+    def report(self) -> None:
+        """Log per-step timings and the overlap gained over a sequential run."""
+        ran = [r for r in self.results.values() if r.status in ("ok", "failed")]
+        if not ran:
+            return
+        wall = max(r.started + r.seconds for r in ran) - min(r.started for r in ran)
+        serial = sum(r.seconds for r in ran)
+        for r in self.results.values():
+            self._log.info(f"⏱️  {r.name:<10} {r.status:<8} {r.seconds * 1000:8.1f} ms")
+        self._log.info(f"⏱️  total {wall * 1000:.1f} ms wall ({serial * 1000:.1f} ms if run sequentially)")
+
+    # ------------- internals ------------------------------------------ #
+    def _execute(self, step: _Step) -> None:
+        result = self.results[step.name]
+        _OutputRouter.capture(step.output)
+        result.started = time.perf_counter()
+        try:
+            result.value = step.fn()
+            result.status = "ok"
+        except BaseException as e:  # SystemExit from CommandRunner included
+            result.error = e
+            result.status = "failed"
+        finally:
+            result.seconds = time.perf_counter() - result.started
+            _OutputRouter.capture(None)
+
+    def _replay(self, order: List[str], emitted: int) -> int:
+        """Print buffered output of finished steps, strictly in registration order."""
+        while emitted < len(order):
+            name = order[emitted]
+            if self.results[name].status == "pending":
+                break
+            step = self._steps[name]
+            for stream, text in step.output:
+                stream.write(text)
+            step.output.clear()
+            emitted += 1
+        sys.stdout.flush()
+        return emitted
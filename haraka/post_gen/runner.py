@@ -1,11 +1,20 @@
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
 from haraka.art.create import Create
 from haraka.art.ascii.assets import *
-from .config import PostGenConfig
+from .config import PostGenConfig, compile_manifest
 from haraka.utils import divider, Logger
 from haraka.post_gen.service.command import CommandRunner
 from haraka.post_gen.service.fileOps.files import FileOps
 from haraka.post_gen.service.fileOps.purge import ResourcePurger
+from haraka.post_gen.service.fileOps.store import ContentStore
 from haraka.post_gen.service.gitOps.gitops import GitOps
+from haraka.post_gen.service.gitOps.push import ParallelPusher, PushJob, PushReport, PushTarget
+from haraka.post_gen.pipeline import TaskGraph
 
 
 def main(cfg: PostGenConfig) -> None:
@@ -32,32 +41,208 @@ def main(cfg: PostGenConfig) -> None:
         logger.error(f"Failed to initialize components: {e}")
         raise
 
-    divider("1️⃣  / 4️⃣  – Purge template junk")
-    logger.debug("Starting template junk purge")
+    graph = _build_graph(cfg, logger, purge, git)
+    graph.run()
 
-    purge.purge(cfg.variant, cfg.project_dir, cfg.services)
-    logger.debug(f"Purge completed for variant: {cfg.variant} in directory: {cfg.project_dir}")
+    if cfg.use_git and not (cfg.confirm_remote and cfg.author_gh):
+        logger.info("Skipping create remote (step 4)...")
+        logger.debug(f"Configuration for confirm_remote: {cfg.confirm_remote}")
+    elif not cfg.use_git:
+        logger.info("Skipping git repo creation (steps 2-4)...")
+        logger.debug(f"Configuration for use_git: {cfg.use_git}")
 
-    if cfg.use_git:
+    divider("🎉 Project generation complete 🎉")
+    logger.debug("Project generation completed")
 
-        divider("2️⃣  / 4️⃣  – Initialise Git repo")
-        logger.debug("Starting Git repository initialization")
+    banner = graph.results["banner"].value
+    if banner:
+        logger.debug(f"Detected variant: {cfg.variant}, printing pre-rendered banner")
+        print(banner)
+    graph.report()
 
-        git.init_repo(cfg.project_dir)
-        logger.debug(f"Git repository initialized in directory: {cfg.project_dir}")
 
-        divider("3️⃣  / 4️⃣  – Commit scaffold")
-        logger.debug("Starting staging and initial commit")
+def _build_graph(cfg: PostGenConfig, logger: Logger, purge: ResourcePurger, git: GitOps) -> TaskGraph:
+    """
+    Express the pipeline as a dependency graph; only real dependencies are kept:
 
-        git.stage_commit(cfg.project_dir)
-        logger.debug(f"Initial commit completed in directory: {cfg.project_dir}")
+        purge ─┬─► [store] ─┐
+               │            ├─► commit ─► push
+               └─► init ────┘
+        banner            (independent; printed after completion)
 
+    ``init`` waits for purge so a failed purge leaves no ``.git`` behind.
+    """
+    graph = TaskGraph(logger)
+    graph.add("purge", lambda: _step_purge(cfg, logger, purge))
+    kept = "purge"
+    if cfg.content_store:
+        graph.add("store", lambda: _step_store(cfg, logger), after=("purge",))
+        kept = "store"
+    if cfg.use_git:
+        graph.add("git-init", lambda: _step_git_init(cfg, logger, git), after=("purge",))
+        graph.add("commit", lambda: _step_commit(cfg, logger, git), after=(kept, "git-init"))
         if cfg.confirm_remote and cfg.author_gh:
-            divider("4️⃣  / 4️⃣  – Create GitHub repo & push")
-            logger.debug("Starting GitHub repository creation and push")
+            graph.add("push", lambda: _step_push(cfg, logger, git), after=("commit",))
+    graph.add("banner", lambda: _render_banner(cfg))
+    return graph
+
+
+# ------------- batch API -------------------------------------------- #
+@dataclass
+class ProjectResult:
+    """Outcome of one project inside `main_many`."""
+    project_slug: str
+    project_dir: Path
+    ok: bool
+    seconds: float
+    error: Optional[str] = None
+
 
-            git.push_to_github(cfg.project_dir, cfg.author_gh, cfg.project_slug, cfg.description)
-            logger.debug(f"Pushed to GitHub: Author: {cfg.author_gh}, Slug: {cfg.project_slug}, Description: {cfg.description}")
+@dataclass
+class BatchReport:
+    """Aggregated outcome of `main_many`, in input order."""
+    results: List[ProjectResult] = field(default_factory=list)
+    seconds: float = 0.0
+    pushes: Optional[PushReport] = None   # with ``main_many(push_target=…)``
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results) and (self.pushes is None or self.pushes.ok)
+
+    @property
+    def failed(self) -> List[ProjectResult]:
+        return [r for r in self.results if not r.ok]
+
+    def render(self) -> str:
+        lines = [
+            f"{'✅' if r.ok else '❌'} {r.project_slug:<32} {r.seconds:7.2f}s"
+            + (f"  {r.error}" if r.error else "")
+            for r in self.results
+        ]
+        lines.append(
+            f"{len(self.results) - len(self.failed)}/{len(self.results)} project(s) succeeded "
+            f"in {self.seconds:.2f}s"
+        )
+        if self.pushes is not None:
+            lines.append("")
+            lines.append(self.pushes.render())
+        return "\n".join(lines)
+
+
+# Per-process components shared by every project of a variant. FileOps,
+# CommandRunner and GitOps are stateless; ResourcePurger is built per project.
+_SHARED: Dict[Tuple[str, bool], Tuple[Logger, CommandRunner, FileOps, GitOps]] = {}
+
+
+def _shared_components(variant: str, verbose: bool) -> Tuple[Logger, CommandRunner, FileOps, GitOps]:
+    key = (variant, verbose)
+    if key not in _SHARED:
+        logger = Logger(variant).start_logger(verbose)
+        cmd = CommandRunner(logger, exit_on_error=False)
+        _SHARED[key] = (logger, cmd, FileOps(logger), GitOps(cmd, logger))
+    return _SHARED[key]
+
+
+def _warm_manifests(keys: Iterable[Tuple[str, Tuple[str, ...]]]) -> None:
+    for variant, services in keys:
+        try:
+            compile_manifest(variant, services)
+        except Exception:
+            pass  # reported by the project that needs it
+
+
+def _run_project(cfg: PostGenConfig, push: bool = True) -> ProjectResult:
+    started = time.perf_counter()
+    logger, _cmd, fops, git = _shared_components(cfg.variant, cfg.verbose)
+    try:
+        _run_pipeline(cfg, logger, ResourcePurger(fops, logger), git, announce=False, push=push)
+    except (Exception, SystemExit) as e:
+        logger.error(f"[{cfg.project_slug}] post-generation failed: {e}")
+        return ProjectResult(cfg.project_slug, cfg.project_dir, False, time.perf_counter() - started, str(e))
+    return ProjectResult(cfg.project_slug, cfg.project_dir, True, time.perf_counter() - started)
+
+
+def main_many(
+    configs: Iterable[PostGenConfig],
+    *,
+    max_workers: int = 4,
+    use_processes: bool = False,
+    push_target: Optional[PushTarget] = None,
+    push_workers: int = 8,
+    push_retries: int = 3,
+) -> BatchReport:
+    """
+    Run the post-generation pipeline for many projects in one process.
+
+    Manifests are compiled once per (variant, services) and loggers / command
+    runners are shared per variant. Up to *max_workers* projects are purged and
+    committed concurrently (threads by default; ``use_processes`` for a process
+    pool). Failures never ``sys.exit``: they are collected into the returned
+    `BatchReport`, which is also printed.
+
+    With a *push_target*, the per-project push step is skipped; once every
+    project is committed, those with ``use_git`` and ``confirm_remote`` are
+    pushed to it by a `ParallelPusher` (*push_workers* at a time, transient
+    failures retried *push_retries* times) and its report is attached.
+    Projects without ``author_gh`` are skipped when the target needs one.
+    """
+    configs = list(configs)
+    started = time.perf_counter()
+    manifest_keys = sorted({(c.variant, tuple(c.services or ())) for c in configs})
+
+    executor: Executor
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers, initializer=_warm_manifests, initargs=(manifest_keys,))
+    else:
+        _warm_manifests(manifest_keys)
+        executor = ThreadPoolExecutor(max_workers, thread_name_prefix="post-gen")
+
+    report = BatchReport()
+    with executor:
+        futures = [executor.submit(_run_project, cfg, push_target is None) for cfg in configs]
+        for cfg, fut in zip(configs, futures):
+            try:
+                report.results.append(fut.result())
+            except Exception as e:  # worker process died, pickling failed, …
+                report.results.append(ProjectResult(cfg.project_slug, cfg.project_dir, False, 0.0, str(e)))
+
+    if push_target is not None:
+        logger = Logger("push").start_logger(any(c.verbose for c in configs))
+        jobs = []
+        for cfg, result in zip(configs, report.results):
+            if not (result.ok and cfg.use_git and cfg.confirm_remote):
+                continue
+            if push_target.needs_author and not cfg.author_gh:
+                # Same rule as the per-project push step: no author, no remote.
+                logger.info(f"[{cfg.project_slug}] Skipping push: no author configured")
+                continue
+            jobs.append(PushJob(cfg.project_dir, cfg.project_slug, cfg.author_gh or "", cfg.description))
+        if jobs:
+            pusher = ParallelPusher(push_target, CommandRunner(logger, exit_on_error=False), logger,
+                                    max_workers=push_workers, retries=push_retries)
+            report.pushes = pusher.push_all(jobs)
+    report.seconds = time.perf_counter() - started
+
+    divider("📦 Batch post-generation report")
+    print(report.render())
+    return report
+
+
+def _run_pipeline(cfg: PostGenConfig, logger: Logger, purge: ResourcePurger, git: GitOps,
+                  *, announce: bool = True, push: bool = True) -> None:
+    """Purge → [store] → git init → commit → push (unless *push* is False) for one project, sequentially."""
+    _step_purge(cfg, logger, purge, announce)
+    if cfg.content_store:
+        _step_store(cfg, logger)
+
+    if cfg.use_git:
+        _step_git_init(cfg, logger, git, announce)
+        _step_commit(cfg, logger, git, announce)
+
+        if not push:
+            logger.debug(f"[{cfg.project_slug}] Push deferred to the batch pusher")
+        elif cfg.confirm_remote and cfg.author_gh:
+            _step_push(cfg, logger, git, announce)
         else:
             logger.info("Skipping create remote (step 4)...")
             logger.debug(f"Configuration for confirm_remote: {cfg.confirm_remote}")
@@ -65,26 +250,72 @@ def main(cfg: PostGenConfig) -> None:
         logger.info("Skipping git repo creation (steps 2-4)...")
         logger.debug(f"Configuration for use_git: {cfg.use_git}")
 
-    divider("🎉 Project generation complete 🎉")
-    logger.debug("Project generation completed")
 
-    if cfg.variant == "GoUltraFast":
-        logger.debug(f"Detected variant: {cfg.variant}, beginning Go-specific steps")
-        go_emoji_logo = [emoji["go"]]
-        go_performance_mode = [
-            goLang, divider_xl, performance_mode, divider_l, tools, divider_s,
-            gRPC, divider_mono, protoC, divider_mono, autoMaxProcs, divider_mono,
-            ants, divider_mono, zeroLog,
-        ]
-        go_fast = [
-            goFast, gRpc_ProtoBuf, server,
-            by, wjb_dev
-        ]
-        Create.emoji(go_emoji_logo)
-        logger.debug("Generated Go emoji logo")
+# ------------- pipeline steps ----------------------------------------- #
+def _section(cfg: PostGenConfig, logger: Logger, title: str, announce: bool) -> None:
+    if announce:
+        divider(title)
+    else:
+        logger.debug(f"[{cfg.project_slug}] {title}")
+
+
+def _step_purge(cfg: PostGenConfig, logger: Logger, purge: ResourcePurger, announce: bool = True) -> None:
+    _section(cfg, logger, "1️⃣  / 4️⃣  – Purge template junk", announce)
+    logger.debug("Starting template junk purge")
+
+    purge.purge(cfg.variant, cfg.project_dir, cfg.services, show_tree=announce, detail_log=cfg.log_detail)
+    logger.debug(f"Purge completed for variant: {cfg.variant} in directory: {cfg.project_dir}")
+
+
+def _step_store(cfg: PostGenConfig, logger: Logger) -> None:
+    """Share the kept files' storage with earlier renders; never fails the pipeline."""
+    logger.debug("Deduplicating kept files against the content store")
+    try:
+        ContentStore(logger=logger).ingest(cfg.project_dir, f"{cfg.variant}-{cfg.project_slug}", dedupe=True)
+    except OSError as e:
+        logger.warn(f"⚠️ Content store skipped: {e}")
+
+
+def _step_git_init(cfg: PostGenConfig, logger: Logger, git: GitOps, announce: bool = True) -> None:
+    _section(cfg, logger, "2️⃣  / 4️⃣  – Initialise Git repo", announce)
+    logger.debug("Starting Git repository initialization")
+
+    git.init_repo(cfg.project_dir)
+    logger.debug(f"Git repository initialized in directory: {cfg.project_dir}")
+
+
+def _step_commit(cfg: PostGenConfig, logger: Logger, git: GitOps, announce: bool = True) -> None:
+    _section(cfg, logger, "3️⃣  / 4️⃣  – Commit scaffold", announce)
+    logger.debug("Starting staging and initial commit")
+
+    git.stage_commit(cfg.project_dir)
+    logger.debug(f"Initial commit completed in directory: {cfg.project_dir}")
+
+
+def _step_push(cfg: PostGenConfig, logger: Logger, git: GitOps, announce: bool = True) -> None:
+    _section(cfg, logger, "4️⃣  / 4️⃣  – Create GitHub repo & push", announce)
+    logger.debug("Starting GitHub repository creation and push")
+
+    git.push_to_github(cfg.project_dir, cfg.author_gh, cfg.project_slug, cfg.description)
+    logger.debug(f"Pushed to GitHub: Author: {cfg.author_gh}, Slug: {cfg.project_slug}, Description: {cfg.description}")
 
-        Create.ascii(go_performance_mode)
-        logger.debug("Generated Go performance mode ASCII art")
 
-        Create.logo(go_fast)
-        logger.debug("Generated Go fast ASCII logo")
+def _render_banner(cfg: PostGenConfig) -> Optional[str]:
+    """Frame the variant's closing banner (no I/O, safe to run concurrently)."""
+    if cfg.variant != "GoUltraFast":
+        return None
+    go_emoji_logo = [emoji["go"]]
+    go_performance_mode = [
+        goLang, divider_xl, performance_mode, divider_l, tools, divider_s,
+        gRPC, divider_mono, protoC, divider_mono, autoMaxProcs, divider_mono,
+        ants, divider_mono, zeroLog,
+    ]
+    go_fast = [
+        goFast, gRpc_ProtoBuf, server,
+        by, wjb_dev
+    ]
+    return "\n".join([
+        Create.render("emoji", go_emoji_logo),
+        Create.render("ascii", go_performance_mode),
+        Create.render("logo", go_fast),
+    ])
@@ -1,14 +1,35 @@
 import subprocess, sys
 from pathlib import Path
 from typing import List, Optional
+from haraka.post_gen.service.probe import PROBES, ProbeCache
 from haraka.utils import Logger
 
+
+class CommandError(RuntimeError):
+    """A checked command failed while the runner was not allowed to exit."""
+
+    def __init__(self, cmd: List[str], returncode: int, stdout: str = "", stderr: str = "") -> None:
+        super().__init__(f"Command failed with exit code {returncode}: {' '.join(cmd)}")
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
 class CommandRunner:
     
-    """Thin wrapper around subprocess.run with logging & graceful error-handling."""
+    """Thin wrapper around subprocess.run with logging & graceful error-handling.
+
+    With ``exit_on_error=False`` a failing checked command raises `CommandError`
+    instead of calling ``sys.exit`` – used when many projects share a process.
+    Executables are resolved through *probes* (the process-wide `PROBES` by
+    default) and spawned by absolute path.
+    """
 
-    def __init__(self, logger: Logger) -> None:
+    def __init__(self, logger: Logger, exit_on_error: bool = True, probes: Optional[ProbeCache] = None) -> None:
         self._log = logger
+        self.exit_on_error = exit_on_error
+        self.probes = probes or PROBES
         self._log.debug("CommandRunner initialized with logger")
 
     def run(
@@ -22,9 +43,10 @@ class CommandRunner:
         self._log.debug(f"Command to be run: {cmd_str}")
         self._log.info(f"Running: {cmd_str}")
         try:
-            self._log.debug(f"Executing command with subprocess: {cmd_str}, cwd={cwd}, check={check}")
+            exe = self.probes.which(cmd[0]) or cmd[0]
+            self._log.debug(f"Executing command with subprocess: {cmd_str}, cwd={cwd}, check={check}, exe={exe}")
             result = subprocess.run(
-                cmd,
+                [exe, *cmd[1:]],
                 cwd=str(cwd) if cwd else None,
                 check=check,
                 stdout=subprocess.PIPE,
@@ -49,11 +71,16 @@ class CommandRunner:
             if e.stderr:
                 self._log.error(f"stderr:\n{e.stderr.strip()}", file=sys.stderr)
             if check:
-                sys.exit(e.returncode)
+                if self.exit_on_error:
+                    sys.exit(e.returncode)
+                raise CommandError(cmd, e.returncode, e.stdout or "", e.stderr or "") from e
             return None
         except FileNotFoundError:
+            self.probes.forget_tool(cmd[0])   # uninstalled since it was resolved
             self._log.error(f"Command not found: {cmd[0]}", file=sys.stderr)
             self._log.debug(f"Ensure that the command '{cmd[0]}' is installed and available in PATH")
             if check:
-                sys.exit(1)
+                if self.exit_on_error:
+                    sys.exit(1)
+                raise CommandError(cmd, 127, stderr=f"{cmd[0]}: command not found")
             return None
@@ -0,0 +1,220 @@
+"""
+haraka.post_gen.service.fileOps.archive
+
+Apply a variant's purge manifest to a template **archive** (tar / zip) or a
+plain file list *before* anything is written, extracting only the entries a
+`ResourcePurger` run on the fully rendered tree would have kept.
+
+Survival rules (identical to `ResourcePurger.classify_paths` + deletion):
+
+* a file survives iff it matches a keep pattern;
+* a directory survives if it matches, is an ancestor of a matched path, or is
+  listed in ``protected:`` and none of its ancestors is deleted.
+
+Files are decided while streaming, so archive members are read one at a time
+and copied in chunks; only directory names are held in memory.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Iterable, List, Optional, Set, Tuple
+
+from haraka.post_gen.config import CompiledManifest, compile_manifest
+from haraka.utils import Logger
+
+_CHUNK = 1024 * 1024
+
+
+@dataclass
+class ExtractPlan:
+    """What survived (and what was never written) for one archive or file list."""
+    kept_files: List[str] = field(default_factory=list)
+    kept_dirs: List[str] = field(default_factory=list)
+    skipped_files: int = 0
+    skipped_dirs: int = 0
+    bytes_written: int = 0
+
+
+class ArchiveExtractor:
+    """Extract-only-kept counterpart of `ResourcePurger` for tar/zip templates."""
+
+    def __init__(
+        self,
+        manifest: CompiledManifest,
+        logger: Logger | None = None,
+        strip_components: int = 0,
+    ) -> None:
+        self.manifest = manifest
+        self.strip_components = strip_components
+        self._log = logger or Logger("ArchiveExtractor")
+        self._protected = frozenset(manifest.protected)
+
+    @classmethod
+    def for_variant(
+        cls,
+        variant: str,
+        enabled_services: Iterable[str] = (),
+        logger: Logger | None = None,
+        strip_components: int = 0,
+    ) -> "ArchiveExtractor":
+        return cls(compile_manifest(variant, enabled_services), logger, strip_components)
+
+    # ------------- public API ----------------------------------------- #
+    def plan(self, entries: Iterable[Tuple[str, bool]]) -> ExtractPlan:
+        """
+        Classify ``(relative_path, is_dir)`` pairs without touching the disk –
+        e.g. the file list a renderer is about to write.
+        """
+        plan = ExtractPlan()
+        dirs: Set[str] = set()
+        matched_dirs: Set[str] = set()
+        for name, is_dir in entries:
+            rel = self._normalise(name)
+            if rel is None:
+                continue
+            dirs.update(_ancestors(rel))
+            if is_dir:
+                dirs.add(rel)
+                if self.manifest.spec.match_file(rel):
+                    matched_dirs.add(rel)
+            elif self.manifest.spec.match_file(rel):
+                plan.kept_files.append(rel)
+            else:
+                plan.skipped_files += 1
+        self._finish_dirs(plan, dirs, matched_dirs)
+        plan.kept_files.sort()
+        return plan
+
+    def extract(self, archive: Path, dest: Path) -> ExtractPlan:
+        """Stream *archive* into *dest*, writing only the surviving entries."""
+        dest.mkdir(parents=True, exist_ok=True)
+        self._log.info(f"Extracting kept entries of {archive.name} for variant: {self.manifest.variant}")
+        if zipfile.is_zipfile(archive):
+            plan = self._extract_zip(archive, dest)
+        else:
+            plan = self._extract_tar(archive, dest)
+        self._log.info(
+            f"✅ Extracted {len(plan.kept_files)} file(s), {len(plan.kept_dirs)} dir(s) "
+            f"({plan.bytes_written} bytes); skipped {plan.skipped_files} file(s), "
+            f"{plan.skipped_dirs} dir(s)"
+        )
+        return plan
+
+    # ------------- archive formats ------------------------------------ #
+    def _extract_tar(self, archive: Path, dest: Path) -> ExtractPlan:
+        plan = ExtractPlan()
+        dirs: Set[str] = set()
+        matched_dirs: Set[str] = set()
+        filter_kw = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+        # "r|*" reads the archive strictly sequentially (no seeking, any compression).
+        with tarfile.open(archive, mode="r|*") as tar:
+            for member in tar:
+                rel = self._normalise(member.name)
+                if rel is None:
+                    continue
+                dirs.update(_ancestors(rel))
+                if member.isdir():
+                    dirs.add(rel)
+                    if self.manifest.spec.match_file(rel):
+                        matched_dirs.add(rel)
+                    continue
+                if not self.manifest.spec.match_file(rel):
+                    plan.skipped_files += 1
+                    continue
+                target = dest / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if member.isfile():
+                    src = tar.extractfile(member)
+                    with src, open(target, "wb") as out:
+                        shutil.copyfileobj(src, out, _CHUNK)
+                    os.chmod(target, member.mode & 0o777)
+                    plan.bytes_written += member.size
+                elif member.issym() or member.islnk():
+                    member.name = rel
+                    if member.islnk():
+                        member.linkname = self._normalise(member.linkname) or member.linkname
+                    tar.extract(member, dest, **filter_kw)
+                else:
+                    self._log.warn(f"⚠️ Skipping special archive member: {rel}")
+                    continue
+                plan.kept_files.append(rel)
+        self._finish_dirs(plan, dirs, matched_dirs, dest)
+        return plan
+
+    def _extract_zip(self, archive: Path, dest: Path) -> ExtractPlan:
+        plan = ExtractPlan()
+        dirs: Set[str] = set()
+        matched_dirs: Set[str] = set()
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                rel = self._normalise(info.filename)
+                if rel is None:
+                    continue
+                dirs.update(_ancestors(rel))
+                if info.is_dir():
+                    dirs.add(rel)
+                    if self.manifest.spec.match_file(rel):
+                        matched_dirs.add(rel)
+                    continue
+                if not self.manifest.spec.match_file(rel):
+                    plan.skipped_files += 1
+                    continue
+                target = dest / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(info) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, _CHUNK)
+                mode = (info.external_attr >> 16) & 0o777
+                if mode:
+                    os.chmod(target, mode)
+                plan.bytes_written += info.file_size
+                plan.kept_files.append(rel)
+        self._finish_dirs(plan, dirs, matched_dirs, dest)
+        return plan
+
+    # ------------- internals ------------------------------------------ #
+    def _normalise(self, name: str) -> Optional[str]:
+        parts = [p for p in PurePosixPath(name.replace("\\", "/")).parts if p not in ("", ".", "/")]
+        parts = parts[self.strip_components:]
+        if not parts:
+            return None
+        if ".." in parts:
+            self._log.warn(f"⚠️ Refusing archive entry outside the project: {name}")
+            return None
+        return "/".join(parts)
+
+    def _finish_dirs(
+        self,
+        plan: ExtractPlan,
+        dirs: Set[str],
+        matched_dirs: Set[str],
+        dest: Optional[Path] = None,
+    ) -> None:
+        """Decide directory survival once every entry has been seen."""
+        kept_ancestors: Set[str] = set(matched_dirs)
+        for rel in plan.kept_files:
+            kept_ancestors.update(_ancestors(rel))
+        for rel in matched_dirs:
+            kept_ancestors.update(_ancestors(rel))
+
+        deleted = {d for d in dirs if d not in kept_ancestors and d not in self._protected}
+        for rel in sorted(dirs):
+            survives = rel in kept_ancestors or (
+                rel in self._protected and not any(a in deleted for a in _ancestors(rel))
+            )
+            if survives:
+                plan.kept_dirs.append(rel)
+                if dest is not None:
+                    (dest / rel).mkdir(parents=True, exist_ok=True)
+            else:
+                plan.skipped_dirs += 1
+
+
+def _ancestors(rel: str) -> List[str]:
+    """``a/b/c`` → ``["a", "a/b"]``."""
+    parts = rel.split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts))]
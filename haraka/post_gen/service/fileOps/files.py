@@ -1,7 +1,27 @@
+import os
 import shutil
+import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple, Union
+from haraka.post_gen.service.fileOps.pathtable import DIR, ROOT, PathTable
 from haraka.utils import Logger
 
+if TYPE_CHECKING:
+    from haraka.post_gen.service.fileOps.trash import TrashTransaction
+
+# (display name, is_dir, key used to list its children or None)
+_TreeEntry = Tuple[str, bool, Optional[Union[str, int]]]
+_MORE = "\0more"   # key of the "… N more" placeholder entry
+
+
+@dataclass
+class TreeStats:
+    dirs: int = 0
+    files: int = 0
+    collapsed: int = 0   # entries hidden behind "… N more"
+
+
 class FileOps:
     """Filesystem helpers: remove files/dirs, print tree, nice dividers."""
     def __init__(self, logger: Logger = Logger("⚙️️️️️️️️️️️️Testing⚙️"), test_mode=False) -> None:
@@ -22,7 +42,7 @@ class FileOps:
 
                 path.unlink()
                 self.logger.debug(f"  🗑️  File {self._relpath(path)} successfully unlinked")
-                self.logger.info(f"  🗑️  DELETED FILE: {self._relpath(path)}")
+                self.logger.info(f"  🗑️  DELETED FILE: {self._relpath(path)}", category="deleted")
             elif path.is_dir():
                 self.logger.debug(f"{self._relpath(path)} is a directory, not a file. Proceeding to remove it as a directory")
 
@@ -41,21 +61,160 @@ class FileOps:
             try:
                 shutil.rmtree(path, ignore_errors=True)
                 self.logger.debug(f"  🗑️  Directory {self._relpath(path)} successfully removed")
-                self.logger.info(f"  🗑️  DELETED DIR: {self._relpath(path)}")
+                self.logger.info(f"  🗑️  DELETED DIR: {self._relpath(path)}", category="deleted")
             except Exception as e:
                 self.logger.error(f"Error occurred while attempting to remove directory {self._relpath(path)}: {e}")
                 self.logger.warn(f"Could not remove directory {self._relpath(path)}: {e}")
 
-    def print_tree(self, path: Path, prefix: str = "") -> None:
+    def trash(self, path: Path, tx: "TrashTransaction") -> None:
+        """
+        Transactional counterpart of `remove_file` / `remove_dir`: move *path*
+        into *tx*'s trash. Errors propagate so the caller can roll back.
+        """
+        if not os.path.lexists(path):
+            self.logger.debug(f"{self._relpath(path)} already gone (parent trashed)")
+            return
+        kind = "DIR" if path.is_dir() and not path.is_symlink() else "FILE"
+        tx.stash(path)
+        self.logger.info(f"  🗑️  DELETED {kind}: {self._relpath(path)}", category="deleted")
 
-        if not path.exists():
+    def print_tree(
+        self,
+        path: Path,
+        prefix: str = "",
+        *,
+        max_depth: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        paths: Optional[Iterable[str]] = None,
+        dirs: Iterable[str] = (),
+        table: Optional[PathTable] = None,
+        shown: Optional[Sequence[int]] = None,
+        stream: Optional[TextIO] = None,
+        summary: bool = False,
+    ) -> TreeStats:
+        """
+        Render the tree under *path* (directories first, then files, A→Z).
+
+        Walks iteratively with ``os.scandir`` (no recursion limit, no extra
+        ``stat`` per entry) unless *paths* – POSIX paths relative to *path*, e.g.
+        the purger's kept list – is given, in which case nothing is read from
+        disk; entries listed in *dirs* or having children are shown as dirs.
+        Likewise for a walked *table*, limited to the entries whose *shown*
+        byte is set (every entry without a mask).
+
+        ``max_depth`` limits how many levels are shown, ``max_entries`` how many
+        entries per directory before collapsing the rest into "… N more".
+        Output goes through *stream* (stdout by default) in large writes.
+        """
+        if paths is None and table is None and not path.exists():
             self.logger.debug(f"Path {self._relpath(path)} does not exist")
             self.logger.warn(f"Path does not exist: {path}")
-            return
-        entries = sorted(path.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
-        for i, entry in enumerate(entries):
-            branch = "└── " if i == len(entries) - 1 else "├── "
-            print(prefix + branch + entry.name)
-            if entry.is_dir():
-                ext = "    " if i == len(entries) - 1 else "│   "
-                self.print_tree(entry, prefix + ext)
+            return TreeStats()
+
+        out = stream or sys.stdout
+        if table is not None:
+            list_dir = self._table_lister(table, shown)
+            root_key = ROOT
+        elif paths is not None:
+            list_dir = self._path_list_lister(paths, dirs)
+            root_key = ""
+        else:
+            list_dir = self._scandir_lister
+            root_key = str(path)
+
+        stats = TreeStats()
+        buf: List[str] = []
+        # Each frame: [entries, next index, prefix, depth]
+        stack: list = [[self._limit(list_dir(root_key), max_entries, stats), 0, prefix, 1]]
+        while stack:
+            frame = stack[-1]
+            entries, i, pfx, depth = frame
+            if i >= len(entries):
+                stack.pop()
+                continue
+            frame[1] = i + 1
+            name, is_dir, key = entries[i]
+            last = i == len(entries) - 1
+            buf.append(pfx + ("└── " if last else "├── ") + name + "\n")
+            if key is _MORE:
+                pass
+            elif is_dir:
+                stats.dirs += 1
+                if key is not None and (max_depth is None or depth < max_depth):
+                    children = self._limit(list_dir(key), max_entries, stats)
+                    stack.append([children, 0, pfx + ("    " if last else "│   "), depth + 1])
+            else:
+                stats.files += 1
+            if len(buf) >= 4096:
+                out.write("".join(buf))
+                buf.clear()
+
+        if summary:
+            line = f"{stats.dirs} directories, {stats.files} files"
+            if stats.collapsed:
+                line += f" ({stats.collapsed} more not shown)"
+            buf.append("\n" + line + "\n")
+        out.write("".join(buf))
+        out.flush()
+        return stats
+
+    # ------------- tree internals --------------------------------------- #
+    @staticmethod
+    def _limit(entries: List[_TreeEntry], max_entries: Optional[int], stats: TreeStats) -> List[_TreeEntry]:
+        if max_entries is None or len(entries) <= max_entries:
+            return entries
+        hidden = len(entries) - max_entries
+        stats.collapsed += hidden
+        return entries[:max_entries] + [(f"… {hidden} more", False, _MORE)]
+
+    @staticmethod
+    def _scandir_lister(directory: str) -> List[_TreeEntry]:
+        try:
+            with os.scandir(directory) as it:
+                # DirEntry caches the d_type from readdir: no stat per entry.
+                entries = [
+                    (e.name, e.is_dir(), e.path if e.is_dir() and not e.is_symlink() else None)
+                    for e in it
+                ]
+        except OSError:
+            return []
+        entries.sort(key=lambda t: (not t[1], t[0].lower()))
+        return entries
+
+    @staticmethod
+    def _table_lister(table: PathTable, shown: Optional[Sequence[int]]) -> Callable[[int], List[_TreeEntry]]:
+        children, name, kind = table.children(), table.name, table.kind
+
+        def list_dir(key: int) -> List[_TreeEntry]:
+            entries = [
+                (name(i), bool(kind[i] & DIR), i if kind[i] & DIR else None)
+                for i in children(key) if shown is None or shown[i]
+            ]
+            entries.sort(key=lambda t: (not t[1], t[0].lower()))
+            return entries
+
+        return list_dir
+
+    @staticmethod
+    def _path_list_lister(paths: Iterable[str], dirs: Iterable[str]) -> Callable[[str], List[_TreeEntry]]:
+        children: Dict[str, Dict[str, bool]] = {}
+        dir_set = set(dirs)
+        for rel in [*paths, *dir_set]:
+            parts = rel.strip("/").split("/")
+            parent = ""
+            for depth, name in enumerate(parts):
+                key = f"{parent}/{name}" if parent else name
+                is_dir = depth < len(parts) - 1 or key in dir_set
+                siblings = children.setdefault(parent, {})
+                siblings[name] = siblings.get(name, False) or is_dir
+                parent = key
+
+        def list_dir(key: str) -> List[_TreeEntry]:
+            entries = [
+                (name, is_dir, (f"{key}/{name}" if key else name) if is_dir else None)
+                for name, is_dir in children.get(key, {}).items()
+            ]
+            entries.sort(key=lambda t: (not t[1], t[0].lower()))
+            return entries
+
+        return list_dir
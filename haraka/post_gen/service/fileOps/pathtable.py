@@ -0,0 +1,231 @@
+"""
+haraka.post_gen.service.fileOps.pathtable
+
+Compact, parent-linked table of a walked project tree.
+
+Every entry is three array slots – a name id (``array('I')``), its parent's
+index (``array('I')``) and a kind byte – plus its share of the name table,
+where each distinct component name is stored once as filesystem bytes in a
+single blob. That is ~20 bytes per entry instead of a relative-path string,
+a ``set`` slot and the list slots of every classification bucket (~240
+bytes). Names are decoded and relative paths rebuilt on demand: `rels`
+yields them in table order keeping only the prefixes of directories whose
+children are still to come.
+
+Entries are stored parent-first (the walk is top-down), which the purger's
+ancestor marking and the tree printer rely on.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+FILE, DIR = 0, 1
+IMPLICIT = 0x80          # kind flag: parent added by `from_paths`, not one of the given paths
+ROOT = 0xFFFFFFFF        # parent index of top-level entries
+
+_FS_ENCODING, _FS_ERRORS = sys.getfilesystemencoding(), sys.getfilesystemencodeerrors()
+# Distinct names remembered for de-duplication while building. Repeated names
+# (``__init__.py``, ``main.go``) recur close together, so a bounded index
+# catches nearly all of them without holding every unique name as a `str`.
+_DEDUPE_LIMIT = 1 << 16
+
+
+class PathTable:
+    """Walked tree as parallel arrays: ``name_id``, ``parent`` and ``kind``, one slot per entry."""
+
+    __slots__ = ("root", "name_id", "parent", "kind", "grouped", "_blob", "_offsets", "_ids")
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root
+        self.grouped = False                   # each directory's children are contiguous
+        self.name_id = array("I")
+        self.parent = array("I")
+        self.kind = bytearray()
+        self._blob = bytearray()               # name bytes, back to back
+        self._offsets = array("I", [0])        # name id -> start in _blob (end: id + 1)
+        self._ids: Optional[Dict[str, int]] = {}   # name -> id while the table is built
+
+    # ------------- construction --------------------------------------- #
+    @classmethod
+    def walk(cls, root: Path, exclude: Tuple[str, ...] = ()) -> "PathTable":
+        """
+        Walk *root* top-down in ``os.walk`` order (each directory's sub-directories,
+        then its files). Symlinks to directories count as directories but are not
+        followed; unreadable directories are skipped. *exclude* names are
+        dropped at the top level only.
+        """
+        table = cls(os.fspath(root))
+        add = table.add
+        stack: List[Tuple[str, int]] = [(table.root, ROOT)]
+        while stack:
+            dirpath, index = stack.pop()
+            try:
+                with os.scandir(dirpath) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            dirs: List[Tuple[str, bool]] = []
+            files: List[str] = []
+            for entry in entries:
+                if index == ROOT and entry.name in exclude:
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append((entry.name, not entry.is_symlink()))
+                else:
+                    files.append(entry.name)
+            descend: List[Tuple[str, int]] = []
+            for name, follow in dirs:
+                child = add(name, index, DIR)
+                if follow:
+                    descend.append((os.path.join(dirpath, name), child))
+            for name in files:
+                add(name, index, FILE)
+            stack.extend(reversed(descend))
+        table.grouped = True
+        table.freeze()
+        return table
+
+    @classmethod
+    def from_paths(cls, rels: Iterable[str], is_dir: Callable[[str], bool]) -> "PathTable":
+        """
+        Table of relative POSIX paths given in any order. Missing parents are
+        added as `IMPLICIT` directories so every entry still has one.
+        """
+        table = cls()
+        index: Dict[str, int] = {}
+
+        def ensure(rel: str) -> int:
+            found = index.get(rel)
+            if found is not None:
+                return found
+            cut = rel.rfind("/")
+            parent = ensure(rel[:cut]) if cut > 0 else ROOT
+            index[rel] = i = table.add(rel[cut + 1:], parent, DIR | IMPLICIT)
+            return i
+
+        for rel in rels:
+            found = index.get(rel)
+            kind = DIR if is_dir(rel) else FILE
+            if found is not None:
+                table.kind[found] = kind            # listed after one of its children
+                continue
+            cut = rel.rfind("/")
+            parent = ensure(rel[:cut]) if cut > 0 else ROOT
+            index[rel] = table.add(rel[cut + 1:], parent, kind)
+        table.freeze()
+        return table
+
+    def add(self, name: str, parent: int, kind: int) -> int:
+        ids = self._ids
+        nid = ids.get(name)
+        if nid is None:
+            nid = len(self._offsets) - 1
+            self._blob += name.encode(_FS_ENCODING, _FS_ERRORS)
+            self._offsets.append(len(self._blob))
+            if len(ids) >= _DEDUPE_LIMIT:
+                ids.clear()
+            ids[name] = nid
+        self.name_id.append(nid)
+        self.parent.append(parent)
+        self.kind.append(kind)
+        return len(self.kind) - 1
+
+    def freeze(self) -> None:
+        """Drop the build-time name index; the table is read-only afterwards."""
+        self._ids = None
+
+    # ------------- queries -------------------------------------------- #
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def is_dir(self, i: int) -> bool:
+        return bool(self.kind[i] & DIR)
+
+    @property
+    def distinct_names(self) -> int:
+        return len(self._offsets) - 1
+
+    def name(self, i: int) -> str:
+        nid, off = self.name_id[i], self._offsets
+        return self._blob[off[nid]:off[nid + 1]].decode(_FS_ENCODING, _FS_ERRORS)
+
+    def rel(self, i: int) -> str:
+        """Relative POSIX path of entry *i*."""
+        parts = []
+        while i != ROOT:
+            parts.append(self.name(i))
+            i = self.parent[i]
+        return "/".join(reversed(parts))
+
+    def rels(self, indices: Optional[Sequence[int]] = None) -> Iterator[str]:
+        """
+        Relative paths of every entry (or of *indices*) in table order, built
+        from cached directory prefixes. For walked tables a prefix is dropped
+        once its directory's (contiguous) children have been produced.
+        """
+        if indices is not None:
+            rel = self.rel
+            for i in indices:
+                yield rel(i)
+            return
+        blob, off, name_id, parent, kind = self._blob, self._offsets, self.name_id, self.parent, self.kind
+        enc, err = _FS_ENCODING, _FS_ERRORS
+        grouped = self.grouped
+        prefixes: Dict[int, str] = {ROOT: ""}
+        current = ROOT
+        prefix = ""
+        for i in range(len(kind)):
+            p = parent[i]
+            if p != current:
+                if grouped and current != ROOT:
+                    del prefixes[current]
+                current = p
+                prefix = prefixes[p]
+            nid = name_id[i]
+            rel = prefix + blob[off[nid]:off[nid + 1]].decode(enc, err)
+            if kind[i] & DIR:
+                prefixes[i] = rel + "/"
+            yield rel
+
+    def children(self) -> Callable[[int], Sequence[int]]:
+        """
+        ``children(i)`` → indices of *i*'s children (``children(ROOT)``: the
+        top level). Walked tables store each directory's children as one
+        contiguous run, so the index is two ``array('I')`` columns.
+        """
+        parent = self.parent
+        if not self.grouped:
+            by_parent: Dict[int, List[int]] = {}
+            for i, p in enumerate(parent):
+                by_parent.setdefault(p, []).append(i)
+            return lambda i: by_parent.get(i, ())
+
+        n = len(parent)
+        start = array("I", bytes(4 * (n + 1)))     # slot n: ROOT
+        count = array("I", bytes(4 * (n + 1)))
+        last = -1
+        for i, p in enumerate(parent):
+            slot = n if p == ROOT else p
+            if slot != last:
+                start[slot] = i
+                last = slot
+            count[slot] += 1
+
+        def children(i: int) -> range:
+            slot = n if i == ROOT else i
+            return range(start[slot], start[slot] + count[slot])
+
+        return children
+
+    def dir_rels(self) -> Iterator[str]:
+        """Relative paths of the directories."""
+        kind = self.kind
+        return (rel for i, rel in enumerate(self.rels()) if kind[i] & DIR)
@@ -26,26 +26,49 @@ Requires:  pip install pathspec PyYAML
 """
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Tuple, List
+from sys import intern
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple, Union
 
 from pathspec import PathSpec
 
+from haraka.post_gen.service.fileOps.archive import ArchiveExtractor, ExtractPlan
 from haraka.post_gen.service.fileOps.files import FileOps
+from haraka.post_gen.service.fileOps.pathtable import DIR, IMPLICIT, ROOT, PathTable
+from haraka.post_gen.service.fileOps.trash import TrashTransaction
 from haraka.utils import Logger, divider
 from haraka.post_gen.config import config
 
+# Per-entry classification flags (one byte per `PathTable` entry).
+_MATCHED = 1      # matched a keep pattern
+_ANCESTOR = 2     # kept because something below it matched
+_PROTECTED = 4    # protected directory
+_DOOMED = 8       # deleted, or inside a deleted directory
+_KEPT = _MATCHED | _ANCESTOR
+
 
 class ResourcePurger:
     """Filesystem cleaner driven by variant manifest files."""
 
+    # Limits for the "Project tree after purge…" listing.
+    tree_max_depth: Optional[int] = None
+    tree_max_entries: Optional[int] = 50
+    # Top-level entries never walked nor purged (git init may run concurrently).
+    walk_exclude: Tuple[str, ...] = (".git",)
+    # Rename doomed paths into a trash dir and roll back if the purge fails.
+    transactional: bool = True
+
     def __init__(self, fops: FileOps, logger: Logger | None = None) -> None:
         self._f = fops
         self._log = logger or Logger("ResourcePurger")
         self._log.debug("ResourcePurger initialized with FileOps instance and Logger.")
-        self._protected_dirs: List[str] = []
+        self._protected_dirs: FrozenSet[str] = frozenset()
+        self._table: Optional[PathTable] = None
+        self._tx: Optional[TrashTransaction] = None
 
-    def purge(self, variant: str, project_dir: Path, enabled_services: List[str] = []) -> None:
+    def purge(self, variant: str, project_dir: Path, enabled_services: List[str] = [],
+              show_tree: bool = True, detail_log: Optional[Path] = None) -> None:
         """
         Remove everything outside the manifest’s `keep:` patterns.
 
@@ -57,148 +80,306 @@ class ResourcePurger:
             Root of the freshly generated Cookiecutter project.
         enabled_services
             Optional list of enabled services to include in keep patterns.
+        show_tree
+            Print the project tree once the purge is done.
+        detail_log
+            Gzip file receiving every kept / protected / deleted path; the
+            terminal only gets the logger's `OutputPolicy` summary.
         """
         variant = variant.lower()
         self._log.info(f"Starting purge for variant: {variant}")
-        manifest = config.load_manifest(variant)  # assumes full manifest dict
+        manifest = config.compile_manifest(variant, enabled_services or ())  # cached per variant/services
 
-        raw_keep = manifest.get("keep", []) or []
-        raw_protected = manifest.get("protected", []) or []
-        service_patterns = manifest.get("services", {}) or {}
+        self._protected_dirs = frozenset(intern(p) for p in manifest.protected)
+        for service in manifest.services:
+            self._log.debug(f"✅ Including service paths for: {service}")
+        for service in manifest.missing_services:
+            self._log.warn(f"⚠️ No manifest section for enabled service: {service}")
 
-        keep_patterns = [p.rstrip("/") for p in raw_keep]
-        self._protected_dirs = [p.rstrip("/") for p in raw_protected]
-
-        for service in enabled_services:
-            if service in service_patterns:
-                self._log.debug(f"✅ Including service paths for: {service}")
-                keep_patterns.extend(p.rstrip("/") for p in service_patterns[service])
-            else:
-                self._log.warn(f"⚠️ No manifest section for enabled service: {service}")
-
-        spec = config.build_spec(keep_patterns)
-        self._log.debug(f"Built PathSpec for keep patterns. Total: {len(keep_patterns)}")
-        for pattern in keep_patterns:
+        spec = manifest.spec
+        self._log.debug(f"Built PathSpec for keep patterns. Total: {len(manifest.keep_patterns)}")
+        for pattern in manifest.keep_patterns:
             self._log.debug(f"Keep pattern: {pattern}")
 
-        all_paths = self._walk_tree(project_dir)
-
-        matched, non_matched_dirs, non_matched_files, directories_skipped = \
-            self.classify_paths(all_paths, project_dir, spec)
-
-        self._purge_unrelated(
-            project_dir,
-            matched,
-            non_matched_dirs,
-            non_matched_files,
-            directories_skipped
-        )
+        table = self._walk_tree(project_dir)
+        flags = self._classify(table, spec)
+
+        self._tx = TrashTransaction(project_dir, self._log) if self.transactional else None
+        try:
+            with self._log.output_scope(detail_log):
+                self._purge_unrelated(project_dir, table, flags)
+        except BaseException as e:
+            if self._tx is not None:
+                self._log.error(f"Purge failed, restoring {self._tx.stashed} removed path(s): {e}")
+                self._tx.rollback()
+            raise
+        else:
+            if self._tx is not None:
+                self._tx.commit()
+        finally:
+            self._tx = None
 
         self._log.debug(f"Finished purging unrelated paths in project directory: {project_dir}")
-        divider("Project tree after purge…")
-        self._f.print_tree(project_dir)
-
-    def _walk_tree(self, root: Path) -> List[Path]:
-        paths = list(root.rglob("*"))
-        self._log.debug(f"📋 All paths under {root} (total {len(paths)}):")
-        for p in paths:
-            self._log.debug(f"   {p.relative_to(root)}")
-        return paths
+        if show_tree:
+            divider("Project tree after purge…")
+            # Render from the classification instead of walking the tree again.
+            self._f.print_tree(
+                project_dir,
+                table=table,
+                shown=self._tree_mask(table, flags),
+                max_depth=self.tree_max_depth,
+                max_entries=self.tree_max_entries,
+                summary=True,
+            )
+
+    def extract_kept(
+        self,
+        variant: str,
+        archive: Path,
+        project_dir: Path,
+        enabled_services: List[str] = [],
+        strip_components: int = 0,
+        show_tree: bool = True,
+    ) -> ExtractPlan:
+        """
+        Extract-only-kept mode: apply the manifest to a tar/zip template
+        *archive* and write only what `purge` would have left in *project_dir*.
+        """
+        extractor = ArchiveExtractor.for_variant(
+            variant, enabled_services or (), self._log, strip_components
+        )
+        plan = extractor.extract(archive, project_dir)
+        if show_tree:
+            divider("Project tree after extraction…")
+            self._f.print_tree(project_dir)
+        return plan
+
+    def _walk_tree(self, root: Path) -> PathTable:
+        """Compact table of everything under *root* (see `PathTable`), kept as `_table`."""
+        table = PathTable.walk(root, self.walk_exclude)
+        self._table = table
+        if self._log.verbose:
+            self._log.debug(f"📋 All paths under {root} (total {len(table)}):")
+            for rel in table.rels():
+                self._log.debug(f"   {rel}")
+        return table
 
     def classify_paths(
         self,
-        paths: List[Path],
+        paths: Union[PathTable, Sequence[Union[str, Path]]],
         root: Path,
         spec: PathSpec,
     ) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """
+        Split *paths* into (matched, non-matched dirs, non-matched files,
+        skipped protected dirs), all as relative POSIX strings.
+
+        *paths* is the `PathTable` `_walk_tree` returns, or `Path` objects /
+        absolute strings under *root* / relative POSIX strings, which are put
+        into a table first. `purge` itself works on the flags of `_classify`
+        and only builds the strings it prints.
+        """
+        if isinstance(paths, PathTable):
+            table = paths
+        else:
+            table = PathTable.from_paths(self._relative_paths(paths, root), self._dir_test(root))
+        flags = self._classify(table, spec)
+
         matched: List[str] = []
         non_matched_files: List[str] = []
         non_matched_dirs: List[str] = []
         directories_skipped: List[str] = []
-
-        matched_set = set()
-
-        # First pass: collect all explicitly matched paths
-        for path in paths:
-            rel = path.relative_to(root).as_posix()
-            if spec.match_file(rel):
-                self._log.debug(f"✅ KEEP      {rel}")
+        kind = table.kind
+        for i, rel in enumerate(table.rels()):
+            f = flags[i]
+            if kind[i] & IMPLICIT:
+                continue
+            if f & _MATCHED:
                 matched.append(rel)
-                matched_set.add(rel)
-
-                # Also mark parent directories
-                parent = Path(rel)
-                while parent != Path("."):
-                    parent = parent.parent
-                    matched_set.add(parent.as_posix())
-
-        # Second pass: classify remaining paths
-        for path in paths:
-            rel = path.relative_to(root).as_posix()
-
-            if rel in matched_set:
+            elif f & _KEPT:
                 continue
-
-            if path.is_dir():
-                if rel in self._protected_dirs:
-                    self._log.debug(f"⏭️  SKIPPING DELETE: Protected directory: {rel}")
-                    directories_skipped.append(rel)
-                elif rel in matched_set:
-                    self._log.debug(f"✅ KEEP IMPLIED DIR: {rel}")
-                    matched.append(rel)
-                else:
-                    self._log.debug(f"❌ DELETE DIR: {rel}")
-                    non_matched_dirs.append(rel)
+            elif f & _PROTECTED:
+                directories_skipped.append(rel)
+            elif kind[i] & DIR:
+                non_matched_dirs.append(rel)
             else:
-                self._log.debug(f"❌ DELETE FILE: {rel}")
                 non_matched_files.append(rel)
+        matched.sort()
+        return matched, non_matched_dirs, non_matched_files, directories_skipped
 
-        return sorted(set(matched)), non_matched_dirs, non_matched_files, directories_skipped
+    def _classify(self, table: PathTable, spec: PathSpec) -> bytearray:
+        """
+        One flag byte per *table* entry: `_MATCHED`, `_ANCESTOR` (something
+        below matched) or, for unkept directories listed as protected,
+        `_PROTECTED`. Entries are parent-first, so a match only has to climb
+        until it meets an ancestor that is already marked: O(entries) overall.
+        """
+        match = _fast_matcher(spec)
+        verbose = self._log.verbose
+        protected = self._protected_dirs
+        parent, kind = table.parent, table.kind
+        flags = bytearray(len(table))
+
+        for i, rel in enumerate(table.rels()):
+            if kind[i] & IMPLICIT:
+                continue
+            if match(rel):
+                if verbose:
+                    self._log.debug(f"✅ KEEP      {rel}")
+                flags[i] = _MATCHED
+                p = parent[i]
+                while p != ROOT and not flags[p] & _KEPT:
+                    flags[p] |= _ANCESTOR
+                    p = parent[p]
+            elif kind[i] & DIR and rel in protected:
+                flags[i] = _PROTECTED
+
+        if verbose:
+            for i, rel in enumerate(table.rels()):
+                if flags[i] & _KEPT or kind[i] & IMPLICIT:
+                    continue
+                if flags[i] & _PROTECTED:
+                    self._log.debug(f"⏭️  SKIPPING DELETE: Protected directory: {rel}")
+                elif kind[i] & DIR:
+                    self._log.debug(f"❌ DELETE DIR: {rel}")
+                else:
+                    self._log.debug(f"❌ DELETE FILE: {rel}")
+        return flags
 
-    def _print_section(self, title: str, items: List[str]) -> None:
-        self._log.info(f"{title} — {len(items)}")
-        if items:
-            for p in sorted(items):
-                self._log.info(f"  • {p}")
-        else:
-            self._log.info("  (none)")
+    @staticmethod
+    def _deletion_plan(table: PathTable, flags: bytearray) -> Tuple[List[int], List[int]]:
+        """
+        Top-most doomed (directory, file) entries. Anything inside a doomed
+        directory goes with it, so only these are renamed / removed.
+        """
+        dirs: List[int] = []
+        files: List[int] = []
+        parent, kind = table.parent, table.kind
+        for i in range(len(flags)):
+            f = flags[i]
+            if f & _KEPT:
+                continue
+            p = parent[i]
+            if p != ROOT and flags[p] & _DOOMED:
+                flags[i] = f | _DOOMED
+            elif f & _PROTECTED:
+                continue
+            else:
+                flags[i] = f | _DOOMED
+                (dirs if kind[i] & DIR else files).append(i)
+        return dirs, files
+
+    @staticmethod
+    def _tree_mask(table: PathTable, flags: bytearray) -> bytearray:
+        """Entries shown after the purge: everything kept plus protected dirs and their parents."""
+        shown = bytearray(len(flags))
+        parent = table.parent
+        for i in range(len(flags)):
+            f = flags[i]
+            if f & _KEPT:
+                shown[i] = 1
+            elif f & _PROTECTED:
+                p = i
+                while p != ROOT and not shown[p]:
+                    shown[p] = 1
+                    p = parent[p]
+        return shown
+
+    @staticmethod
+    def _section(table: PathTable, flags: bytearray, test: Callable[[int, int], bool]) -> List[str]:
+        kind = table.kind
+        return [rel for i, rel in enumerate(table.rels()) if test(flags[i], kind[i])]
+
+    @staticmethod
+    def _relative_paths(paths: Sequence[Union[str, Path]], root: Path) -> List[str]:
+        root_s = os.fspath(root).rstrip(os.sep)
+        prefix = root_s + os.sep
+        cut = len(prefix)
+        rels: List[str] = []
+        for path in paths:
+            s = os.fspath(path)
+            if s.startswith(prefix):
+                s = s[cut:]
+            elif isinstance(path, Path) or os.path.isabs(s):
+                s = os.path.relpath(s, root_s)
+            if os.sep != "/":
+                s = s.replace(os.sep, "/")
+            rels.append(intern(s))
+        return rels
+
+    def _dir_test(self, root: Path) -> Callable[[str], bool]:
+        """Directory check for relative paths: the last walk's table, else the filesystem."""
+        root_s = os.fspath(root)
+        table = getattr(self, "_table", None)
+        if table is not None and table.root == root_s:
+            return frozenset(table.dir_rels()).__contains__
+        return lambda rel: os.path.isdir(os.path.join(root_s, rel))
+
+    def _print_section(self, title: str, items: List[str], noun: str = "entries") -> None:
+        items.sort()
+        self._log.listing(title, items, noun)
         self._log.info("-" * 70)
 
     def _dir_batch_delete(self, items: List[str], root: Path) -> None:
         for p in sorted(items):
             if p in self._protected_dirs:
                 self._log.debug(f"  🛡️  PROTECTED DIRECTORY: {p}")
+            elif self._tx is not None:
+                self._f.trash(root / p, self._tx)
             else:
-                full_path = root / Path(p)
-                self._f.remove_dir(full_path)
+                self._f.remove_dir(root / p)
 
     def _file_batch_delete(self, items: List[str], root: Path) -> None:
         for p in sorted(items):
-            full_path = root / Path(p)
-            self._f.remove_file(full_path)
+            if self._tx is not None:
+                self._f.trash(root / p, self._tx)
+            else:
+                self._f.remove_file(root / p)
 
-    def _purge_unrelated(
-        self,
-        root: Path,
-        matched: List[str],
-        non_matched_dirs: List[str],
-        non_matched_files: List[str],
-        directories_skipped: List[str],
-    ) -> None:
+    def _purge_unrelated(self, root: Path, table: PathTable, flags: bytearray) -> None:
+        # Each listing is built right before it is printed and dropped after.
+        section = self._section
         self._log.info("\n" + "=" * 70)
-        self._print_section("✅ MATCHED (keep)", matched)
+        self._print_section("✅ MATCHED (keep)", section(table, flags, lambda f, k: f & _MATCHED), "entries kept")
         self._log.info("=" * 70)
 
         self._log.info("\n" + "=" * 70)
-        self._print_section("⏭️  SKIPPED PROTECTED DIRECTORIES", directories_skipped)
+        self._print_section(
+            "⏭️  SKIPPED PROTECTED DIRECTORIES",
+            section(table, flags, lambda f, k: f & (_KEPT | _PROTECTED) == _PROTECTED),
+            "protected dirs",
+        )
         self._log.info("=" * 70)
 
+        doomed_dirs, doomed_files = self._deletion_plan(table, flags)
+
         self._log.info("\n" + "=" * 70)
-        self._print_section("🗂️  NON-MATCHED DIRECTORIES (delete)", non_matched_dirs)
-        self._dir_batch_delete(non_matched_dirs, root)
+        self._print_section(
+            "🗂️  NON-MATCHED DIRECTORIES (delete)",
+            section(table, flags, lambda f, k: not f & (_KEPT | _PROTECTED) and k & DIR),
+            "dirs deleted",
+        )
+        self._dir_batch_delete(list(table.rels(doomed_dirs)), root)
         self._log.info("=" * 70)
 
         self._log.info("\n" + "=" * 70)
-        self._print_section("📄 NON-MATCHED FILES (delete)", non_matched_files)
-        self._file_batch_delete(non_matched_files, root)
+        self._print_section(
+            "📄 NON-MATCHED FILES (delete)",
+            section(table, flags, lambda f, k: not f & _KEPT and not k & DIR),
+            "files deleted",
+        )
+        self._file_batch_delete(list(table.rels(doomed_files)), root)
         self._log.info("=" * 70)
+
+
+def _fast_matcher(spec: PathSpec) -> Callable[[str], bool]:
+    """
+    ``spec.match_file`` without its per-call path normalisation and, for
+    include-only specs (every manifest without ``!`` negations), stopping at
+    the first matching pattern instead of evaluating all of them.
+    """
+    patterns = [p for p in spec.patterns if p.include is not None]
+    if any(not p.include for p in patterns):
+        return spec.match_file
+    regexes = [p.regex.match for p in patterns]
+    return lambda rel: any(m(rel) for m in regexes)
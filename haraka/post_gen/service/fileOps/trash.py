@@ -0,0 +1,155 @@
+"""
+haraka.post_gen.service.fileOps.trash
+
+Rename-to-trash transactions for the purge.
+
+Instead of deleting, `TrashTransaction.stash` renames a doomed path into a
+trash directory on the same filesystem – one ``rename(2)`` per entry, however
+large the directory. ``commit`` reclaims the trash on a background thread;
+``rollback`` renames everything back, so a purge that fails halfway leaves
+the project exactly as it was.
+
+>>> with TrashTransaction(project_dir) as tx:
+...     tx.stash(project_dir / "junk")
+...     tx.stash(project_dir / "src/unused.py")
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from haraka.utils import Logger
+
+
+class TrashError(OSError):
+    """Raised when a path cannot be moved into the trash."""
+
+
+class TrashTransaction:
+    """
+    Parameters
+    ----------
+    root
+        Project directory whose entries will be stashed.
+    background
+        Reclaim the trash on a thread at ``commit`` (joined at interpreter
+        exit) instead of inline.
+
+    The trash lives next to *root* (``.<name>.haraka-trash-<id>``) so it is
+    outside the project – ``git add`` never sees it – and on the same
+    filesystem. If the parent is not writable or is another filesystem, a
+    ``.haraka-trash-<id>`` inside *root* is used and reclaimed inline.
+    """
+
+    def __init__(self, root: Path, logger: Logger | None = None, background: bool = True) -> None:
+        self.root = Path(root)
+        self.background = background
+        self._log = logger or Logger("TrashTransaction")
+        self._stashed: List[Tuple[Path, Path]] = []   # (original, in trash)
+        self._trash: Optional[Path] = None
+        self._inside_root = False
+        self._reclaimer: Optional[threading.Thread] = None
+        self.state = "open"                            # open | committed | rolled back
+
+    # ------------- context manager ------------------------------------ #
+    def __enter__(self) -> "TrashTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.state != "open":
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    # ------------- public API ----------------------------------------- #
+    @property
+    def stashed(self) -> int:
+        return len(self._stashed)
+
+    def stash(self, path: Path) -> None:
+        """Move *path* (file, symlink or whole directory) into the trash."""
+        self._ensure_open()
+        trash = self._trash_dir()
+        target = trash / str(len(self._stashed))
+        try:
+            os.rename(path, target)
+        except OSError as e:
+            raise TrashError(e.errno, f"Cannot move {path} to trash: {e.strerror}") from e
+        self._stashed.append((Path(path), target))
+
+    def commit(self) -> None:
+        """Make the removals final and reclaim the trash (in the background by default)."""
+        self._ensure_open()
+        self.state = "committed"
+        trash, self._trash = self._trash, None
+        if trash is None:
+            return
+        if self.background and not self._inside_root:
+            self._reclaimer = threading.Thread(
+                target=self._reclaim, args=(trash,), name="haraka-trash-reclaim", daemon=False
+            )
+            self._reclaimer.start()
+        else:
+            self._reclaim(trash)
+
+    def rollback(self) -> None:
+        """Rename every stashed path back to where it was, newest first."""
+        self._ensure_open()
+        self.state = "rolled back"
+        failed = 0
+        for original, stashed in reversed(self._stashed):
+            try:
+                original.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(stashed, original)
+            except OSError as e:
+                failed += 1
+                self._log.error(f"Rollback could not restore {original}: {e} (kept at {stashed})")
+        if failed:
+            return  # leave the trash in place so nothing is lost
+        if self._trash is not None:
+            shutil.rmtree(self._trash, ignore_errors=True)
+            self._trash = None
+        self._log.info(f"↩️  Rolled back {len(self._stashed)} removal(s) in {self.root}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until background reclamation is done; False on timeout."""
+        if self._reclaimer is None:
+            return True
+        self._reclaimer.join(timeout)
+        return not self._reclaimer.is_alive()
+
+    # ------------- internals ------------------------------------------ #
+    def _ensure_open(self) -> None:
+        if self.state != "open":
+            raise RuntimeError(f"Trash transaction already {self.state}")
+
+    def _trash_dir(self) -> Path:
+        if self._trash is not None:
+            return self._trash
+        token = uuid.uuid4().hex[:12]
+        root = self.root.resolve()
+        sibling = root.parent / f".{root.name}.haraka-trash-{token}"
+        try:
+            if os.stat(root.parent).st_dev != os.stat(root).st_dev:
+                raise OSError("parent is on another filesystem")
+            sibling.mkdir(mode=0o700)
+            self._trash = sibling
+        except OSError as e:
+            self._log.debug(f"Trash next to {root} unavailable ({e}); using one inside it")
+            self._trash = root / f".haraka-trash-{token}"
+            self._trash.mkdir(mode=0o700)
+            self._inside_root = True
+        return self._trash
+
+    def _reclaim(self, trash: Path) -> None:
+        shutil.rmtree(trash, ignore_errors=True)
+        if trash.exists():
+            self._log.warn(f"⚠️ Could not fully reclaim trash {trash}")
+        else:
+            self._log.debug(f"Reclaimed trash {trash}")
@@ -0,0 +1,453 @@
+"""
+haraka.post_gen.service.fileOps.watch
+
+Dry-run purge that stays resident: ``haraka watch VARIANT DIR``.
+
+The walked tree and the compiled manifest are kept in memory. Filesystem
+changes under *DIR* and edits to the manifests are picked up with inotify
+(Linux), or by polling elsewhere. Only what changed is re-classified:
+
+* a created / deleted path updates its own status and walks up its ancestors
+  through a per-directory count of kept descendants, stopping as soon as a
+  count does not cross zero;
+* a manifest edit re-checks only the paths the pattern delta can affect:
+  kept paths against the new spec when patterns were removed, other paths
+  against just the added patterns.
+
+Statuses follow `ResourcePurger.classify_paths`: a path is kept when it
+matches, or when it is a directory with a matching descendant; other
+directories are protected when listed in ``protected:``; everything else
+would be deleted. Nothing is ever deleted by the watcher.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from haraka.post_gen.config import CompiledManifest, compile_manifest
+from haraka.post_gen.config import config
+from haraka.post_gen.service.fileOps.files import FileOps
+from haraka.post_gen.service.fileOps.purge import ResourcePurger, _fast_matcher
+from haraka.utils import Logger
+
+KEEP, DELETE, PROTECTED = "keep", "delete", "protected"
+
+# (kind, relative path, is_dir); kind is "add" | "remove" | "manifest" | "rescan"
+Change = Tuple[str, str, bool]
+
+
+class IncrementalClassifier:
+    """Keep/delete/protected status of every path, updated change by change."""
+
+    def __init__(self, manifest: CompiledManifest, paths: Iterable[str], dirs: Set[str]) -> None:
+        self.manifest = manifest
+        self._match = _fast_matcher(manifest.spec)
+        self.paths: Set[str] = set(paths)
+        self.dirs: Set[str] = set(dirs) & self.paths
+        self.matched: Set[str] = set()
+        self._kept_below: Dict[str, int] = {}   # dir -> matched strict descendants
+        for rel in self.paths:
+            if self._match(rel):
+                self._mark(rel, +1)
+
+    # ------------- queries -------------------------------------------- #
+    def status(self, rel: str) -> str:
+        if rel in self.matched or self._kept_below.get(rel):
+            return KEEP
+        if rel in self.dirs and rel in self.manifest.protected:
+            return PROTECTED
+        return DELETE
+
+    def statuses(self) -> Dict[str, str]:
+        return {rel: self.status(rel) for rel in self.paths}
+
+    def counts(self) -> Dict[str, int]:
+        counts = {KEEP: 0, DELETE: 0, PROTECTED: 0}
+        for rel in self.paths:
+            counts[self.status(rel)] += 1
+        return counts
+
+    # ------------- updates (return the paths whose status may change) - #
+    def add(self, rel: str, is_dir: bool) -> Set[str]:
+        touched = {rel}
+        self.paths.add(rel)
+        if is_dir:
+            self.dirs.add(rel)
+        if rel not in self.matched and self._match(rel):
+            touched |= self._mark(rel, +1)
+        return touched
+
+    def remove(self, rel: str) -> Set[str]:
+        """Remove *rel* and, if it is a directory, everything below it."""
+        prefix = rel + "/"
+        doomed = [p for p in self.paths if p == rel or p.startswith(prefix)] if rel in self.dirs else [rel]
+        doomed = [p for p in doomed if p in self.paths]
+        touched: Set[str] = set(doomed)
+        # Un-mark every matched path first: popping a doomed directory's count
+        # before a descendant un-marks would leave that count negative.
+        for p in doomed:
+            if p in self.matched:
+                touched |= self._mark(p, -1)
+        for p in doomed:
+            self.paths.discard(p)
+            self.dirs.discard(p)
+            self._kept_below.pop(p, None)
+        return touched
+
+    def set_manifest(self, manifest: CompiledManifest) -> Set[str]:
+        old = self.manifest
+        self.manifest = manifest
+        self._match = _fast_matcher(manifest.spec)
+        old_patterns, new_patterns = set(old.keep_patterns), set(manifest.keep_patterns)
+        added = [p for p in manifest.keep_patterns if p not in old_patterns]
+        removed = old_patterns - new_patterns
+
+        protected_delta = set(old.protected) ^ set(manifest.protected)
+        touched: Set[str] = {d for d in self.dirs if d in protected_delta}
+        negations = any(p.startswith("!") for p in (*old.keep_patterns, *manifest.keep_patterns))
+        if removed or negations:
+            for rel in list(self.matched):
+                if not self._match(rel):
+                    touched |= self._mark(rel, -1)
+        if added or negations:
+            check = self._match if negations else _fast_matcher(config.build_spec(added))
+            for rel in self.paths:
+                if rel not in self.matched and check(rel):
+                    touched |= self._mark(rel, +1)
+        return touched
+
+    # ------------- internals ------------------------------------------ #
+    def _mark(self, rel: str, delta: int) -> Set[str]:
+        """(Un)mark *rel* as matched and adjust the kept-descendant counts of its ancestors."""
+        if delta > 0:
+            self.matched.add(rel)
+        else:
+            self.matched.discard(rel)
+        touched = {rel}
+        cut = rel.rfind("/")
+        while cut > 0:
+            parent = rel[:cut]
+            count = self._kept_below.get(parent, 0) + delta
+            if count > 0:
+                self._kept_below[parent] = count
+            else:
+                self._kept_below.pop(parent, None)
+            touched.add(parent)
+            cut = rel.rfind("/", 0, cut)
+        return touched
+
+
+class _PollSource:
+    """Re-walk the tree and stat the manifests every *interval* seconds."""
+
+    name = "polling"
+
+    def __init__(self, watcher: "TemplateWatcher", interval: float) -> None:
+        self._w = watcher
+        self.interval = interval
+        self._manifest_stamp = self._stamp()
+
+    def _stamp(self) -> Tuple[Tuple[str, int, int], ...]:
+        stamps = []
+        for path in sorted(config._MANIFEST_DIR.glob("*.y*ml")):
+            st = path.stat()
+            stamps.append((path.name, st.st_mtime_ns, st.st_size))
+        return tuple(stamps)
+
+    def wait(self, timeout: Optional[float]) -> List[Change]:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        changes: List[Change] = []
+        stamp = self._stamp()
+        if stamp != self._manifest_stamp:
+            self._manifest_stamp = stamp
+            changes.append(("manifest", "", False))
+        paths, walked_dirs = self._w.walk()
+        known = self._w.classifier.paths
+        for rel in sorted(known - set(paths)):
+            changes.append(("remove", rel, False))
+        for rel in paths:
+            if rel not in known:
+                changes.append(("add", rel, rel in walked_dirs))
+        return changes
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifySource:
+    """Linux inotify through libc: one watch per directory plus the manifest directory."""
+
+    name = "inotify"
+    _IN_MODIFY, _IN_CLOSE_WRITE, _IN_MOVED_FROM, _IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+    _IN_CREATE, _IN_DELETE, _IN_DELETE_SELF, _IN_MOVE_SELF = 0x100, 0x200, 0x400, 0x800
+    _IN_Q_OVERFLOW, _IN_IGNORED, _IN_ISDIR = 0x4000, 0x8000, 0x40000000
+    _TREE_MASK = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+    _MANIFEST_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_MODIFY
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, watcher: "TemplateWatcher", debounce: float = 0.05) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc = libc
+        self._w = watcher
+        self.debounce = debounce
+        self._fd = libc.inotify_init1(0o4000 | 0o2000000)   # IN_NONBLOCK | IN_CLOEXEC
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}      # wd -> relative dir ("" is the root)
+        self._manifest_wd = self._add_watch(config._MANIFEST_DIR, self._MANIFEST_MASK)
+        self.watch_tree("")
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        return wd
+
+    def watch_tree(self, rel: str) -> None:
+        """Watch *rel* and every directory below it."""
+        root = self._w.root
+        top = root / rel if rel else root
+        for dirpath, dirnames, _ in os.walk(top):
+            rel_dir = Path(dirpath).relative_to(root).as_posix()
+            rel_dir = "" if rel_dir == "." else rel_dir
+            if not rel_dir:
+                dirnames[:] = [d for d in dirnames if d not in self._w.purger.walk_exclude]
+            try:
+                self._dirs[self._add_watch(Path(dirpath), self._TREE_MASK)] = rel_dir
+            except OSError as e:
+                self._w.log.debug(f"Cannot watch {dirpath}: {e}")
+
+    def wait(self, timeout: Optional[float]) -> List[Change]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        raw = self._drain()
+        # Coalesce bursts (git checkout, template re-render) into one batch.
+        deadline = time.monotonic() + self.debounce
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._fd], [], [], remaining)[0]:
+                break
+            raw += self._drain()
+        return self._decode(raw)
+
+    def _drain(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _decode(self, raw: bytes) -> List[Change]:
+        changes: List[Change] = []
+        offset = 0
+        size = self._EVENT.size
+        while offset + size <= len(raw):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(raw, offset)
+            name = raw[offset + size: offset + size + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += size + length
+
+            if mask & self._IN_Q_OVERFLOW:
+                changes.append(("rescan", "", False))
+                continue
+            if wd == self._manifest_wd:
+                if name.endswith((".yml", ".yaml")):
+                    changes.append(("manifest", name, False))
+                continue
+            if mask & self._IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or mask & (self._IN_DELETE_SELF | self._IN_MOVE_SELF):
+                continue
+            if not parent and name in self._w.purger.walk_exclude:
+                continue
+            rel = f"{parent}/{name}" if parent else name
+            is_dir = bool(mask & self._IN_ISDIR)
+            if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                changes.append(("add", rel, is_dir))
+                if is_dir:
+                    # Files may have landed before the watch existed: scan it.
+                    self.watch_tree(rel)
+                    paths, dirs = self._w.scan(rel)
+                    changes.extend(("add", p, p in dirs) for p in paths)
+            elif mask & (self._IN_DELETE | self._IN_MOVED_FROM):
+                changes.append(("remove", rel, is_dir))
+        return changes
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class TemplateWatcher:
+    """
+    Parameters
+    ----------
+    variant, root, services
+        What to classify: the manifest variant, the (rendered) template tree
+        and the enabled services.
+    poll
+        Force the polling source even where inotify is available.
+    interval
+        Polling period in seconds.
+    emit
+        Line sink for the diff output (``print`` by default).
+    """
+
+    def __init__(
+        self,
+        variant: str,
+        root: Path,
+        services: Iterable[str] = (),
+        *,
+        poll: bool = False,
+        interval: float = 0.5,
+        logger: Optional[Logger] = None,
+        emit: Callable[[str], None] = print,
+    ) -> None:
+        self.variant = variant
+        self.root = Path(root).resolve()
+        self.services = tuple(services)
+        self.log = logger or Logger("watch")
+        self.emit = emit
+        self.purger = ResourcePurger(FileOps(self.log), self.log)
+        self.classifier = IncrementalClassifier(self._compile(), *self.walk())
+        self._statuses = self.classifier.statuses()
+        self.source = self._open_source(poll, interval)
+
+    # ------------- public API ----------------------------------------- #
+    def walk(self) -> Tuple[List[str], Set[str]]:
+        """Every entry under the root (and the directories among them), as the purger walks it."""
+        table = self.purger._walk_tree(self.root)
+        return list(table.rels()), set(table.dir_rels())
+
+    def scan(self, rel: str) -> Tuple[List[str], Set[str]]:
+        """Entries (and the directories among them) below *rel*."""
+        paths, dirs = [], set()
+        for dirpath, dirnames, filenames in os.walk(self.root / rel):
+            base = Path(dirpath).relative_to(self.root).as_posix()
+            for name in dirnames:
+                paths.append(f"{base}/{name}")
+                dirs.add(f"{base}/{name}")
+            paths.extend(f"{base}/{name}" for name in filenames)
+        return paths, dirs
+
+    def run(self, max_batches: Optional[int] = None, timeout: Optional[float] = None) -> None:
+        """
+        Print the initial summary, then one diff per batch of changes until
+        Ctrl-C, *max_batches* batches, or *timeout* seconds without changes.
+        """
+        counts = self.classifier.counts()
+        self.emit(
+            f"👀 Watching {self.root} for {self.variant} via {self.source.name}: "
+            f"{counts[KEEP]} keep, {counts[DELETE]} delete, {counts[PROTECTED]} protected"
+        )
+        batches = 0
+        idle_since = time.monotonic()
+        try:
+            while max_batches is None or batches < max_batches:
+                remaining = None if timeout is None else timeout - (time.monotonic() - idle_since)
+                if remaining is not None and remaining <= 0:
+                    break
+                changes = self.source.wait(remaining)
+                if changes:
+                    self.apply(changes)
+                    batches += 1
+                    idle_since = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.source.close()
+
+    def apply(self, changes: List[Change]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Fold *changes* into the classification and print the resulting diff."""
+        started = time.perf_counter()
+        touched: Set[str] = set()
+        reloaded = False
+        for kind, rel, is_dir in changes:
+            if kind == "add":
+                touched |= self.classifier.add(rel, is_dir)
+            elif kind == "remove":
+                touched |= self.classifier.remove(rel)
+            elif kind == "manifest" and not reloaded:
+                reloaded = True
+                touched |= self._reload_manifest()
+            elif kind == "rescan":
+                touched |= self._rescan()
+
+        diff = []
+        for rel in sorted(touched):
+            before = self._statuses.get(rel)
+            after = self.classifier.status(rel) if rel in self.classifier.paths else None
+            if before != after:
+                diff.append((rel, before, after))
+                if after is None:
+                    self._statuses.pop(rel, None)
+                else:
+                    self._statuses[rel] = after
+        elapsed = (time.perf_counter() - started) * 1000
+        if diff or reloaded:
+            self._print_diff(diff, elapsed)
+        return diff
+
+    # ------------- internals ------------------------------------------ #
+    def _open_source(self, poll: bool, interval: float):
+        if not poll:
+            try:
+                return _InotifySource(self)
+            except OSError as e:
+                self.log.debug(f"inotify unavailable ({e}); polling every {interval}s")
+        return _PollSource(self, interval)
+
+    def _compile(self) -> CompiledManifest:
+        return compile_manifest(self.variant, self.services)
+
+    def _reload_manifest(self) -> Set[str]:
+        config.clear_manifest_cache()
+        try:
+            manifest = self._compile()
+        except Exception as e:
+            self.log.error(f"Manifest reload failed, keeping the previous one: {e}")
+            return set()
+        delta = len(set(manifest.keep_patterns) ^ set(self.classifier.manifest.keep_patterns))
+        self.emit(f"📝 Manifest reloaded: {delta} pattern change(s)")
+        return self.classifier.set_manifest(manifest)
+
+    def _rescan(self) -> Set[str]:
+        paths, dirs = self.walk()
+        current = set(paths)
+        touched: Set[str] = set()
+        for rel in self.classifier.paths - current:
+            touched |= self.classifier.remove(rel)
+        for rel in current - self.classifier.paths:
+            touched |= self.classifier.add(rel, rel in dirs)
+        return touched
+
+    def _print_diff(self, diff: List[Tuple[str, Optional[str], Optional[str]]], elapsed_ms: float) -> None:
+        counts = self.classifier.counts()
+        self.emit(
+            f"[{time.strftime('%H:%M:%S')}] {len(diff)} change(s) in {elapsed_ms:.2f} ms — "
+            f"{counts[KEEP]} keep, {counts[DELETE]} delete, {counts[PROTECTED]} protected"
+        )
+        for rel, before, after in diff:
+            if before is None:
+                self.emit(f"  + {after:<9} {rel}")
+            elif after is None:
+                self.emit(f"  - {before:<9} {rel}")
+            else:
+                self.emit(f"  ~ {before} → {after:<9} {rel}")
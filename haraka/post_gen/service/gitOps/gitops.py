@@ -1,8 +1,6 @@
-import shutil
 import sys
 from pathlib import Path
 from haraka.post_gen.service.command import CommandRunner
-import subprocess
 from haraka.utils import Logger
 
 class GitOps:
@@ -11,6 +9,7 @@ class GitOps:
     def __init__(self, runner: CommandRunner, logger: Logger) -> None:
         self._r = runner
         self._log = logger
+        self._probes = runner.probes
 
     # ------------- public API ----------------------------------------- #
     def init_repo(self, project_dir: Path) -> None:
@@ -20,6 +19,11 @@ class GitOps:
             self._log.info("Initializing Git repository…")
             self._log.debug(f"Running 'git init' in {project_dir}…")
 
+            if self._probes.git_supports_initial_branch():
+                # git 2.28+: name the branch at init, one process instead of two.
+                self._r.run(["git", "init", "-b", "main"], cwd=project_dir)
+                self._log.debug("Git repository initialized on branch 'main'.")
+                return
             self._r.run(["git", "init"], cwd=project_dir)
             self._log.debug("Git repository initialized successfully.")
 
@@ -40,6 +44,9 @@ class GitOps:
         res = self._r.run(["git", "commit", "-m", "Initial commit"],
                           cwd=project_dir, check=False)
         if not res or res.returncode:
+            # Only diagnose a failure: probing up front costs every run a subprocess.
+            if self._probes.git_identity() is None:
+                self._log.warn("No git identity (user.name / user.email) configured.")
             self._log.error("'git commit' failed (perhaps nothing to commit); continuing…", file=sys.stderr)
         else:
             self._log.debug("'git commit' executed successfully.")
@@ -67,22 +74,17 @@ class GitOps:
             "--source", ".", "--remote", "origin", "--push", "--confirm"
         ], cwd=project_dir)
         self._log.debug(f"GitHub repo {repo} created and code pushed successfully.")
+        self._probes.forget_repo(project_dir)
 
     # ------------- internals ------------------------------------------ #
     def _current_remotes(self, project_dir: Path):
-        try:
-            self._log.debug(f"Fetching remotes for repository at {project_dir}…")
-            res = subprocess.run(["git", "remote"], cwd=project_dir,
-                                 check=True, text=True,
-                                 stdout=subprocess.PIPE)
-            remotes = [r.strip() for r in res.stdout.splitlines()]
-            self._log.debug(f"Found remotes: {remotes}")
-            return remotes
-        except subprocess.CalledProcessError:
-            self._log.warn("Failed to fetch remotes; returning an empty list.")
-            return []
+        # Read from .git/config (cached until it changes) instead of forking `git remote`.
+        self._log.debug(f"Fetching remotes for repository at {project_dir}…")
+        remotes = self._probes.remotes(project_dir)
+        self._log.debug(f"Found remotes: {remotes}")
+        return remotes
 
     def _has_gh(self) -> bool:
-        result = shutil.which("gh") is not None
+        result = self._probes.which("gh") is not None
         self._log.debug(f"'gh' command found: {result}")
         return result
@@ -0,0 +1,298 @@
+"""
+haraka.post_gen.service.gitOps.push
+
+Push many freshly generated projects at once.
+
+`ParallelPusher.push_all` runs up to ``max_workers`` pushes concurrently and
+retries transient failures (network hiccups, 5xx, rate limits, lock
+contention) with exponential backoff and jitter; anything else fails the
+project immediately. The destination is a pluggable `PushTarget`:
+
+* `GhTarget`        – ``gh repo create <author>/<slug> --push`` (the classic path);
+* `GitUrlTarget`    – ``git push`` to any URL template, e.g.
+  ``git@github.com:{author}/{slug}.git``;
+* `BareRepoTarget`  – a local bare repository per project, so the whole path
+  can be exercised and benchmarked offline.
+
+``target_from_spec("gh" | "bare:<dir>" | "<url template>")`` builds one from a
+CLI / config string.
+"""
+from __future__ import annotations
+
+import abc
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from haraka.post_gen.service.command import CommandError, CommandRunner
+from haraka.utils import Logger
+
+
+class PushError(RuntimeError):
+    """A push that must not be retried (missing tool, bad target, …)."""
+
+
+# stderr fragments of failures worth another attempt.
+_TRANSIENT_RE = re.compile(
+    r"could not resolve host|connection (?:timed out|reset|refused)|operation timed out"
+    r"|early eof|the remote end hung up|unexpected disconnect|rpc failed"
+    r"|http(?:/[\d.]+)? 5\d\d|returned error: 5\d\d|rate limit|try again"
+    r"|index\.lock|cannot lock ref|unable to create .*\.lock|resource temporarily unavailable",
+    re.IGNORECASE,
+)
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for failures that another attempt may fix."""
+    if isinstance(error, PushError):
+        return False
+    if isinstance(error, CommandError):
+        return bool(_TRANSIENT_RE.search(f"{error.stderr}\n{error.stdout}"))
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+@dataclass(frozen=True)
+class PushJob:
+    project_dir: Path
+    slug: str
+    author: str = ""
+    description: str = ""
+
+
+# ------------- targets ------------------------------------------------ #
+class PushTarget(abc.ABC):
+    """Where a project goes. `push` returns the remote URL it pushed to."""
+
+    name = "target"
+    needs_author = False    # projects without an author are skipped, not failed
+
+    @abc.abstractmethod
+    def push(self, job: PushJob, runner: CommandRunner) -> str: ...
+
+    @staticmethod
+    def _push_origin(job: PushJob, runner: CommandRunner, url: str) -> str:
+        remotes = runner.probes.remotes(job.project_dir)
+        verb = "set-url" if "origin" in remotes else "add"
+        runner.run(["git", "remote", verb, "origin", url], cwd=job.project_dir)
+        runner.run(["git", "push", "-u", "origin", "HEAD"], cwd=job.project_dir)
+        return url
+
+
+class GhTarget(PushTarget):
+    """Create ``<author>/<slug>`` on GitHub with the ``gh`` CLI and push to it."""
+
+    name = "gh"
+    needs_author = True
+
+    def __init__(self, visibility: str = "public") -> None:
+        self.visibility = visibility
+
+    def push(self, job: PushJob, runner: CommandRunner) -> str:
+        if runner.probes.which("gh") is None:
+            raise PushError("GitHub CLI ('gh') not found")
+        if not job.author:
+            raise PushError("no GitHub author configured")
+        repo = f"{job.author}/{job.slug}"
+        if "origin" in runner.probes.remotes(job.project_dir):
+            # Created by an earlier attempt that failed while pushing.
+            runner.run(["git", "push", "-u", "origin", "HEAD"], cwd=job.project_dir)
+        else:
+            runner.run([
+                "gh", "repo", "create", repo, f"--{self.visibility}", "--description", job.description,
+                "--source", ".", "--remote", "origin", "--push", "--confirm",
+            ], cwd=job.project_dir)
+            runner.probes.forget_repo(job.project_dir)
+        return f"https://github.com/{repo}"
+
+
+class GitUrlTarget(PushTarget):
+    """``git push`` to *url* – a template with ``{author}`` / ``{slug}`` placeholders."""
+
+    name = "git"
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    @property
+    def needs_author(self) -> bool:
+        return "{author}" in self.url
+
+    def push(self, job: PushJob, runner: CommandRunner) -> str:
+        try:
+            url = self.url.format(author=job.author, slug=job.slug)
+        except (KeyError, IndexError) as e:
+            raise PushError(f"bad URL template {self.url!r}: unknown placeholder {e}") from e
+        return self._push_origin(job, runner, url)
+
+
+class BareRepoTarget(PushTarget):
+    """A bare repository ``<root>/<slug>.git`` per project, created on first push."""
+
+    name = "bare"
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root).resolve()
+        self._lock = threading.Lock()
+
+    def push(self, job: PushJob, runner: CommandRunner) -> str:
+        repo = self.root / f"{job.slug}.git"
+        with self._lock:                      # one `git init --bare` per slug
+            if not (repo / "HEAD").exists():
+                self.root.mkdir(parents=True, exist_ok=True)
+                init = ["git", "init", "--bare"]
+                if runner.probes.git_supports_initial_branch():
+                    init += ["-b", "main"]
+                runner.run([*init, str(repo)])
+        return self._push_origin(job, runner, repo.as_uri())
+
+
+def target_from_spec(spec: str) -> PushTarget:
+    """``gh`` | ``bare:<dir>`` | any git URL (template) → a `PushTarget`."""
+    if spec == "gh":
+        return GhTarget()
+    if spec.startswith("bare:"):
+        return BareRepoTarget(Path(spec[len("bare:"):]).expanduser())
+    if "://" in spec or "@" in spec or spec.startswith(("/", ".")) or "{" in spec:
+        return GitUrlTarget(spec)
+    raise ValueError(f"Unknown push target {spec!r} (expected 'gh', 'bare:<dir>' or a git URL)")
+
+
+# ------------- results ------------------------------------------------ #
+@dataclass
+class PushResult:
+    slug: str
+    project_dir: Path
+    ok: bool
+    attempts: int
+    seconds: float
+    remote: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class PushReport:
+    target: str
+    workers: int
+    results: List[PushResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    @property
+    def failed(self) -> List[PushResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def retries(self) -> int:
+        return sum(r.attempts - 1 for r in self.results)
+
+    def render(self) -> str:
+        lines = [
+            f"{'✅' if r.ok else '❌'} {r.slug:<32} {r.seconds:7.2f}s"
+            + (f"  ({r.attempts} attempts)" if r.attempts > 1 else "")
+            + (f"  {r.error}" if r.error else f"  → {r.remote}")
+            for r in self.results
+        ]
+        times = sorted(r.seconds for r in self.results)
+        if times:
+            busy = sum(times)
+            lines.append(
+                f"{len(times) - len(self.failed)}/{len(times)} push(es) to {self.target} succeeded "
+                f"in {self.seconds:.2f}s with {self.workers} worker(s), {self.retries} retries – "
+                f"median {times[len(times) // 2]:.2f}s, slowest {times[-1]:.2f}s, "
+                f"{busy / self.seconds if self.seconds else 1:.1f}x overlap"
+            )
+        return "\n".join(lines)
+
+
+# ------------- pusher ------------------------------------------------- #
+class ParallelPusher:
+    """
+    Parameters
+    ----------
+    target
+        Where projects are pushed.
+    runner
+        Must not exit on error (``exit_on_error=False``): failures are
+        retried or reported, never ``sys.exit``.
+    max_workers
+        Concurrent pushes.
+    retries
+        Extra attempts after a transient failure.
+    backoff, max_backoff
+        First retry waits ~``backoff`` s, doubling per attempt up to
+        ``max_backoff``; each wait is jittered to 50–100 % so synchronized
+        workers do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        target: PushTarget,
+        runner: CommandRunner,
+        logger: Optional[Logger] = None,
+        *,
+        max_workers: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if runner.exit_on_error:
+            raise ValueError("ParallelPusher needs a CommandRunner with exit_on_error=False")
+        self.target = target
+        self._r = runner
+        self._log = logger or Logger("push")
+        self.max_workers = max(1, max_workers)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+
+    def push_all(self, jobs: Iterable[PushJob]) -> PushReport:
+        jobs = list(jobs)
+        report = PushReport(self.target.name, self.max_workers)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="push") as pool:
+            report.results = list(pool.map(self.push_one, jobs))
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def push_one(self, job: PushJob) -> PushResult:
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                remote = self.target.push(job, self._r)
+            except Exception as e:
+                if attempt <= self.retries and is_transient(e):
+                    delay = self.delay(attempt)
+                    self._log.warn(f"⚠️ [{job.slug}] push attempt {attempt} failed ({_summary(e)}); "
+                                   f"retrying in {delay:.2f}s")
+                    self._sleep(delay)
+                    continue
+                self._log.error(f"[{job.slug}] push failed after {attempt} attempt(s): {_summary(e)}")
+                return PushResult(job.slug, job.project_dir, False, attempt,
+                                  time.perf_counter() - started, error=_summary(e))
+            self._log.info(f"🚀 [{job.slug}] pushed to {remote}")
+            return PushResult(job.slug, job.project_dir, True, attempt, time.perf_counter() - started, remote)
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry number *attempt* (1-based)."""
+        base = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return base * random.uniform(0.5, 1.0)
+
+
+def _summary(error: BaseException) -> str:
+    if isinstance(error, CommandError) and error.stderr.strip():
+        lines = error.stderr.strip().splitlines()
+        reason = next((l for l in lines if l.startswith(("fatal:", "error:"))), lines[-1])
+        return f"{error} – {reason.strip()}"
+    return str(error)
@@ -0,0 +1,188 @@
+"""
+haraka.post_gen.service.probe
+
+Memoised environment probes shared by `CommandRunner` and `GitOps`.
+
+Batch and daemon runs ask the same questions for every project – is ``gh``
+installed, which git is this, who commits, which remotes exist. `ProbeCache`
+answers them once per ``ttl`` seconds:
+
+* tools are resolved to absolute executables (``which``), so spawning them
+  skips the ``PATH`` search too;
+* git's version and commit identity are probed with one process each;
+* repository state (remotes) is read from ``.git/config`` directly and
+  re-read only when that file changes.
+
+``invalidate()`` forgets everything (or one key) – e.g. after installing a
+tool while a daemon is running.
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_SECTION_RE = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+
+
+class ProbeCache:
+    """
+    Parameters
+    ----------
+    ttl
+        Seconds an answer stays valid; ``None`` keeps answers until
+        `invalidate`.
+    clock
+        Monotonic time source (injectable for tests).
+    """
+
+    def __init__(self, ttl: Optional[float] = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.RLock()              # probes consult `which` while computing
+        self._entries: Dict[Any, Tuple[float, Any]] = {}   # key -> (stored at, value)
+        self.hits = 0
+        self.misses = 0
+
+    # ------------- cache ---------------------------------------------- #
+    def get(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Cached value for *key*, computing (and storing) it when absent or expired."""
+        now = self._clock()
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is not None and (self.ttl is None or now - stored[0] < self.ttl):
+                self.hits += 1
+                return stored[1]
+            self.misses += 1
+            value = compute()
+            self._entries[key] = (now, value)
+            return value
+
+    def invalidate(self, key: Any = None) -> None:
+        """Forget *key*, or every answer when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    # ------------- tools ---------------------------------------------- #
+    def which(self, tool: str) -> Optional[str]:
+        """Absolute path of *tool* on ``PATH`` (``None`` when not installed)."""
+        if os.sep in tool or (os.altsep and os.altsep in tool):
+            return tool
+        return self.get(("which", tool, os.environ.get("PATH", "")), lambda: _absolute(shutil.which(tool)))
+
+    def forget_tool(self, tool: str) -> None:
+        self.invalidate(("which", tool, os.environ.get("PATH", "")))
+
+    def git_version(self) -> Optional[Tuple[int, ...]]:
+        """``(major, minor, patch)`` of the installed git, ``None`` without git."""
+        return self.get("git-version", self._probe_git_version)
+
+    def git_supports_initial_branch(self) -> bool:
+        """``git init -b <branch>`` exists (git 2.28+)."""
+        version = self.git_version()
+        return version is not None and version >= (2, 28)
+
+    def git_identity(self) -> Optional[str]:
+        """``Name <email>`` git would commit as outside any repository, ``None`` if it cannot tell."""
+        return self.get("git-identity", self._probe_git_identity)
+
+    # ------------- repository state ----------------------------------- #
+    def remotes(self, repo: Path) -> List[str]:
+        """Remote names configured in *repo*'s ``.git/config`` (``[remote "…"]`` sections)."""
+        config = _git_config_path(Path(repo))
+        try:
+            st = os.stat(config)
+        except OSError:
+            return []
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = ("remotes", os.fspath(config))
+        cached = self.get(key, lambda: (stamp, _remote_names(config)))
+        if cached[0] != stamp:                   # config rewritten since it was read
+            self.invalidate(key)
+            cached = self.get(key, lambda: (stamp, _remote_names(config)))
+        return list(cached[1])
+
+    def forget_repo(self, repo: Path) -> None:
+        self.invalidate(("remotes", os.fspath(_git_config_path(Path(repo)))))
+
+    # ------------- probes --------------------------------------------- #
+    def _probe_git_version(self) -> Optional[Tuple[int, ...]]:
+        out = self._capture(["git", "--version"])
+        match = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", out or "")
+        if match is None:
+            return None
+        return tuple(int(part or 0) for part in match.groups())
+
+    def _probe_git_identity(self) -> Optional[str]:
+        out = self._capture(["git", "var", "GIT_AUTHOR_IDENT"])
+        if not out:
+            return None
+        return out.rsplit(">", 1)[0] + ">" if ">" in out else out.strip()
+
+    def _capture(self, cmd: List[str]) -> Optional[str]:
+        exe = self.which(cmd[0])
+        if exe is None:
+            return None
+        try:
+            # From the filesystem root, so no repository's local config leaks in.
+            res = subprocess.run([exe, *cmd[1:]], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 text=True, cwd=os.path.abspath(os.sep))
+        except OSError:
+            return None
+        return res.stdout.strip() if res.returncode == 0 else None
+
+
+def _absolute(path: Optional[str]) -> Optional[str]:
+    return os.path.abspath(path) if path is not None else None
+
+
+def _git_config_path(repo: Path) -> Path:
+    """``<repo>/.git/config``, following a ``gitdir:`` file (worktrees, submodules)."""
+    dot_git = repo / ".git"
+    if dot_git.is_file():
+        try:
+            line = dot_git.read_text().strip()
+        except OSError:
+            return dot_git / "config"
+        if line.startswith("gitdir:"):
+            gitdir = Path(line[len("gitdir:"):].strip())
+            gitdir = gitdir if gitdir.is_absolute() else repo / gitdir
+            commondir = gitdir / "commondir"
+            if commondir.is_file():               # linked worktree: config lives in the main repo
+                gitdir = gitdir / commondir.read_text().strip()
+            return gitdir / "config"
+    return dot_git / "config"
+
+
+def _remote_names(config: Path) -> Tuple[str, ...]:
+    try:
+        text = config.read_text(errors="replace")
+    except OSError:
+        return ()
+    names: List[str] = []
+    for line in text.splitlines():
+        match = _SECTION_RE.match(line)
+        if match is None:
+            continue
+        section, sub = match.group(1).lower(), match.group(2)
+        if section == "remote" and sub is not None:
+            name = re.sub(r"\\(.)", r"\1", sub)
+        elif section.startswith("remote.") and sub is None:
+            name = section[len("remote."):]          # deprecated [remote.name] form
+        else:
+            continue
+        if name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+# Process-wide cache: every CommandRunner / GitOps shares it unless given its own.
+PROBES = ProbeCache()
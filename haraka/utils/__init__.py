@@ -1,5 +1,6 @@
 from haraka.post_gen.config import PostGenConfig
 from .logging.log_util import Logger
+from .logging.policy import OutputPolicy
 from .common.utils import *
 
-__all__ = ["PostGenConfig", "", "divider", "Logger"]
+__all__ = ["PostGenConfig", "", "divider", "Logger", "OutputPolicy"]
@@ -1,30 +1,96 @@
 from __future__ import annotations
 import sys
-from typing import TextIO, Optional
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, TextIO, Optional
+
+from .policy import OutputPolicy, OutputScope, ScopeStack, aggregate_paths
 
 
 class Logger:
-    def __init__(self, label: str = "", verbose: bool = False, evm: bool = True) -> None:
+    def __init__(self, label: str = "", verbose: bool = False, evm: bool = True,
+                 policy: Optional[OutputPolicy] = None) -> None:
         self.label = label
         self.verbose = verbose
         self.evm = evm
+        self.policy = policy      # None: `OutputPolicy()`, or unlimited when verbose
+        self._scopes = ScopeStack()
 
     def start_logger(self, verbose: bool = False) -> Logger:
         label = Logger.get_label(self.label)
-        return Logger(label, verbose)
+        return Logger(label, verbose, policy=self.policy)
 
-    def info(self, msg: str, extra: Optional[dict] = None) -> None:
-        print(f"{self.label} INFO: {msg}{self._format_extra(extra)}")
+    def info(self, msg: str, extra: Optional[dict] = None, category: Optional[str] = None) -> None:
+        line = f"{self.label} INFO: {msg}{self._format_extra(extra)}"
+        scope = self._scope()
+        if category is not None and scope is not None:
+            scope.record((f"{category}: {msg}",))
+            if not scope.allow(category):
+                return
+        print(line)
 
     def debug(self, msg: str, extra: Optional[dict] = None) -> None:
         if self.verbose:
             print(f"{self.label} 🔴 DEBUG: {msg}{self._format_extra(extra)}")
 
-    def warn(self, msg: str, file: TextIO = sys.stderr, extra: Optional[dict] = None) -> None:
-        print(f"{self.label} ⚠️ WARNING: {msg}{self._format_extra(extra)}", file=file)
+    def warn(self, msg: str, file: Optional[TextIO] = None, extra: Optional[dict] = None) -> None:
+        print(f"{self.label} ⚠️ WARNING: {msg}{self._format_extra(extra)}", file=file or sys.stderr)
+
+    def error(self, msg: str, file: Optional[TextIO] = None, extra: Optional[dict] = None) -> None:
+        print(f"{self.label} ❌ ERROR: {msg}{self._format_extra(extra)}", file=file or sys.stderr)
+
+    # ------------- output policy ------------------------------------- #
+    @property
+    def output_policy(self) -> OutputPolicy:
+        if self.policy is not None:
+            return self.policy
+        return OutputPolicy.unlimited() if self.verbose else OutputPolicy()
+
+    @contextmanager
+    def output_scope(self, detail_path: Optional[Path] = None) -> Iterator[OutputScope]:
+        """
+        Apply the rate limits of `output_policy` to ``info(…, category=…)``
+        lines until the block ends, then report what was suppressed. With
+        *detail_path*, every categorised line and `listing` entry is also
+        written to that gzip file.
+        """
+        scope = OutputScope(self.output_policy, detail_path)
+        self._scopes.scopes.append(scope)
+        try:
+            yield scope
+        finally:
+            self._scopes.scopes.pop()
+            scope.close()
+            where = f" (full list: {scope.detail_path})" if scope.detail_path else ""
+            for category, count in scope.suppressed.items():
+                self.info(f"… {count:,} more '{category}' line(s) not shown{where}")
+
+    def listing(self, title: str, items: List[str], noun: str = "entries") -> None:
+        """
+        ``title — N`` and one line per item; past the policy's
+        ``section_lines``, directory aggregates (``chart/** — 1,204 entries``).
+        """
+        scope = self._scope()
+        if scope is not None:
+            scope.record((f"# {title} — {len(items)}", *(f"  {p}" for p in items)))
+        self.info(f"{title} — {len(items):,}")
+        limit = self.output_policy.section_lines
+        if not items:
+            self.info("  (none)")
+        elif limit is None or len(items) <= limit:
+            for p in items:
+                self.info(f"  • {p}")
+        else:
+            groups = aggregate_paths(items, limit)
+            lines = [f"{self.label} INFO:   • {p}" + (f" — {count:,} {noun}" if count > 1 else "")
+                     for p, count in groups[:limit]]
+            if len(groups) > limit:
+                lines.append(f"{self.label} INFO:   … {sum(c for _, c in groups[limit:]):,} more {noun}")
+            print("\n".join(lines))
 
-    def error(self, msg: str, file: TextIO = sys.stderr, extra: Optional[dict] = None) -> None:
-        print(f"{self.label} ❌ ERROR: {msg}{self._format_extra(extra)}", file=file)
+    def _scope(self) -> Optional[OutputScope]:
+        scopes = self._scopes.scopes
+        return scopes[-1] if scopes else None
 
     @staticmethod
     def get_label(variant: str) -> str:
@@ -0,0 +1,126 @@
+"""
+haraka.utils.logging.policy
+
+How much of a high-volume run reaches the terminal.
+
+A purge of a big template produces one line per kept, protected or deleted
+path, and `FileOps` then reports every deletion again. `OutputPolicy` keeps
+that readable:
+
+* **rate limits** – at most ``rate_limits[category]`` lines per category
+  (``"deleted"``, …) inside one `Logger.output_scope`; the rest are counted
+  and summarised when the scope closes;
+* **aggregation** – listings longer than ``section_lines`` collapse into
+  directory-level groups (``chart/** — 1,204 entries kept``), as deep as the
+  limit allows;
+* **detail dump** – with ``output_scope(detail_path)`` every line, printed or
+  not, is streamed once into a gzip sidecar (``zcat purge.log.gz``).
+
+Verbose loggers use `OutputPolicy.unlimited` and print everything.
+"""
+from __future__ import annotations
+
+import gzip
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+
+@dataclass(frozen=True)
+class OutputPolicy:
+    """
+    Parameters
+    ----------
+    rate_limits
+        Lines printed per category and scope; categories not listed are not
+        limited.
+    section_lines
+        Longest listing printed path by path; ``None`` never aggregates.
+    """
+
+    rate_limits: Dict[str, int] = field(default_factory=lambda: {"deleted": 25})
+    section_lines: Optional[int] = 40
+
+    @classmethod
+    def unlimited(cls) -> "OutputPolicy":
+        return cls(rate_limits={}, section_lines=None)
+
+
+class OutputScope:
+    """Per-thread state of one `Logger.output_scope`: line counters and the sidecar."""
+
+    def __init__(self, policy: OutputPolicy, detail_path: Optional[Path] = None) -> None:
+        self.policy = policy
+        self.detail_path = Path(detail_path) if detail_path is not None else None
+        self.printed: Dict[str, int] = {}
+        self.suppressed: Dict[str, int] = {}
+        self._sink: Optional[TextIO] = None
+        if self.detail_path is not None:
+            self.detail_path.parent.mkdir(parents=True, exist_ok=True)
+            # Level 1: the dump is written while the purge runs and must not slow it down.
+            self._sink = gzip.open(self.detail_path, "wt", encoding="utf-8", compresslevel=1)
+
+    def allow(self, category: str) -> bool:
+        """Count one *category* line; False once its limit is used up."""
+        limit = self.policy.rate_limits.get(category)
+        shown = self.printed.get(category, 0)
+        if limit is not None and shown >= limit:
+            self.suppressed[category] = self.suppressed.get(category, 0) + 1
+            return False
+        self.printed[category] = shown + 1
+        return True
+
+    def record(self, lines: Iterable[str]) -> None:
+        if self._sink is not None:
+            self._sink.writelines(line + "\n" for line in lines)
+
+    def close(self) -> None:
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+class ScopeStack(threading.local):
+    """Open scopes of one logger, per thread (batch runs share loggers)."""
+
+    def __init__(self) -> None:
+        self.scopes: List[OutputScope] = []
+
+
+def aggregate_paths(paths: List[str], limit: int) -> List[Tuple[str, int]]:
+    """
+    Group relative POSIX *paths* by their first *d* components, for the
+    largest *d* that still yields at most *limit* groups (``d = 1`` if none
+    does). Returns ``("prefix/**", count)`` pairs – or ``(path, 1)`` for a
+    group of one – in order of first appearance; a directory and everything
+    under it share one group.
+    """
+    if len(paths) <= limit:
+        return [(p, 1) for p in paths]
+    best = _group(paths, 1)
+    deepest = max(p.count("/") for p in paths) + 1
+    for depth in range(2, deepest + 1):
+        groups = _group(paths, depth)
+        if len(groups) > limit:
+            break
+        best = groups
+    return [(first, 1) if count == 1 else (f"{key}/**", count) for key, (count, first) in best.items()]
+
+
+def _group(paths: List[str], depth: int) -> Dict[str, List]:
+    """Prefix of *depth* components -> [count, first path]."""
+    groups: Dict[str, List] = {}
+    for p in paths:
+        cut = -1
+        for _ in range(depth):
+            cut = p.find("/", cut + 1)
+            if cut < 0:
+                break
+        key = p if cut < 0 else p[:cut]
+        entry = groups.get(key)
+        if entry is None:
+            groups[key] = [1, p]
+        else:
+            entry[0] += 1
+    return groups
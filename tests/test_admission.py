@@ -0,0 +1,18 @@
+from haraka.PyFast.core.admission import AdmissionController, Rejection, RouteLimits
+
+
+def test_exempt_and_route_prefixes_match_whole_segments():
+    controller = AdmissionController(max_concurrency=1, routes={"/api": RouteLimits(max_concurrency=5)})
+
+    assert controller.admit("/health") is None
+    assert controller.admit("/health/db") is None
+
+    ticket = controller.admit("/healthz")                 # not exempt: takes the only slot
+    assert ticket is not None and not isinstance(ticket, Rejection)
+    rejected = controller.admit("/apix")
+    assert isinstance(rejected, Rejection) and rejected.route is None
+    controller.release(ticket, 0.0)
+
+    ticket = controller.admit("/api/items")
+    assert controller.stats()["routes"]["/api"]["admitted"] == 1
+    controller.release(ticket, 0.0)
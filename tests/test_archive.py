@@ -0,0 +1,121 @@
+import io
+import random
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from haraka.post_gen.config import CompiledManifest
+from haraka.post_gen.config import config
+from haraka.post_gen.config.config import build_spec
+from haraka.post_gen.service.fileOps.archive import ArchiveExtractor
+from haraka.post_gen.service.fileOps.files import FileOps
+from haraka.post_gen.service.fileOps.purge import ResourcePurger
+from haraka.utils import Logger
+
+KEEP = ("*.py", "docs", "keep/**/x*", "chart/values.yaml")
+# "a/build" sits under "a", which is deleted unless something below it is kept.
+PROTECTED = ("build", "a/build", "chart")
+NAMES = ("a", "b", "docs", "keep", "build", "chart", "x1", "src")
+MANIFEST = CompiledManifest(
+    variant="test", keep_patterns=KEEP, protected=PROTECTED, services=(),
+    missing_services=(), spec=build_spec(KEEP),
+)
+
+
+def _random_tree(seed: int):
+    """``{relative path: bytes or None (directory)}``, parents before children."""
+    rng = random.Random(seed)
+    tree = {}
+
+    def fill(prefix: str, depth: int) -> None:
+        for name in rng.sample(NAMES, rng.randint(1, 4)):
+            rel = f"{prefix}{name}"
+            if depth < 3 and rng.random() < 0.5:
+                tree[rel] = None
+                fill(rel + "/", depth + 1)
+            else:
+                rel += rng.choice((".py", ".txt", ".yaml", ""))
+                if rel not in tree:
+                    tree[rel] = f"{rel}\n".encode()
+
+    fill("", 0)
+    tree.setdefault("a", None)
+    tree.setdefault("a/build", None)            # protected, under a deleted parent
+    tree["a/build/out.txt"] = b"out\n"
+    tree["root.py"] = b"root\n"                 # written through an absolute entry below
+    return tree
+
+
+def _render(tree, root: Path) -> None:
+    for rel, data in tree.items():
+        path = root / rel
+        if data is None:
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+
+def _entries(root: Path):
+    return sorted(
+        (p.relative_to(root).as_posix(), p.is_dir(), None if p.is_dir() else p.read_bytes())
+        for p in root.rglob("*")
+    )
+
+
+def _purged(tree, tmp_path: Path, monkeypatch):
+    project = tmp_path / "purged"
+    _render(tree, project)
+    monkeypatch.setattr(config, "compile_manifest", lambda variant, services=(): MANIFEST)
+    logger = Logger("test")
+    ResourcePurger(FileOps(logger), logger).purge("test", project, show_tree=False)
+    return _entries(project)
+
+
+def _name(rel: str, prefix: str) -> str:
+    return "/root.py" if rel == "root.py" and not prefix else prefix + rel
+
+
+def _tar(tree, path: Path, prefix: str) -> None:
+    with tarfile.open(path, "w:gz") as tar:
+        for rel, data in tree.items():
+            info = tarfile.TarInfo(_name(rel, prefix))
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                tar.addfile(info)
+            else:
+                info.size = len(data)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+        escape = tarfile.TarInfo(prefix + "../escape.py")
+        escape.size = 3
+        tar.addfile(escape, io.BytesIO(b"bad"))
+
+
+def _zip(tree, path: Path, prefix: str) -> None:
+    with zipfile.ZipFile(path, "w") as zf:
+        for rel, data in tree.items():
+            if data is None:
+                zf.writestr(_name(rel, prefix) + "/", b"")
+            else:
+                zf.writestr(_name(rel, prefix), data)
+        zf.writestr(prefix + "../escape.py", b"bad")
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("fmt", ["tar", "zip"])
+@pytest.mark.parametrize("prefix", ["", "template-main/"])
+def test_extract_matches_purge_of_rendered_tree(seed, fmt, prefix, tmp_path, monkeypatch):
+    tree = _random_tree(seed)
+    expected = _purged(tree, tmp_path, monkeypatch)
+
+    archive = tmp_path / f"template.{fmt}"
+    (_tar if fmt == "tar" else _zip)(tree, archive, prefix)
+    dest = tmp_path / "work" / "extracted"
+    ArchiveExtractor(MANIFEST, Logger("test"), strip_components=prefix.count("/")).extract(archive, dest)
+
+    assert _entries(dest) == expected
+    assert not (tmp_path / "work" / "escape.py").exists()
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from haraka.PyFast.core.cache import CacheService
+
+
+def test_coalesced_callers_survive_leader_cancellation():
+    async def scenario():
+        cache = CacheService()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        leader = asyncio.create_task(cache.get_or_load("k", load))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*followers) == [2, 2, 2]
+        assert leader.cancelled()
+        assert len(calls) == 2          # one follower re-ran the load, the others re-joined it
+
+    asyncio.run(scenario())
+
+
+def test_follower_own_cancellation_propagates():
+    async def scenario():
+        cache = CacheService()
+
+        async def load():
+            await asyncio.sleep(0.05)
+            return "v"
+
+        leader = asyncio.create_task(cache.get_or_load("k", load))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_load("k", load))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert await leader == "v"
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+import os
+import socket
+import threading
+
+import pytest
+
+from haraka.post_gen.config import PostGenConfig
+from haraka.post_gen.daemon import DaemonError, ping, run_via_daemon
+
+
+@pytest.fixture
+def silent_server(tmp_path):
+    """A listener that accepts connections and never answers."""
+    path = tmp_path / "haraka.sock"
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield path
+    server.close()
+    for conn in accepted:
+        conn.close()
+
+
+def test_client_gives_up_on_a_silent_daemon(silent_server, tmp_path):
+    cfg = PostGenConfig(variant="pyfast", project_slug="demo", author_gh="", project_dir=tmp_path,
+                        description="", use_git=False, confirm_remote=False)
+    with pytest.raises(DaemonError, match="sent nothing"):
+        run_via_daemon(cfg, silent_server, read_timeout=0.2)
+    assert ping(silent_server, timeout=0.2) is None
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason="needs root to chown the socket")
+def test_socket_owned_by_another_user_is_ignored(silent_server, monkeypatch):
+    import haraka.post_gen.daemon as daemon
+
+    os.chown(silent_server, 12345, -1)
+    refused = []
+    monkeypatch.setattr(daemon.Logger, "warn", lambda self, msg, *a, **k: refused.append(msg))
+    assert daemon._connect(silent_server, 0.2, 0.2) is None
+    assert refused and "owned by uid 12345" in refused[0]
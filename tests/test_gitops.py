@@ -0,0 +1,36 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from haraka.post_gen.service.gitOps.gitops import GitOps
+from haraka.utils import Logger
+
+
+class _Probes:
+    def __init__(self):
+        self.identity_calls = 0
+
+    def git_identity(self):
+        self.identity_calls += 1
+        return None
+
+
+class _Runner:
+    def __init__(self, commit_code: int):
+        self.probes = _Probes()
+        self.commands = []
+        self._commit_code = commit_code
+
+    def run(self, cmd, cwd=None, check=True):
+        self.commands.append(cmd[:2])
+        return SimpleNamespace(returncode=self._commit_code if cmd[1] == "commit" else 0)
+
+
+def test_identity_is_probed_only_when_the_commit_fails(tmp_path: Path):
+    ok = _Runner(commit_code=0)
+    GitOps(ok, Logger("test")).stage_commit(tmp_path)
+    assert ok.commands == [["git", "add"], ["git", "commit"]]
+    assert ok.probes.identity_calls == 0
+
+    failing = _Runner(commit_code=128)
+    GitOps(failing, Logger("test")).stage_commit(tmp_path)
+    assert failing.probes.identity_calls == 1
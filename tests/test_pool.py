@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from haraka.PyFast.core.pool import PoolTimeoutError, ResourcePool
+
+
+class FakeResource:
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.healthy = True
+        self.closed = False
+
+
+def _pool(**kwargs):
+    created = []
+
+    async def create():
+        created.append(FakeResource(len(created)))
+        return created[-1]
+
+    async def close(resource):
+        resource.closed = True
+
+    return ResourcePool(create, close=close, **kwargs), created
+
+
+def test_acquire_release_reuses_resources():
+    async def scenario():
+        pool, created = _pool(min_size=1, max_size=2)
+        await pool.warm()
+        first = await pool.acquire()
+        await pool.release(first)
+        assert await pool.acquire() is first
+        second = await pool.acquire()
+        assert second is not first and len(created) == 2
+        assert pool.stats.in_use == 2 and pool.stats.size == 2
+
+    asyncio.run(scenario())
+
+
+def test_acquire_times_out_when_exhausted():
+    async def scenario():
+        pool, _ = _pool(min_size=0, max_size=1)
+        held = await pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire(timeout=0.01)
+        assert pool.stats.timeouts == 1
+        await pool.release(held)
+        assert await pool.acquire(timeout=0.01) is held
+
+    asyncio.run(scenario())
+
+
+def test_unhealthy_idle_resource_is_closed_and_replaced():
+    async def check(resource):
+        return resource.healthy
+
+    async def scenario():
+        pool, created = _pool(min_size=1, max_size=1, health_check=check)
+        await pool.warm()
+        created[0].healthy = False
+        resource = await pool.acquire()
+        assert resource is created[1]
+        assert created[0].closed
+        assert pool.stats.failed_checks == 1 and pool.stats.size == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_health_check_closes_resource_and_frees_slot():
+    gate = asyncio.Event()
+
+    async def check(resource):
+        await gate.wait()
+        return True
+
+    async def scenario():
+        pool, created = _pool(min_size=1, max_size=1, health_check=check)
+        for _ in range(3):
+            await pool.warm()
+            waiter = asyncio.create_task(pool.acquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        assert pool.stats.size == 0
+        assert all(r.closed for r in created)
+        gate.set()
+        resource = await pool.acquire(timeout=0.1)
+        assert not resource.closed
+
+    asyncio.run(scenario())
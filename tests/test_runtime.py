@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from haraka.PyFast.Runtime import Orchestrator
+from haraka.PyFast.core.batch import BatchExecutor
+
+
+class _Settings:
+    port = 8000
+
+
+async def _double(items):
+    return [x * 2 for x in items]
+
+
+def test_lazy_service_started_during_warmup_runs_its_startup_tasks():
+    async def scenario():
+        runtime = Orchestrator()
+        batch = BatchExecutor(_double, "batch", max_wait=0.001)
+        runtime.use(batch, lazy=True)
+
+        async def warm_batch():
+            svc = await runtime.get_service("batch")
+            assert await asyncio.wait_for(svc.submit(1), 1) == 2
+
+        runtime.register_warmup(warm_batch)
+        await runtime.start(_Settings, FastAPI())
+        await runtime.wait_for_all_ready(1)
+        assert runtime.warmup_stats.failed == 0
+        assert await asyncio.wait_for(batch.submit(21), 1) == 42
+        await runtime.destroy()
+
+    asyncio.run(scenario())
+
+
+def test_lifespan_start_does_not_warn_about_first_request_tracking():
+    runtime = Orchestrator()
+    warnings = []
+    runtime.logger.warn = lambda msg, *a, **k: warnings.append(msg)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await runtime.start(_Settings, app)
+        yield
+        await runtime.destroy()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        assert client.get("/ping").status_code == 200
+    assert not [w for w in warnings if "first-request" in w]
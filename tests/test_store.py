@@ -0,0 +1,102 @@
+import os
+import stat
+
+import pytest
+
+from haraka.post_gen.service.fileOps.store import ContentStore, StoreVerificationError
+
+
+def _project(root):
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "a.py").write_text("print('a')\n")
+    (root / "pkg" / "b.py").write_text("print('a')\n")          # same content as a.py
+    (root / "run.sh").write_text("#!/bin/sh\n")
+    os.chmod(root / "run.sh", 0o755)
+    os.symlink("pkg/a.py", root / "link.py")
+    (root / ".git").mkdir()
+    (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    return root
+
+
+def _objects(store):
+    return sorted(p for p in (store.root / "objects").glob("*/*"))
+
+
+def test_ingest_materialise_verify_round_trip(tmp_path):
+    store = ContentStore(root=tmp_path / "store")
+    snapshot = store.ingest(_project(tmp_path / "src"), "demo")
+
+    assert set(snapshot.files) == {"pkg/a.py", "pkg/b.py", "run.sh"}
+    assert snapshot.symlinks == {"link.py": "pkg/a.py"}
+    assert len(_objects(store)) == 2                               # a.py and b.py share one object
+
+    dest = tmp_path / "dest"
+    stats = store.materialise("demo", dest)
+    assert stats.verified and stats.reflinked + stats.hardlinked + stats.copied == 3
+    assert (dest / "pkg" / "b.py").read_text() == "print('a')\n"
+    assert stat.S_IMODE((dest / "run.sh").stat().st_mode) == 0o755
+    assert not (dest / ".git").exists()
+
+    (dest / "pkg" / "a.py").write_text("changed\n")
+    (dest / "extra.txt").write_text("x")
+    with pytest.raises(StoreVerificationError) as info:
+        store.verify("demo", dest)
+    assert set(info.value.problems) == {"pkg/a.py content differs", "unexpected extra.txt"}
+
+
+def test_dedupe_leaves_project_intact_when_storage_cannot_be_shared(tmp_path):
+    store = ContentStore(root=tmp_path / "store")
+    store.ingest(_project(tmp_path / "first"), "first")
+    second = _project(tmp_path / "second")
+    before = {p: (p.read_bytes(), p.stat().st_mode) for p in second.rglob("*") if p.is_file()}
+
+    # Force the copy fallback: no reflinks, no hardlinks.
+    store._reflink = lambda src, dst: False
+    store.ingest(second, "second", dedupe=True)
+
+    after = {p: (p.read_bytes(), p.stat().st_mode) for p in second.rglob("*") if p.is_file()}
+    assert after == before
+    assert all(p.stat().st_nlink == 1 for p in before)
+    assert not [p for p in second.rglob(".*.tmp")]
+    store.verify("second", second)
+
+
+def test_dedupe_hardlinks_and_detach_gives_a_private_copy(tmp_path):
+    store = ContentStore(root=tmp_path / "store", hardlink=True)
+    store._reflink = lambda src, dst: False
+    store.ingest(_project(tmp_path / "first"), "first")
+    os.chmod(tmp_path / "first" / "pkg" / "a.py", 0o444)
+    project = _project(tmp_path / "second")
+    os.chmod(project / "pkg" / "a.py", 0o444)                      # object mode, so linkable
+
+    store.ingest(project, "second", dedupe=True)
+    linked = project / "pkg" / "a.py"
+    assert linked.stat().st_nlink > 1
+
+    store.detach(linked)
+    assert linked.stat().st_nlink == 1
+    assert linked.stat().st_mode & stat.S_IWUSR
+    linked.write_text("edited\n")
+    assert {p.read_text() for p in _objects(store)} == {"print('a')\n", "#!/bin/sh\n"}
+
+    store.detach(project / "run.sh")                               # not linked: no-op
+    assert (project / "run.sh").read_text() == "#!/bin/sh\n"
+
+
+def test_prune_drops_unreferenced_objects_but_not_in_flight_writes(tmp_path):
+    store = ContentStore(root=tmp_path / "store")
+    store.ingest(_project(tmp_path / "src"), "keep")
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "only.txt").write_text("only here\n")
+    store.ingest(other, "drop")
+    assert len(_objects(store)) == 3
+
+    shard = _objects(store)[0].parent
+    in_flight = store._tmp_beside(shard / ("0" * 62))
+
+    assert store.prune(keep=["keep"]) == 1
+    assert in_flight.exists()
+    assert len([p for p in _objects(store) if not p.name.startswith(".")]) == 2
+    assert store.has_snapshot("keep") and not store.has_snapshot("drop")
+    store.materialise("keep", tmp_path / "dest")
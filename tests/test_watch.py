@@ -0,0 +1,41 @@
+from haraka.post_gen.config import CompiledManifest
+from haraka.post_gen.config.config import build_spec
+from haraka.post_gen.service.fileOps.watch import DELETE, KEEP, IncrementalClassifier
+
+
+def _manifest(*keep: str) -> CompiledManifest:
+    return CompiledManifest(
+        variant="test", keep_patterns=keep, protected=(), services=(),
+        missing_services=(), spec=build_spec(keep),
+    )
+
+
+def _fresh(classifier: IncrementalClassifier) -> IncrementalClassifier:
+    """The same tree classified from scratch."""
+    return IncrementalClassifier(classifier.manifest, classifier.paths, classifier.dirs)
+
+
+def test_remove_and_readd_directory_with_matched_files():
+    paths = ["src", "src/app", "src/app/main.py", "src/app/util.py", "src/app/deep", "src/app/deep/x.py", "README"]
+    dirs = {"src", "src/app", "src/app/deep"}
+    classifier = IncrementalClassifier(_manifest("*.py"), paths, dirs)
+    assert classifier.status("src") == KEEP
+
+    classifier.remove("src")
+    assert classifier.statuses() == {"README": DELETE}
+    assert classifier.matched == set()
+
+    classifier.add("src", True)
+    classifier.add("src/app", True)
+    assert classifier.status("src") == DELETE
+    assert classifier.status("src/app") == DELETE
+    assert classifier.counts() == {KEEP: 0, DELETE: 3, "protected": 0}
+
+    classifier.add("src/app/main.py", False)
+    assert classifier.status("src") == KEEP
+    assert classifier.matched == {"src/app/main.py"}
+    assert classifier.statuses() == _fresh(classifier).statuses()
+
+    classifier.remove("src/app/main.py")
+    assert classifier.status("src") == DELETE
+    assert classifier.statuses() == _fresh(classifier).statuses()
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from haraka.PyFast.workers import PreforkRunner
+
+
+class _Settings:
+    port = 0
+
+
+def test_failed_start_still_destroys_the_runtime():
+    destroyed = []
+
+    def app_factory(runtime):
+        async def start(settings, app):
+            raise RuntimeError("service failed to start")
+
+        async def destroy():
+            destroyed.append(True)
+
+        runtime.start = start
+        runtime.destroy = destroy
+        return object()
+
+    runner = PreforkRunner(app_factory, _Settings, workers=1)
+    with pytest.raises(RuntimeError):
+        asyncio.run(runner._worker_lifecycle(0, sock=None))
+    assert destroyed == [True]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_crashed_workers_back_off_without_blocking_each_other():
+    def app_factory(runtime):
+        raise RuntimeError("crash on boot")
+
+    class Recording(PreforkRunner):
+        forks = []
+
+        def _spawn(self, slot):
+            self.forks.append((slot, time.monotonic()))
+            if len(self.forks) > 4:
+                self.stop()
+            return super()._spawn(slot)
+
+    runner = Recording(app_factory, _Settings, host="127.0.0.1", workers=2, restart_backoff=0.4)
+    runner.run()
+
+    first = {slot: at for slot, at in runner.forks[:2]}
+    second = {slot: at for slot, at in runner.forks[2:4]}
+    assert sorted(second) == [0, 1]
+    # Both dead workers are re-forked after one backoff, not one after the other.
+    assert max(second[s] - first[s] for s in (0, 1)) < 0.7